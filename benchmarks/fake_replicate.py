@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Replicate MCP - Fake Replicate API
+
+A local stand-in for api.replicate.com, for benchmarks. Predictions finish
+after a duration drawn per model from a log-normal distribution, a share of
+them fail, a share sits in the queue as if the model were cold-booting, and
+every response can be delayed to simulate network latency. Point the server
+at it with REPLICATE_BASE_URL.
+
+Usage:
+    python benchmarks/fake_replicate.py [--port 8910] [--latency 0.5] [--jitter 0.3]
+        [--model-latency black-forest-labs/flux-schnell=0.2:0.1] [--error-rate 0.01]
+        [--api-latency-ms 20] [--cold-start-rate 0.05] [--cold-start 30]
+"""
+
+import argparse
+import asyncio
+import itertools
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from aiohttp import web
+
+# Output files served for every succeeded prediction
+OUTPUT_BYTES = b"\x89PNG\r\n\x1a\n" + b"\0" * 4096
+
+# Seconds a warm model takes to pick up a prediction
+QUEUE_SECONDS = 0.05
+
+
+class FakeReplicate:
+    """Predictions, models and output files for the Replicate HTTP API"""
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        jitter: float = 0.3,
+        model_latency: Optional[Dict[str, Tuple[float, float]]] = None,
+        error_rate: float = 0.0,
+        api_latency: float = 0.0,
+        cold_start_rate: float = 0.0,
+        cold_start: float = 30.0,
+        seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.model_latency = model_latency or {}
+        self.error_rate = error_rate
+        self.api_latency = api_latency
+        self.cold_start_rate = cold_start_rate
+        self.cold_start = cold_start
+        self.random = random.Random(seed)
+        self.base_url = ""
+        self.requests = 0
+        self.predictions: Dict[str, Dict[str, Any]] = {}
+        # Version ids the server looked up, so version-based creates know their model
+        self._version_models: Dict[str, str] = {}
+        self._ids = itertools.count()
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL; port 0 picks a free port"""
+        app = web.Application(middlewares=[self._delay])
+        app.router.add_post("/v1/predictions", self._create)
+        app.router.add_post("/v1/models/{owner}/{name}/predictions", self._create)
+        app.router.add_get("/v1/predictions/{id}", self._get)
+        app.router.add_post("/v1/predictions/{id}/cancel", self._cancel)
+        app.router.add_get("/v1/models/{owner}/{name}", self._model)
+        app.router.add_get("/v1/models/{owner}/{name}/versions/{version}", self._version)
+        app.router.add_get("/v1/hardware", self._hardware)
+        app.router.add_get("/files/{name}", self._file)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def duration(self, model: str) -> float:
+        """Seconds a prediction of a model takes: log-normal around its median"""
+        median, sigma = self.model_latency.get(model, (self.latency, self.jitter))
+        return median * math.exp(self.random.gauss(0, sigma)) if sigma else median
+
+    @web.middleware
+    async def _delay(self, request: web.Request, handler):
+        self.requests += 1
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        return await handler(request)
+
+    async def _create(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if "owner" in request.match_info:
+            model = f"{request.match_info['owner']}/{request.match_info['name']}"
+        else:
+            model = self._version_models.get(body.get("version", ""), "")
+        prediction_id = f"fake{next(self._ids)}"
+        self.predictions[prediction_id] = {
+            "id": prediction_id,
+            "model": model,
+            "version": body.get("version", "latest"),
+            "input": body.get("input", {}),
+            "_created": datetime.now(timezone.utc),
+            "_started": time.monotonic(),
+            "_queued": self.cold_start if self.random.random() < self.cold_start_rate else QUEUE_SECONDS,
+            "_duration": self.duration(model),
+            "_fails": self.random.random() < self.error_rate,
+            "_canceled": False
+        }
+        return web.json_response(self._view(self.predictions[prediction_id]), status=201)
+
+    async def _get(self, request: web.Request) -> web.Response:
+        prediction = self.predictions.get(request.match_info["id"])
+        if prediction is None:
+            return web.json_response({"detail": "Not found"}, status=404)
+        return web.json_response(self._view(prediction))
+
+    async def _cancel(self, request: web.Request) -> web.Response:
+        prediction = self.predictions.get(request.match_info["id"])
+        if prediction is None:
+            return web.json_response({"detail": "Not found"}, status=404)
+        # Finished predictions stay as they are
+        if self._view(prediction)["status"] in ("starting", "processing"):
+            prediction["_canceled"] = True
+        return web.json_response(self._view(prediction))
+
+    async def _model(self, request: web.Request) -> web.Response:
+        owner, name = request.match_info["owner"], request.match_info["name"]
+        return web.json_response({
+            "url": f"https://replicate.com/{owner}/{name}",
+            "owner": owner,
+            "name": name,
+            "description": "Fake model",
+            "visibility": "public",
+            "run_count": 0,
+            "latest_version": self._version_view(f"{owner}-{name}-latest")
+        })
+
+    async def _version(self, request: web.Request) -> web.Response:
+        model = f"{request.match_info['owner']}/{request.match_info['name']}"
+        self._version_models[request.match_info["version"]] = model
+        return web.json_response(self._version_view(request.match_info["version"]))
+
+    async def _hardware(self, request: web.Request) -> web.Response:
+        return web.json_response([{"name": "Nvidia T4 GPU", "sku": "gpu-t4"}])
+
+    async def _file(self, request: web.Request) -> web.Response:
+        return web.Response(body=OUTPUT_BYTES, content_type="image/png")
+
+    def _view(self, prediction: Dict[str, Any]) -> Dict[str, Any]:
+        """The prediction as the API reports it right now"""
+        elapsed = time.monotonic() - prediction["_started"]
+        queued = prediction["_queued"]
+        running = elapsed - queued
+        if prediction["_canceled"]:
+            status = "canceled"
+        elif running < 0:
+            status = "starting"
+        elif running < prediction["_duration"]:
+            status = "processing"
+        else:
+            status = "failed" if prediction["_fails"] else "succeeded"
+
+        view = {key: value for key, value in prediction.items() if not key.startswith("_")}
+        view.update({
+            "status": status,
+            "created_at": _timestamp(prediction["_created"]),
+            "started_at": _timestamp(prediction["_created"] + timedelta(seconds=queued)) if running >= 0 else None,
+            "output": [f"{self.base_url}/files/{prediction['id']}.png"] if status == "succeeded" else None,
+            "error": "Simulated failure" if status == "failed" else None,
+            "logs": f"{min(100, int(100 * max(0.0, running) / prediction['_duration']))}%|" if prediction["_duration"] else "",
+            "metrics": {"predict_time": prediction["_duration"]} if status == "succeeded" else {},
+            "urls": {
+                "get": f"{self.base_url}/v1/predictions/{prediction['id']}",
+                "cancel": f"{self.base_url}/v1/predictions/{prediction['id']}/cancel"
+            }
+        })
+        return view
+
+    @staticmethod
+    def _version_view(version_id: str) -> Dict[str, Any]:
+        # An empty schema: the server skips local input validation
+        return {"id": version_id, "created_at": "2025-01-01T00:00:00Z", "cog_version": "0.9.0", "openapi_schema": {}}
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def parse_model_latency(value: str) -> Tuple[str, Tuple[float, float]]:
+    """MODEL=MEDIAN[:SIGMA] -> (model, (median, sigma))"""
+    model, _, spec = value.partition("=")
+    median, _, sigma = spec.partition(":")
+    if not model or not median:
+        raise argparse.ArgumentTypeError(f"Expected MODEL=MEDIAN[:SIGMA], got {value}")
+    return model, (float(median), float(sigma or 0))
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Options shaping the fake API, shared with the load benchmark"""
+    parser.add_argument("--latency", type=float, default=0.5, help="Median prediction time in seconds")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Log-normal sigma of prediction times")
+    parser.add_argument(
+        "--model-latency", type=parse_model_latency, action="append", default=[],
+        metavar="MODEL=MEDIAN[:SIGMA]", help="Prediction time distribution for one model (repeatable)"
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of predictions that fail")
+    parser.add_argument("--api-latency-ms", type=float, default=0.0, help="Delay added to every API response")
+    parser.add_argument("--cold-start-rate", type=float, default=0.0, help="Share of predictions queued by a cold boot")
+    parser.add_argument("--cold-start", type=float, default=30.0, help="Seconds a cold-booting prediction queues")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible runs")
+
+
+def from_arguments(args: argparse.Namespace) -> FakeReplicate:
+    return FakeReplicate(
+        latency=args.latency,
+        jitter=args.jitter,
+        model_latency=dict(args.model_latency),
+        error_rate=args.error_rate,
+        api_latency=args.api_latency_ms / 1000,
+        cold_start_rate=args.cold_start_rate,
+        cold_start=args.cold_start,
+        seed=args.seed
+    )
+
+
+async def serve(args: argparse.Namespace):
+    fake = from_arguments(args)
+    base_url = await fake.start(args.host, args.port)
+    print(f"Fake Replicate API on {base_url} (export REPLICATE_BASE_URL={base_url})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fake.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Replicate API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8910)
+    add_arguments(parser)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Replicate MCP - Load Benchmark
+
+Runs `python -m replicate_mcp` against a local fake Replicate API (see
+fake_replicate.py) and drives concurrent tools/call traffic through the real
+MCP stdio transport, one tool at a time. For each tool it reports:
+  * throughput (calls per second) and errors
+  * p50/p95/p99/max call latency as seen by the client
+  * p50/p99 event-loop lag inside the server (bucket upper bounds)
+and finally the server's connection reuse, coalescing and cache counters.
+
+Usage:
+    python benchmarks/load.py [--tools generate_image,upscale_image,list_models]
+        [--requests 200] [--concurrency 32] [--duplicate-ratio 0.2] [--download]
+        [--latency 0.5] [--jitter 0.3] [--model-latency MODEL=MEDIAN[:SIGMA]]
+        [--error-rate 0.01] [--api-latency-ms 20] [--cold-start-rate 0.05] [--cold-start 30] [--seed 1]
+        [--max-p99-ms 3000] [--max-loop-lag-ms 50] [--json] [--verbose]
+
+Exits with status 1 when a tool's p99 latency or loop lag exceeds its --max-*
+budget, so it can guard against regressions in CI.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fake_replicate import FakeReplicate, add_arguments, from_arguments
+from startup import child_env
+
+DEFAULT_TOOLS = "generate_image,upscale_image,list_models"
+
+# Tools that create predictions and accept download=true
+GENERATION_TOOLS = {
+    "generate_image", "generate_video", "generate_audio", "generate_3d",
+    "upscale_image", "remove_background", "generate_image_batch"
+}
+
+LAG_BUCKET = re.compile(r'^replicate_mcp_event_loop_lag_seconds_bucket\{le="([^"]+)"\} (\d+)$', re.MULTILINE)
+
+
+def tool_arguments(tool: str, key: int, base_url: str, download: bool) -> Dict[str, Any]:
+    """Arguments for one call; equal keys give identical calls"""
+    if tool == "generate_image":
+        arguments = {"prompt": f"benchmark image {key}", "seed": key}
+    elif tool in ("generate_video", "generate_audio", "generate_3d"):
+        arguments = {"prompt": f"benchmark {tool} {key}"}
+    elif tool == "upscale_image":
+        arguments = {"image_url": f"{base_url}/files/input-{key}.png"}
+    elif tool == "remove_background":
+        arguments = {"media_url": f"{base_url}/files/input-{key}.png"}
+    elif tool == "generate_image_batch":
+        arguments = {"items": [{"prompt": f"benchmark batch {key}", "seed": seed} for seed in range(5)]}
+    elif tool == "list_models":
+        arguments = {"category": "image", "limit": 20, "cursor": str(key % 3 * 20)}
+    else:
+        arguments = {}
+    if download and tool in GENERATION_TOOLS:
+        arguments["download"] = True
+    return arguments
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of unsorted samples"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))]
+
+
+def lag_buckets(metrics_text: str) -> List[Tuple[float, int]]:
+    """Cumulative (upper bound, count) pairs of the server's loop-lag histogram"""
+    return [(float(bound), int(count)) for bound, count in LAG_BUCKET.findall(metrics_text)]
+
+
+def lag_quantile(before: List[Tuple[float, int]], after: List[Tuple[float, int]], q: float) -> Optional[float]:
+    """Bucket bound of a loop-lag quantile over the samples taken between two scrapes"""
+    counts = [(bound, end - start) for (bound, end), (_, start) in zip(after, before or [(b, 0) for b, _ in after])]
+    total = counts[-1][1] if counts else 0
+    if not total:
+        return None
+    for bound, cumulative in counts:
+        if cumulative >= q * total:
+            return bound
+    return None
+
+
+async def call_text(session, tool: str, arguments: Dict[str, Any]) -> str:
+    result = await session.call_tool(tool, arguments)
+    return result.content[0].text if result.content else ""
+
+
+async def run_tool(session, tool: str, args: argparse.Namespace, base_url: str, rng: random.Random) -> Dict[str, Any]:
+    """Send --requests calls of one tool, --concurrency at a time"""
+    before = lag_buckets(await call_text(session, "get_metrics", {"format": "prometheus"}))
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(index: int):
+        nonlocal errors
+        # A share of calls repeats an earlier one, exercising coalescing and caching
+        key = rng.randrange(max(1, index)) if index and rng.random() < args.duplicate_ratio else index
+        arguments = tool_arguments(tool, key, base_url, args.download)
+        async with semaphore:
+            started = time.perf_counter()
+            text = await call_text(session, tool, arguments)
+            latencies.append(time.perf_counter() - started)
+        if text.startswith("Error") or '"error"' in text[:200]:
+            errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    after = lag_buckets(await call_text(session, "get_metrics", {"format": "prometheus"}))
+    lag_p50 = lag_quantile(before, after, 0.5)
+    lag_p99 = lag_quantile(before, after, 0.99)
+    return {
+        "requests": args.requests,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(args.requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1),
+        "loop_lag_p50_ms": None if lag_p50 is None else lag_p50 * 1000,
+        "loop_lag_p99_ms": None if lag_p99 is None else lag_p99 * 1000
+    }
+
+
+async def benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    fake: FakeReplicate = from_arguments(args)
+    base_url = await fake.start()
+
+    env = child_env()
+    env["REPLICATE_BASE_URL"] = base_url
+    env["REPLICATE_LOOP_LAG_INTERVAL"] = "0.01"
+    env["REPLICATE_CATALOG_RELOAD_INTERVAL"] = "0"
+    # Measure the server, not its throttles; explicit settings still win
+    for name, value in {
+        "REPLICATE_POLL_INTERVAL": str(args.poll_interval),
+        "REPLICATE_BUDGET_LIMIT": "1000000",
+        "REPLICATE_RATE_LIMIT": "10000",
+        "REPLICATE_MODEL_RATE_LIMIT": "10000",
+        "REPLICATE_TOKEN_RATE_LIMIT": "10000",
+        "REPLICATE_MAX_CONCURRENCY": str(max(16, args.concurrency))
+    }.items():
+        env.setdefault(name, value)
+
+    rng = random.Random(args.seed)
+    results: Dict[str, Any] = {"tools": {}}
+    params = StdioServerParameters(command=sys.executable, args=["-m", "replicate_mcp"], env=env)
+    try:
+        errlog = sys.stderr if args.verbose else open(os.devnull, "w")
+        async with stdio_client(params, errlog=errlog) as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                for tool in args.tools.split(","):
+                    results["tools"][tool] = await run_tool(session, tool.strip(), args, base_url, rng)
+
+                stats = json.loads(await call_text(session, "get_stats", {}))
+                results["server"] = {
+                    "http": stats["http"],
+                    "coalescing": stats["coalescing"],
+                    "result_cache": stats["result_cache"]
+                }
+    finally:
+        await fake.stop()
+
+    results["fake_api_requests"] = fake.requests
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test replicate-mcp against a fake Replicate API")
+    parser.add_argument("--tools", default=DEFAULT_TOOLS, help=f"Comma-separated tools (default: {DEFAULT_TOOLS})")
+    parser.add_argument("--requests", type=int, default=200, help="Calls per tool")
+    parser.add_argument("--concurrency", type=int, default=32, help="Calls in flight at once")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0, help="Share of calls repeating an earlier one")
+    parser.add_argument("--download", action="store_true", help="Also download outputs")
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="REPLICATE_POLL_INTERVAL for the server")
+    add_arguments(parser)
+    parser.add_argument("--max-p99-ms", type=float, help="Fail if any tool's p99 latency exceeds this")
+    parser.add_argument("--max-loop-lag-ms", type=float, help="Fail if any tool's p99 loop lag exceeds this")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show the server's log output")
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'tool':<24}{'calls':>7}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}"
+              f"{'p99 ms':>10}{'max ms':>10}{'lag p99 ms':>12}")
+        for tool, row in results["tools"].items():
+            lag = "-" if row["loop_lag_p99_ms"] is None else f"<={row['loop_lag_p99_ms']:g}"
+            print(f"{tool:<24}{row['requests']:>7}{row['errors']:>8}{row['throughput_rps']:>9}"
+                  f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}{lag:>12}")
+        http = results["server"]["http"]
+        cache = results["server"]["result_cache"] or {}
+        print(f"\nHTTP requests {http['requests']}, connections opened {http['connections_opened']}, "
+              f"reuse rate {http['reuse_rate']}; coalesced calls {results['server']['coalescing']['coalesced_calls']}; "
+              f"result cache {json.dumps(cache)}")
+
+    failed = False
+    for tool, row in results["tools"].items():
+        if args.max_p99_ms and row["p99_ms"] > args.max_p99_ms:
+            print(f"FAIL: {tool} p99 latency above {args.max_p99_ms} ms", file=sys.stderr)
+            failed = True
+        if args.max_loop_lag_ms and (row["loop_lag_p99_ms"] or 0) > args.max_loop_lag_ms:
+            print(f"FAIL: {tool} event-loop lag above {args.max_loop_lag_ms} ms", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Replicate MCP - Startup Benchmark
+
+Measures, in fresh interpreters:
+  * import time of replicate_mcp.server
+  * time from spawning `python -m replicate_mcp` to the first tools/list reply
+
+Usage:
+    python benchmarks/startup.py [--runs 5] [--max-import-ms 800] [--max-list-tools-ms 2000] [--json]
+
+Exits with status 1 when a median exceeds its --max-* budget, so it can
+guard against startup regressions in CI.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); "
+    "import replicate_mcp.server; "
+    "print((time.perf_counter() - started) * 1000)"
+)
+
+
+def child_env() -> Dict[str, str]:
+    """Environment for the measured processes: sources on the path, throwaway caches"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+    env.setdefault("REPLICATE_API_TOKEN", "r8_benchmark")
+    env["REPLICATE_MCP_CACHE_DIR"] = tempfile.mkdtemp(prefix="replicate-mcp-bench-")
+    env["REPLICATE_LOG_LEVEL"] = "WARNING"
+    return env
+
+
+def measure_import(env: Dict[str, str]) -> float:
+    """Milliseconds to import the server module in a new interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        env=env, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+async def measure_list_tools(env: Dict[str, str]) -> float:
+    """Milliseconds from spawning the server to its first tools/list reply"""
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    params = StdioServerParameters(command=sys.executable, args=["-m", "replicate_mcp"], env=env)
+    started = time.perf_counter()
+    async with stdio_client(params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            tools = await session.list_tools()
+            elapsed = (time.perf_counter() - started) * 1000
+    if not tools.tools:
+        raise RuntimeError("Server listed no tools")
+    return elapsed
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "median_ms": round(statistics.median(samples), 1),
+        "min_ms": round(min(samples), 1),
+        "max_ms": round(max(samples), 1)
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark replicate-mcp startup")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, help="Fail if the median import time exceeds this")
+    parser.add_argument("--max-list-tools-ms", type=float, help="Fail if the median time to tools/list exceeds this")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    env = child_env()
+
+    # One warm-up run so bytecode compilation is not measured
+    measure_import(env)
+
+    import_samples = [measure_import(env) for _ in range(args.runs)]
+    list_tools_samples = [asyncio.run(measure_list_tools(env)) for _ in range(args.runs)]
+
+    results = {
+        "runs": args.runs,
+        "import": summarize(import_samples),
+        "first_list_tools": summarize(list_tools_samples)
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"import replicate_mcp.server   median {results['import']['median_ms']:8.1f} ms  "
+              f"(min {results['import']['min_ms']}, max {results['import']['max_ms']})")
+        print(f"spawn -> first tools/list     median {results['first_list_tools']['median_ms']:8.1f} ms  "
+              f"(min {results['first_list_tools']['min_ms']}, max {results['first_list_tools']['max_ms']})")
+
+    failed = False
+    if args.max_import_ms and results["import"]["median_ms"] > args.max_import_ms:
+        print(f"FAIL: import time above {args.max_import_ms} ms", file=sys.stderr)
+        failed = True
+    if args.max_list_tools_ms and results["first_list_tools"]["median_ms"] > args.max_list_tools_ms:
+        print(f"FAIL: time to first tools/list above {args.max_list_tools_ms} ms", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
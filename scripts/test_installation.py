@@ -58,10 +58,10 @@ def test_python_version():
     test_start("Python Version")
     
     python_version = sys.version_info
-    if python_version.major == 3 and python_version.minor >= 8:
+    if python_version.major == 3 and python_version.minor >= 10:
         test_pass(f"Python {python_version.major}.{python_version.minor}.{python_version.micro}")
     else:
-        test_fail(f"Python 3.8+ required, found {python_version.major}.{python_version.minor}")
+        test_fail(f"Python 3.10+ required, found {python_version.major}.{python_version.minor}")
 
 def test_required_modules():
     """Test required Python modules"""
@@ -7,20 +7,17 @@ __version__ = "1.0.0"
 __author__ = "Daniel Fleuren"
 __email__ = "daniel@example.com"
 
-# Import main components when available
-try:
-    from .complete_catalog import COMPLETE_MODEL_CATALOG
-    
-    __all__ = [
-        "COMPLETE_MODEL_CATALOG",
-        "__version__",
-        "__author__",
-        "__email__"
-    ]
-except ImportError:
-    # Basic imports for testing without dependencies
-    __all__ = [
-        "__version__",
-        "__author__", 
-        "__email__"
-    ]
\ No newline at end of file
+__all__ = [
+    "COMPLETE_MODEL_CATALOG",
+    "__version__",
+    "__author__",
+    "__email__"
+]
+
+
+def __getattr__(name):
+    # The catalog is read on first use, so importing the package does no I/O
+    if name == "COMPLETE_MODEL_CATALOG":
+        from .complete_catalog import packaged_catalog
+        return packaged_catalog().models
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,7 @@
+"""python -m replicate_mcp"""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
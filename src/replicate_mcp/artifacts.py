@@ -0,0 +1,180 @@
+"""Local content-addressed store for prediction output files"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import posixpath
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from .tracing import tracer
+
+if TYPE_CHECKING:
+    from .metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+def output_urls(output: Any) -> List[str]:
+    """HTTP(S) URLs in a prediction output, in order and without repeats"""
+    urls: List[str] = []
+
+    def collect(value: Any):
+        if isinstance(value, str):
+            if value.startswith(("http://", "https://")) and value not in urls:
+                urls.append(value)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                collect(item)
+        elif isinstance(value, dict):
+            for item in value.values():
+                collect(item)
+
+    collect(output)
+    return urls
+
+
+class ArtifactStore:
+    """Download output files into ``objects/<sha256[:2]>/<sha256><ext>``
+
+    Files are streamed to disk in chunks, interrupted downloads resume with
+    HTTP range requests, and identical content is stored once.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        client: httpx.AsyncClient,
+        concurrency: int = 4,
+        chunk_size: int = 1 << 20,
+        max_attempts: int = 3,
+        download_seconds: Optional["Histogram"] = None
+    ):
+        self.directory = directory
+        self.client = client
+        self.download_seconds = download_seconds
+        self.chunk_size = chunk_size
+        self.max_attempts = max_attempts
+        self.downloaded = 0
+        self.deduplicated = 0
+        self.resumed = 0
+        self.bytes_downloaded = 0
+        self._slots = asyncio.Semaphore(concurrency)
+        self._by_url: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+
+        (self.directory / "objects").mkdir(parents=True, exist_ok=True)
+        (self.directory / "partial").mkdir(parents=True, exist_ok=True)
+
+    async def fetch_all(self, output: Any) -> List[Dict[str, Any]]:
+        """Download every file in a prediction output concurrently"""
+        return list(await asyncio.gather(*(self.fetch(url) for url in output_urls(output))))
+
+    async def fetch(self, url: str) -> Dict[str, Any]:
+        """Download one URL, or return the stored copy; errors are reported, not raised"""
+        artifact = self._by_url.get(url)
+        if artifact is not None and Path(artifact["path"]).exists():
+            return artifact
+
+        # Concurrent requests for one URL share a download
+        future = self._in_flight.get(url)
+        if future is None:
+            future = self._in_flight[url] = asyncio.ensure_future(self._fetch(url))
+            future.add_done_callback(lambda _: self._in_flight.pop(url, None))
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "downloaded": self.downloaded,
+            "deduplicated": self.deduplicated,
+            "resumed": self.resumed,
+            "bytes_downloaded": self.bytes_downloaded
+        }
+
+    async def _fetch(self, url: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        with tracer.span("artifact.download", url=url) as span:
+            artifact = await self._download_and_store(url)
+            span.set_attribute("size", artifact.get("size"))
+            span.set_attribute("error", artifact.get("error"))
+        if self.download_seconds is not None:
+            self.download_seconds.labels("failed" if "error" in artifact else "ok").observe(time.perf_counter() - started)
+        return artifact
+
+    async def _download_and_store(self, url: str) -> Dict[str, Any]:
+        async with self._slots:
+            partial = self.directory / "partial" / (hashlib.sha256(url.encode("utf-8")).hexdigest() + ".part")
+
+            for attempt in range(self.max_attempts):
+                try:
+                    await self._download(url, partial)
+                    break
+                except httpx.HTTPError as e:
+                    logger.warning(f"Download of {url} interrupted (attempt {attempt + 1}): {e}")
+                    if attempt == self.max_attempts - 1:
+                        return {"url": url, "error": str(e)}
+                    await asyncio.sleep(2 ** attempt)
+                except OSError as e:
+                    # A full or read-only disk; the remote URL still works
+                    logger.warning(f"Could not save {url}: {e}")
+                    return {"url": url, "error": str(e)}
+
+            try:
+                # Hashing a large video would stall the event loop
+                artifact = await asyncio.get_event_loop().run_in_executor(None, self._store, url, partial)
+            except OSError as e:
+                logger.warning(f"Could not store {url}: {e}")
+                return {"url": url, "error": str(e)}
+            self._by_url[url] = artifact
+            return artifact
+
+    async def _download(self, url: str, partial: Path):
+        """Stream a URL into its partial file, continuing where it left off"""
+        offset = partial.stat().st_size if partial.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        async with self.client.stream("GET", url, headers=headers) as response:
+            if offset and response.status_code == 416:
+                # Nothing left to fetch; the partial file is complete
+                return
+            response.raise_for_status()
+
+            if offset and response.status_code == 206:
+                self.resumed += 1
+                mode = "ab"
+            else:
+                # The server ignored the range; start over
+                mode = "wb"
+
+            with open(partial, mode) as fh:
+                async for chunk in response.aiter_bytes(self.chunk_size):
+                    fh.write(chunk)
+                    self.bytes_downloaded += len(chunk)
+
+    def _store(self, url: str, partial: Path) -> Dict[str, Any]:
+        """Move a finished download to its digest path, dropping it if already stored"""
+        digest = hashlib.sha256()
+        size = 0
+        with open(partial, "rb") as fh:
+            for chunk in iter(lambda: fh.read(self.chunk_size), b""):
+                digest.update(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+
+        extension = posixpath.splitext(urlparse(url).path)[1]
+        path = self.directory / "objects" / sha256[:2] / f"{sha256}{extension}"
+        if path.exists():
+            self.deduplicated += 1
+            partial.unlink()
+        else:
+            path.parent.mkdir(exist_ok=True)
+            os.replace(partial, path)
+            self.downloaded += 1
+
+        return {"url": url, "path": str(path), "uri": path.as_uri(), "sha256": sha256, "size": size}
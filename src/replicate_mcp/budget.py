@@ -0,0 +1,253 @@
+"""Persistent budget ledger with reserve/commit semantics"""
+
+import asyncio
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reservations (
+    id TEXT PRIMARY KEY,
+    period TEXT NOT NULL,
+    amount REAL NOT NULL,
+    status TEXT NOT NULL,
+    description TEXT,
+    created_at REAL NOT NULL,
+    settled_at REAL
+);
+CREATE INDEX IF NOT EXISTS reservations_status ON reservations (status, created_at);
+CREATE TABLE IF NOT EXISTS totals (
+    period TEXT PRIMARY KEY,
+    spent REAL NOT NULL DEFAULT 0,
+    reserved REAL NOT NULL DEFAULT 0
+);
+"""
+
+# Backoff between attempts while another process holds the write lock
+RETRY_DELAY = 0.005
+MAX_RETRY_DELAY = 0.1
+
+
+class BudgetExceededError(Exception):
+    """Reserving the cost would exceed the budget limit"""
+
+    def __init__(self, message: str = "Budget limit exceeded"):
+        super().__init__(message)
+
+
+def current_period() -> str:
+    """Budget period the limit applies to (calendar month)"""
+    return datetime.now().strftime("%Y-%m")
+
+
+class BudgetLedger:
+    """Budget spend tracked as reservations in SQLite (WAL mode)
+
+    Costs are reserved atomically before a prediction is submitted and later
+    committed or refunded, so concurrent calls cannot overshoot the limit.
+    Several server processes may share one ledger file. SQLite would wait for
+    another process's write lock inside the call, stalling the event loop, so
+    writes fail fast and are retried for up to ``busy_timeout`` seconds; the
+    ``a``-prefixed methods sleep between attempts without blocking.
+    """
+
+    def __init__(self, limit: float, path: Union[Path, str] = ":memory:", busy_timeout: float = 5.0):
+        self.limit = limit
+        self.busy_timeout = busy_timeout
+        self.path = str(path)
+        if self.path != ":memory:":
+            # "~/..." from the environment is not expanded by the shell when quoted
+            ledger = Path(self.path).expanduser()
+            ledger.parent.mkdir(parents=True, exist_ok=True)
+            self.path = str(ledger)
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        if self.path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("PRAGMA busy_timeout=0")
+        self._db.executescript(SCHEMA)
+
+    def reserve(self, amount: float, description: str = "") -> str:
+        """Reserve an amount against this period's budget and return the reservation id
+
+        Raises BudgetExceededError if spent plus reserved plus amount would
+        exceed the limit.
+        """
+        return self.reserve_many([amount], description)[0]
+
+    def reserve_many(self, amounts: List[float], description: str = "") -> List[str]:
+        """Reserve several amounts at once, all or nothing"""
+        return self._retry(self._reserve_many, amounts, description)
+
+    def commit(self, reservation_id: str, amount: Optional[float] = None):
+        """Turn a reservation into spend, optionally with the actual amount"""
+        self._retry(self._settle, reservation_id, "committed", amount)
+
+    def refund(self, reservation_id: str):
+        """Release a reservation without spending it"""
+        self._retry(self._settle, reservation_id, "refunded", 0.0)
+
+    async def areserve(self, amount: float, description: str = "") -> str:
+        return (await self.areserve_many([amount], description))[0]
+
+    async def areserve_many(self, amounts: List[float], description: str = "") -> List[str]:
+        return await self._aretry(self._reserve_many, amounts, description)
+
+    async def acommit(self, reservation_id: str, amount: Optional[float] = None):
+        await self._aretry(self._settle, reservation_id, "committed", amount)
+
+    async def arefund(self, reservation_id: str):
+        await self._aretry(self._settle, reservation_id, "refunded", 0.0)
+
+    def _reserve_many(self, amounts: List[float], description: str) -> List[str]:
+        period = current_period()
+        now = time.time()
+        reservation_ids = [uuid.uuid4().hex for _ in amounts]
+
+        with self._transaction():
+            spent, reserved = self._totals(period)
+            if spent + reserved + sum(amounts) > self.limit + 1e-9:
+                raise BudgetExceededError()
+            self._db.executemany(
+                "INSERT INTO reservations (id, period, amount, status, description, created_at) "
+                "VALUES (?, ?, ?, 'reserved', ?, ?)",
+                [
+                    (reservation_id, period, amount, description, now)
+                    for reservation_id, amount in zip(reservation_ids, amounts)
+                ]
+            )
+            self._db.execute(
+                "UPDATE totals SET reserved = reserved + ? WHERE period = ?", (sum(amounts), period)
+            )
+
+        return reservation_ids
+
+    def settle_stale(self, max_age: float) -> int:
+        """Commit reservations left behind by a process that died mid-prediction
+
+        The prediction may have run, so stale reservations count as spent.
+        """
+        cutoff = time.time() - max_age
+        rows = self._db.execute(
+            "SELECT id FROM reservations WHERE status = 'reserved' AND created_at < ?", (cutoff,)
+        ).fetchall()
+        for (reservation_id,) in rows:
+            self.commit(reservation_id)
+        return len(rows)
+
+    @property
+    def spent(self) -> float:
+        return self._totals(current_period())[0]
+
+    @property
+    def reserved(self) -> float:
+        return self._totals(current_period())[1]
+
+    @property
+    def remaining(self) -> float:
+        spent, reserved = self._totals(current_period())
+        return self.limit - spent - reserved
+
+    def status(self) -> Dict[str, Any]:
+        spent, reserved = self._totals(current_period())
+        return {
+            "period": current_period(),
+            "budget_limit": self.limit,
+            "budget_spent": round(spent, 4),
+            "budget_reserved": round(reserved, 4),
+            "budget_remaining": round(max(self.limit - spent - reserved, 0.0), 4),
+            "percentage_used": round((spent / self.limit) * 100, 1) if self.limit else 0.0
+        }
+
+    def close(self):
+        self._db.close()
+
+    def _settle(self, reservation_id: str, status: str, amount: Optional[float]):
+        with self._transaction():
+            row = self._db.execute(
+                "SELECT period, amount FROM reservations WHERE id = ? AND status = 'reserved'",
+                (reservation_id,)
+            ).fetchone()
+            if row is None:
+                # Already settled
+                return
+            period, reserved_amount = row
+            spent_amount = reserved_amount if amount is None else amount
+
+            self._db.execute(
+                "UPDATE reservations SET status = ?, amount = ?, settled_at = ? WHERE id = ?",
+                (status, spent_amount if status == "committed" else reserved_amount, time.time(), reservation_id)
+            )
+            self._db.execute(
+                "UPDATE totals SET reserved = MAX(reserved - ?, 0), spent = spent + ? WHERE period = ?",
+                (reserved_amount, spent_amount if status == "committed" else 0.0, period)
+            )
+
+    def _retry(self, operation: Callable, *args):
+        """Run a write, retrying while another process holds the lock"""
+        deadline = time.monotonic() + self.busy_timeout
+        delay = RETRY_DELAY
+        while True:
+            try:
+                return operation(*args)
+            except sqlite3.OperationalError as e:
+                if not _locked(e) or time.monotonic() >= deadline:
+                    raise
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+
+    async def _aretry(self, operation: Callable, *args):
+        """Like _retry, but yields to the event loop between attempts"""
+        deadline = time.monotonic() + self.busy_timeout
+        delay = RETRY_DELAY
+        while True:
+            try:
+                return operation(*args)
+            except sqlite3.OperationalError as e:
+                if not _locked(e) or time.monotonic() >= deadline:
+                    raise
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+
+    def _totals(self, period: str):
+        row = self._db.execute(
+            "SELECT spent, reserved FROM totals WHERE period = ?", (period,)
+        ).fetchone()
+        return row if row else (0.0, 0.0)
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._db)
+
+
+class _ImmediateTransaction:
+    """BEGIN IMMEDIATE ... COMMIT, taking the write lock up front"""
+
+    def __init__(self, db: sqlite3.Connection):
+        self._db = db
+
+    def __enter__(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        # Make sure this period has a totals row to update
+        self._db.execute("INSERT OR IGNORE INTO totals (period) VALUES (?)", (current_period(),))
+        return self._db
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            try:
+                self._db.execute("COMMIT")
+                return False
+            except sqlite3.Error:
+                # A failed COMMIT leaves the transaction open
+                self._db.execute("ROLLBACK")
+                raise
+        self._db.execute("ROLLBACK")
+        return False
+
+
+def _locked(error: sqlite3.OperationalError) -> bool:
+    """Whether an error means another connection holds the lock"""
+    message = str(error)
+    return "locked" in message or "busy" in message
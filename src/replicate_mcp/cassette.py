@@ -0,0 +1,284 @@
+"""Record and replay Replicate API traffic
+
+A cassette is a JSON-lines file with one HTTP exchange per line (gzipped
+when its name ends in ``.gz``). Recording passes requests through to the
+network and appends each exchange; replaying serves the recorded responses
+without touching the network, so prediction runs can be reproduced offline
+and in CI without spending anything.
+
+Requests are matched on method, path and query (not host) and a normalized
+JSON body: webhook settings are dropped, keys sorted, long strings such as
+data URIs replaced by their digest, and chosen input fields (a random
+``seed``, say) ignored. Repeated requests, like the status polls of one
+prediction, get their recorded responses in order, the last one repeating.
+
+API responses (JSON) are stored in full. Other bodies, such as output files,
+are stored only up to ``max_body`` bytes; larger ones keep just their digest
+and size, and replaying them fails like a request that was never recorded.
+"""
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, List, Optional, Sequence
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+MODES = ("record", "replay")
+
+# Request fields that differ between runs without changing the outcome
+VOLATILE_FIELDS = ("webhook", "webhook_events_filter")
+
+# Response headers worth keeping; the rest are connection details
+KEPT_HEADERS = ("content-type", "etag", "last-modified", "retry-after")
+
+# Strings longer than this are matched and stored by digest
+MAX_STRING = 256
+
+# Largest non-JSON response body stored in full
+MAX_BODY = 1 << 20
+
+
+class CassetteMiss(httpx.TransportError):
+    """A replayed request has no recorded response"""
+
+
+class Cassette:
+    """Exchanges recorded to, or replayed from, one file
+
+    ``time_scale`` stretches replay: each response is delayed by its recorded
+    latency times the scale, so 0 (the default) replays as fast as possible
+    and 1 in real time.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        mode: str,
+        ignore_inputs: Iterable[str] = (),
+        time_scale: float = 0.0,
+        passthrough: Sequence[str] = (),
+        max_body: int = MAX_BODY
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode} (use {', '.join(MODES)})")
+        self.path = path
+        self.mode = mode
+        self.ignore_inputs = frozenset(ignore_inputs)
+        self.time_scale = time_scale
+        self.max_body = max_body
+        # URL prefixes that always go to the network, e.g. a trace collector
+        self.passthrough = tuple(prefix for prefix in passthrough if prefix)
+        self.recorded = 0
+        self.served = 0
+        self.misses = 0
+        self._file: Optional[IO[str]] = None
+        self._exchanges: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._positions: Dict[str, int] = defaultdict(int)
+
+        if mode == "replay":
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def key(self, method: str, url: httpx.URL, body: Any) -> str:
+        """Match key of a request; ``body`` is its parsed JSON, digest or None"""
+        target = url.path
+        if url.query:
+            target += "?" + "&".join(sorted(url.query.decode("ascii").split("&")))
+        if isinstance(body, dict) and isinstance(body.get("input"), dict) and self.ignore_inputs:
+            body = {
+                **body,
+                "input": {name: value for name, value in body["input"].items() if name not in self.ignore_inputs}
+            }
+        return f"{method} {target} {json.dumps(body, sort_keys=True, separators=(',', ':'))}"
+
+    def record(self, request: httpx.Request, body: Any, response: httpx.Response, content: bytes, seconds: float):
+        """Append one exchange to the file"""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = _open(self.path, "w")
+        entry = {
+            "method": request.method,
+            "url": _target(request.url),
+            "body": body,
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+            "seconds": round(seconds, 4)
+        }
+        entry.update(_encode_content(response.headers.get("content-type", ""), content, self.max_body))
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self.recorded += 1
+
+    def next_response(self, key: str) -> Optional[Dict[str, Any]]:
+        """The next recorded exchange for a request key, None if there is none"""
+        exchanges = self._exchanges.get(key)
+        if not exchanges:
+            return None
+        position = self._positions[key]
+        self._positions[key] = min(position + 1, len(exchanges) - 1)
+        return exchanges[position]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "path": str(self.path),
+            "recorded": self.recorded,
+            "exchanges": sum(len(exchanges) for exchanges in self._exchanges.values()),
+            "served": self.served,
+            "misses": self.misses,
+            "time_scale": self.time_scale
+        }
+
+    def _load(self):
+        try:
+            with _open(self.path, "r") as fh:
+                for line in fh:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    key = self.key(entry["method"], httpx.URL(entry["url"]), entry["body"])
+                    self._exchanges[key].append(entry)
+        except (OSError, ValueError, KeyError) as e:
+            raise ValueError(f"Cannot replay cassette {self.path}: {e}") from e
+        logger.info(f"Replaying {sum(map(len, self._exchanges.values()))} exchanges from {self.path}")
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper recording exchanges to, or replaying them from, a cassette"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cassette: Cassette):
+        self.transport = transport
+        self.cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.cassette.passthrough and str(request.url).startswith(self.cassette.passthrough):
+            return await self.transport.handle_async_request(request)
+
+        body = _normalize_body(await request.aread())
+        if self.cassette.replaying:
+            return await self._replay(request, body)
+
+        started = time.monotonic()
+        response = await self.transport.handle_async_request(request)
+        try:
+            # Read it all so it can be stored; the body is handed back decoded
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        self.cassette.record(request, body, response, content, time.monotonic() - started)
+
+        headers = [
+            (name, value) for name, value in response.headers.multi_items()
+            if name not in ("content-encoding", "content-length", "transfer-encoding")
+        ]
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    async def aclose(self):
+        self.cassette.close()
+        await self.transport.aclose()
+
+    async def _replay(self, request: httpx.Request, body: Any) -> httpx.Response:
+        key = self.cassette.key(request.method, request.url, body)
+        entry = self.cassette.next_response(key)
+        if entry is None:
+            self.cassette.misses += 1
+            raise CassetteMiss(f"No recorded response for {request.method} {_target(request.url)}", request=request)
+        if "omitted" in entry:
+            self.cassette.misses += 1
+            raise CassetteMiss(
+                f"Body of {request.method} {_target(request.url)} was not recorded "
+                f"({entry['omitted']['size']} bytes, over the cassette's size limit)",
+                request=request
+            )
+
+        self.cassette.served += 1
+        if self.cassette.time_scale > 0 and entry.get("seconds"):
+            await asyncio.sleep(entry["seconds"] * self.cassette.time_scale)
+        return httpx.Response(
+            entry["status"],
+            headers=entry.get("headers", {}),
+            content=_decode_content(entry),
+            request=request
+        )
+
+
+def _target(url: httpx.URL) -> str:
+    """Path and query of a URL; hosts differ between recording and replay setups"""
+    return url.raw_path.decode("ascii")
+
+
+def _normalize_body(content: bytes) -> Any:
+    """A request body as it is matched: parsed, trimmed JSON or a digest"""
+    if not content:
+        return None
+    try:
+        body = json.loads(content)
+    except ValueError:
+        return "sha256:" + hashlib.sha256(content).hexdigest()
+    if isinstance(body, dict):
+        body = {name: value for name, value in body.items() if name not in VOLATILE_FIELDS}
+    return _compact(body)
+
+
+def _compact(value: Any) -> Any:
+    if isinstance(value, str) and len(value) > MAX_STRING:
+        return "sha256:" + hashlib.sha256(value.encode("utf-8")).hexdigest()
+    if isinstance(value, dict):
+        return {name: _compact(item) for name, item in value.items()}
+    if isinstance(value, list):
+        return [_compact(item) for item in value]
+    return value
+
+
+def _encode_content(content_type: str, content: bytes, max_body: int) -> Dict[str, Any]:
+    """JSON bodies are stored as JSON, text as text, anything else base64
+
+    Bodies other than JSON over ``max_body`` bytes are replaced by their
+    digest and size.
+    """
+    if "json" in content_type:
+        try:
+            return {"json": json.loads(content)}
+        except ValueError:
+            pass
+    if len(content) > max_body:
+        return {"omitted": {"sha256": hashlib.sha256(content).hexdigest(), "size": len(content)}}
+    if content_type.startswith("text/"):
+        try:
+            return {"text": content.decode("utf-8")}
+        except UnicodeDecodeError:
+            pass
+    return {"base64": base64.b64encode(content).decode("ascii")} if content else {}
+
+
+def _decode_content(entry: Dict[str, Any]) -> bytes:
+    if "json" in entry:
+        return json.dumps(entry["json"]).encode("utf-8")
+    if "text" in entry:
+        return entry["text"].encode("utf-8")
+    if "base64" in entry:
+        return base64.b64decode(entry["base64"])
+    return b""
+
+
+def _open(path: Path, mode: str) -> IO[str]:
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
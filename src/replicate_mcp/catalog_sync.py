@@ -0,0 +1,171 @@
+"""Refresh catalog entries from the Replicate models API"""
+
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import httpx
+
+from .utils import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.replicate.com"
+
+# Parts of a model's API response kept between syncs
+MODEL_FIELDS = ("description", "run_count", "url", "visibility", "latest_version")
+
+
+class CatalogSync:
+    """Fetch model metadata with conditional requests and remember the answers
+
+    Every response's ETag and Last-Modified are saved with it, so a sync that
+    finds nothing new gets 304s with empty bodies. ``overrides`` turns the
+    saved metadata into the fields laid over catalog entries.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        api_token: Optional[str],
+        path: Optional[Path] = None,
+        base_url: str = DEFAULT_BASE_URL,
+        concurrency: int = 8
+    ):
+        self.client = client
+        self.api_token = api_token
+        self.path = path
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.state: Dict[str, Any] = {"models": {}, "hardware": None, "synced_at": None}
+        self._load()
+
+    async def sync(self, model_ids: Iterable[str]) -> Dict[str, Any]:
+        """Refresh the given models and the hardware list; returns a summary"""
+        slots = asyncio.Semaphore(self.concurrency)
+        summary: Dict[str, Any] = {"updated": [], "unchanged": 0, "failed": {}}
+
+        async def fetch_model(model_id: str):
+            async with slots:
+                try:
+                    changed = await self._fetch_model(model_id)
+                except (httpx.HTTPError, ValueError) as e:
+                    summary["failed"][model_id] = _describe(e)
+                    return
+            if changed:
+                summary["updated"].append(model_id)
+            else:
+                summary["unchanged"] += 1
+
+        model_ids = sorted(set(model_ids))
+        results = await asyncio.gather(
+            self._fetch_hardware(),
+            *(fetch_model(model_id) for model_id in model_ids),
+            return_exceptions=True
+        )
+        if isinstance(results[0], BaseException):
+            summary["failed"]["hardware"] = _describe(results[0])
+        for result in results[1:]:
+            if isinstance(result, BaseException):
+                raise result
+
+        self.state["synced_at"] = time.time()
+        self._save()
+
+        summary["checked"] = len(model_ids)
+        summary["updated"].sort()
+        summary["hardware"] = len((self.state["hardware"] or {}).get("items", []))
+        return summary
+
+    def overrides(self) -> Dict[str, Dict[str, Any]]:
+        """Catalog fields per model id from the last successful fetches"""
+        overrides = {}
+        for model_id, entry in self.state["models"].items():
+            model = entry["model"]
+            fields: Dict[str, Any] = {}
+            if model.get("run_count") is not None:
+                fields["run_count"] = model["run_count"]
+            if model.get("latest_version"):
+                fields["version"] = model["latest_version"]["id"]
+            if fields:
+                overrides[model_id] = fields
+        return overrides
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "models": len(self.state["models"]),
+            "hardware": len((self.state["hardware"] or {}).get("items", [])),
+            "synced_at": self.state["synced_at"]
+        }
+
+    async def _fetch_model(self, model_id: str) -> bool:
+        """Fetch one model; False when the API reports it unchanged"""
+        previous = self.state["models"].get(model_id)
+        response = await self._get(f"/v1/models/{model_id}", previous)
+        if response.status_code == 304:
+            return False
+
+        data = response.json()
+        model = {field: data.get(field) for field in MODEL_FIELDS}
+        if model["latest_version"]:
+            model["latest_version"] = {
+                "id": model["latest_version"]["id"],
+                "created_at": model["latest_version"].get("created_at")
+            }
+        self.state["models"][model_id] = {**self._validators(response), "model": model}
+        return previous is None or previous["model"] != model
+
+    async def _fetch_hardware(self):
+        previous = self.state["hardware"]
+        response = await self._get("/v1/hardware", previous)
+        if response.status_code != 304:
+            self.state["hardware"] = {**self._validators(response), "items": response.json()}
+
+    async def _get(self, path: str, previous: Optional[Dict[str, Any]]) -> httpx.Response:
+        """GET with the validators of the previous response, raising on errors"""
+        headers = {"Authorization": f"Bearer {self.api_token}"}
+        if previous:
+            if previous.get("etag"):
+                headers["If-None-Match"] = previous["etag"]
+            if previous.get("last_modified"):
+                headers["If-Modified-Since"] = previous["last_modified"]
+
+        response = await self.client.get(f"{self.base_url}{path}", headers=headers)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _validators(response: httpx.Response) -> Dict[str, Optional[str]]:
+        return {
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified")
+        }
+
+    def _load(self):
+        """Load the saved state, ignoring a missing or corrupt file"""
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                self.state = {**self.state, **json.load(fh)}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring catalog sync state {self.path}: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            atomic_write_json(self.path, self.state)
+        except OSError as e:
+            logger.warning(f"Could not persist catalog sync state: {e}")
+
+
+
+def _describe(error: BaseException) -> str:
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"HTTP {error.response.status_code}"
+    return str(error) or type(error).__name__
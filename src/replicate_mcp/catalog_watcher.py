@@ -0,0 +1,98 @@
+"""Hot reloading of the model catalog"""
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .complete_catalog import CATALOG_FILE, Catalog, catalog_files, load_catalog, packaged_catalog
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogWatcher:
+    """Hold the live catalog and swap in a new one when its files change
+
+    A reload parses the files and builds the indexes in a worker thread,
+    then replaces ``current`` in one assignment. Calls already running keep
+    the model info they looked up; a catalog that fails to load, or that
+    ``check`` rejects, is logged and the previous one stays live.
+    """
+
+    def __init__(
+        self,
+        source: Path,
+        interval: float = 5.0,
+        overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+        check: Optional[Callable[[Catalog], None]] = None
+    ):
+        self.source = source
+        self.interval = interval
+        self.overrides = overrides or {}
+        self.check = check
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._fingerprint = self._stat()
+        if source == CATALOG_FILE and not self.overrides:
+            # Share one parsed copy with the module-level catalog helpers
+            self.current: Catalog = packaged_catalog()
+        else:
+            self.current = load_catalog(source, overrides=self.overrides)
+        if self.check is not None:
+            self.check(self.current)
+
+    async def watch(self):
+        """Poll the catalog files and reload whenever they change"""
+        while True:
+            await asyncio.sleep(self.interval)
+            fingerprint = self._stat()
+            if fingerprint != self._fingerprint:
+                self._fingerprint = fingerprint
+                await self.reload()
+
+    async def reload(self) -> bool:
+        """Load the catalog again and swap it in; False if it failed to load"""
+        generation = self.current.generation + 1
+        try:
+            catalog = await asyncio.get_event_loop().run_in_executor(None, self._load, generation)
+        except Exception as e:
+            # CatalogError for bad files; anything else must not stop the watcher either
+            self.failures += 1
+            self.last_error = str(e)
+            logger.error(f"Keeping the current catalog, reload failed: {e}")
+            return False
+
+        self.current = catalog
+        self.reloads += 1
+        self.last_error = None
+        logger.info(f"Reloaded catalog from {self.source} ({len(catalog.index.entries)} models)")
+        return True
+
+    def _load(self, generation: int) -> Catalog:
+        catalog = load_catalog(self.source, generation, self.overrides)
+        if self.check is not None:
+            self.check(catalog)
+        return catalog
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": str(self.source),
+            "generation": self.current.generation,
+            "models": len(self.current.index.entries),
+            "workflows": len(self.current.workflows),
+            "loaded_at": self.current.loaded_at,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error
+        }
+
+    def _stat(self) -> Tuple[Tuple[str, int, int], ...]:
+        """Names, modification times and sizes of the catalog files"""
+        try:
+            return tuple(
+                (str(path), stat.st_mtime_ns, stat.st_size)
+                for path, stat in ((path, path.stat()) for path in catalog_files(self.source))
+            )
+        except OSError:
+            return ()
@@ -0,0 +1,52 @@
+"""Command-line entry point: replicate-mcp"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from typing import List, Optional
+
+from . import __version__
+
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the MCP server over stdio"""
+    parser = argparse.ArgumentParser(
+        prog="replicate-mcp",
+        description="MCP server for AI media generation with Replicate (speaks MCP over stdio)"
+    )
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    parser.add_argument(
+        "--log-level",
+        choices=LOG_LEVELS,
+        type=str.upper,
+        default=os.environ.get("REPLICATE_LOG_LEVEL", "INFO").upper(),
+        help="Logging level (default: REPLICATE_LOG_LEVEL or INFO)"
+    )
+    args = parser.parse_args(argv)
+
+    if not os.environ.get("REPLICATE_API_TOKEN"):
+        print("Error: REPLICATE_API_TOKEN environment variable not set", file=sys.stderr)
+        print("Please set your Replicate API token:", file=sys.stderr)
+        print("export REPLICATE_API_TOKEN='your_token_here'", file=sys.stderr)
+        return 1
+
+    # Configure logging before the server module does; logs go to stderr
+    # because stdout carries the MCP protocol
+    logging.basicConfig(level=args.log_level)
+
+    # Heavy imports (mcp and the server) only once we know we will serve
+    from .server import serve
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,11 @@
 """Complete catalog of ALL Replicate models with professional workflows"""
 
-from typing import Dict, List, Any, Optional
+import json
+import time
 from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Any, Optional
 
 class ModelCapability(str, Enum):
     """Model capabilities"""
@@ -45,530 +49,6 @@ class ModelCapability(str, Enum):
     CAPTION_GENERATION = "caption"
 
 
-# Complete model catalog with ALL Replicate models
-COMPLETE_MODEL_CATALOG = {
-    "image_generation": {
-        "flux-pro": {
-            "id": "black-forest-labs/flux-1.1-pro",
-            "name": "FLUX 1.1 Pro",
-            "description": "State-of-the-art image generation, ultra & raw modes, 4MP",
-            "cost_per_run": 0.055,
-            "capabilities": ["text2img", "img2img", "ultra_quality"],
-            "max_resolution": 4096,
-            "special_features": ["raw_mode", "ultra_mode", "professional_quality"]
-        },
-        "flux-schnell": {
-            "id": "black-forest-labs/flux-schnell",
-            "name": "FLUX Schnell",
-            "description": "Fast high-quality image generation",
-            "cost_per_run": 0.003,
-            "capabilities": ["text2img"],
-            "max_resolution": 4096
-        },
-        "flux-dev": {
-            "id": "black-forest-labs/flux-dev",
-            "name": "FLUX Dev",
-            "description": "Development version with experimental features",
-            "cost_per_run": 0.025,
-            "capabilities": ["text2img", "img2img"],
-            "max_resolution": 4096
-        },
-        "flux-kontext-pro": {
-            "id": "black-forest-labs/flux-kontext-pro",
-            "name": "FLUX Kontext Pro",
-            "description": "Character consistency and context preservation",
-            "cost_per_run": 0.04,
-            "capabilities": ["text2img", "character", "context"],
-            "special_features": ["character_consistency", "scene_consistency"]
-        },
-        "sdxl": {
-            "id": "stability-ai/sdxl",
-            "name": "Stable Diffusion XL",
-            "description": "High-quality 1024x1024 images with refiner",
-            "cost_per_run": 0.00325,
-            "capabilities": ["text2img", "img2img", "inpainting", "refiner"],
-            "max_resolution": 1024,
-            "version": "7762fd07cf82c948538e41f63f77d685e02b063e37e496e96eefd46c929f9bdc"
-        },
-        "sdxl-lightning": {
-            "id": "bytedance/sdxl-lightning-4step",
-            "name": "SDXL Lightning",
-            "description": "4-step fast SDXL generation",
-            "cost_per_run": 0.001,
-            "capabilities": ["text2img"],
-            "max_resolution": 1024,
-            "version": "6f7a773af6fc3e8de9d5a3c00be77c17308914bf67772726aff83496ba1e3bbe"
-        },
-        "recraft-svg": {
-            "id": "recraft-ai/recraft-v3-svg",
-            "name": "Recraft V3 SVG",
-            "description": "Generate SVG logos, icons, and vector graphics",
-            "cost_per_run": 0.01,
-            "capabilities": ["text2svg", "logo", "vector"],
-            "special_features": ["svg_output", "scalable_graphics", "brand_assets"]
-        }
-    },
-    
-    "image_manipulation": {
-        "clarity-upscaler": {
-            "id": "philz1337x/clarity-upscaler",
-            "name": "Clarity Upscaler",
-            "description": "High-quality image upscaling up to 10x",
-            "cost_per_run": 0.005,
-            "capabilities": ["upscaling"],
-            "max_scale": 10,
-            "version": "dfad41707589d68ecdccd1dfa600d55a208f9310748e44bfe35b4a6291453d5e"
-        },
-        "real-esrgan": {
-            "id": "nightmareai/real-esrgan",
-            "name": "Real-ESRGAN",
-            "description": "Fast upscaling with face enhancement",
-            "cost_per_run": 0.002,
-            "capabilities": ["upscaling", "face_restore"],
-            "features": ["face_enhance", "anime_mode"],
-            "version": "f121d640bd286e1fdc67f9799164c1d5be36ff74576ee11c803ae5b665dd46aa"
-        },
-        "swinir": {
-            "id": "jingyunliang/swinir",
-            "name": "SwinIR",
-            "description": "Excellent for small/low quality images",
-            "cost_per_run": 0.001,
-            "capabilities": ["upscaling", "denoising"],
-            "version": "660d922d33153019e8c263a3bba265de882e7f4f70396546b6c9c8f9d47a021a"
-        },
-        "remove-bg": {
-            "id": "cjwbw/rembg",
-            "name": "Background Remover (RemBG)",
-            "description": "Fast and accurate background removal",
-            "cost_per_run": 0.0005,
-            "capabilities": ["bg_removal"],
-            "version": "fb8af171cfa1616ddcf1242c093f9c46bcada5ad4cf6f2fbe8b81b330ec5c003"
-        },
-        "robust-video-matting": {
-            "id": "arielreplicate/robust_video_matting",
-            "name": "Robust Video Matting",
-            "description": "Remove background from videos",
-            "cost_per_run": 0.01,
-            "capabilities": ["bg_removal", "video"]
-        },
-        "codeformer": {
-            "id": "sczhou/codeformer",
-            "name": "CodeFormer",
-            "description": "Face restoration and enhancement",
-            "cost_per_run": 0.001,
-            "capabilities": ["face_restore", "enhance"],
-            "version": "7de2ea26c616d5bf2245ad0d5e24f0ff9a6204578a5c876db53142edd9d2cd56"
-        },
-        "gfpgan": {
-            "id": "tencentarc/gfpgan",
-            "name": "GFPGAN",
-            "description": "Face restoration with high quality",
-            "cost_per_run": 0.001,
-            "capabilities": ["face_restore"],
-            "version": "9283608cc6b7be6b65a8e44983db012355fde4132009bf99d976b2f0896856e3"
-        },
-        "restore-image": {
-            "id": "flux-kontext-apps/restore-image",
-            "name": "Image Restoration",
-            "description": "Restore old or damaged images",
-            "cost_per_run": 0.003,
-            "capabilities": ["restore", "enhance"]
-        },
-        "ddcolor": {
-            "id": "piddnad/ddcolor",
-            "name": "DDColor",
-            "description": "Colorize black and white images",
-            "cost_per_run": 0.002,
-            "capabilities": ["colorize"],
-            "version": "4918b843fd53b9a1652311449e1ba3afffc11e44a55ac7d5ed0b95c0540779b2"
-        },
-        "controlnet-tile": {
-            "id": "batouresearch/magic-image-refiner",
-            "name": "ControlNet Tile Upscaler",
-            "description": "Diffusion-based upscaling with tiling",
-            "cost_per_run": 0.02,
-            "capabilities": ["upscaling", "enhance"],
-            "special_features": ["hallucinate_details", "large_scale"]
-        }
-    },
-    
-    "video_generation": {
-        "google-veo3": {
-            "id": "google/veo-3",
-            "name": "Google Veo 3",
-            "description": "Google's flagship text-to-video model",
-            "cost_per_run": 0.3,
-            "capabilities": ["text2video"],
-            "max_duration": 10,
-            "resolutions": ["720p", "1080p"]
-        },
-        "hailuo-2": {
-            "id": "minimax/hailuo-02",
-            "name": "Hailuo 2",
-            "description": "6-10s videos with realistic physics",
-            "cost_per_run": 0.25,
-            "capabilities": ["text2video", "img2video"],
-            "max_duration": 10,
-            "resolutions": ["720p", "1080p"],
-            "special_features": ["realistic_physics", "character_consistency"]
-        },
-        "seedance-pro": {
-            "id": "bytedance/seedance-1-pro",
-            "name": "Seedance Pro",
-            "description": "Professional video generation",
-            "cost_per_run": 0.2,
-            "capabilities": ["text2video", "img2video"],
-            "max_duration": 10,
-            "resolutions": ["480p", "720p", "1080p"]
-        },
-        "wan-2": {
-            "id": "wan-video/wan-2.2-t2v-480p-fast",
-            "name": "WAN 2.2",
-            "description": "Fast open-source video generation",
-            "cost_per_run": 0.05,
-            "capabilities": ["text2video"],
-            "max_duration": 5,
-            "resolutions": ["480p"]
-        },
-        "minimax-video": {
-            "id": "minimax/video-01-live",
-            "name": "MiniMax Video",
-            "description": "Excellent for animated character consistency",
-            "cost_per_run": 0.15,
-            "capabilities": ["text2video", "img2video", "character"],
-            "special_features": ["character_consistency", "animation"]
-        },
-        "stable-video-diffusion": {
-            "id": "stability-ai/stable-video-diffusion",
-            "name": "Stable Video Diffusion",
-            "description": "Image to video animation",
-            "cost_per_run": 0.1,
-            "capabilities": ["img2video"],
-            "max_duration": 4
-        },
-        "s2v-01": {
-            "id": "s2v/s2v-01",
-            "name": "S2V-01",
-            "description": "Subject reference video generation",
-            "cost_per_run": 0.12,
-            "capabilities": ["img2video", "character"],
-            "special_features": ["subject_consistency"]
-        }
-    },
-    
-    "video_editing": {
-        "reframe-video": {
-            "id": "luma/reframe-video",
-            "name": "Video Reframer",
-            "description": "Change video aspect ratio intelligently",
-            "cost_per_run": 0.02,
-            "capabilities": ["video_reframe", "aspect_ratio"]
-        },
-        "modify-video": {
-            "id": "luma/modify-video",
-            "name": "Video Modifier",
-            "description": "Style transfer and prompt-based editing",
-            "cost_per_run": 0.05,
-            "capabilities": ["video_edit", "style_transfer"]
-        },
-        "video-enhance": {
-            "id": "alibaba/rife-video-enhance",
-            "name": "Video Enhancer",
-            "description": "Enhance video quality and framerate",
-            "cost_per_run": 0.03,
-            "capabilities": ["video_enhance", "fps_increase"]
-        }
-    },
-    
-    "audio_generation": {
-        "musicgen": {
-            "id": "meta/musicgen",
-            "name": "MusicGen",
-            "description": "Generate music from text descriptions",
-            "cost_per_run": 0.008,
-            "capabilities": ["music_gen"],
-            "max_duration": 30,
-            "features": ["melody_conditioning", "stereo"],
-            "version": "671ac645ce5e552cc63a54a2bbff63fcf798043055d2dac5fc9e36a837eedcfb"
-        },
-        "musicgen-stereo": {
-            "id": "meta/musicgen",
-            "name": "MusicGen Stereo",
-            "description": "High-quality stereo music generation",
-            "cost_per_run": 0.01,
-            "capabilities": ["music_gen"],
-            "max_duration": 30,
-            "version": "671ac645ce5e552cc63a54a2bbff63fcf798043055d2dac5fc9e36a837eedcfb",
-            "model_version": "stereo-large"
-        },
-        "magnet": {
-            "id": "facebookresearch/magnet",
-            "name": "MAGNeT",
-            "description": "Music and sound effect generation",
-            "cost_per_run": 0.006,
-            "capabilities": ["music_gen", "sfx"],
-            "version": "7a76a8258b23fae65c5a22debb8841d1d7e816b75c2f24218cd2bd8573787906"
-        },
-        "mmaudio": {
-            "id": "facebookresearch/mmaudio",
-            "name": "MMAudio",
-            "description": "Generate audio synchronized with video",
-            "cost_per_run": 0.005,
-            "capabilities": ["video2audio", "sync"],
-            "special_features": ["video_sync", "beat_matching"],
-            "version": "c4a831c721ad64be178828c8c40978f92cfd9494ad4c43c3b0267fa4fa58b34f"
-        },
-        "music-01": {
-            "id": "minimax/music-01",
-            "name": "Music-01",
-            "description": "Advanced music generation",
-            "cost_per_run": 0.015,
-            "capabilities": ["music_gen"]
-        },
-        "bark": {
-            "id": "suno-ai/bark",
-            "name": "Bark",
-            "description": "Realistic text-to-speech with emotions",
-            "cost_per_run": 0.001,
-            "capabilities": ["tts", "voice_presets"],
-            "features": ["emotions", "sound_effects", "music"],
-            "version": "b76242b40d67c76ab6742e987628a2a9ac019e11d56ab96c4e91ce03b79b2787"
-        },
-        "whisper": {
-            "id": "openai/whisper",
-            "name": "Whisper",
-            "description": "Speech to text transcription",
-            "cost_per_run": 0.0006,
-            "capabilities": ["speech2text", "translation"]
-        },
-        "xtts-v2": {
-            "id": "lucataco/xtts-v2",
-            "name": "XTTS v2",
-            "description": "Voice cloning and multilingual TTS",
-            "cost_per_run": 0.002,
-            "capabilities": ["tts", "voice_clone"],
-            "languages": 17,
-            "version": "684bc3855b37866c0c65add2ff39c78f3dea3f4ff103a436465326e0f438d55e"
-        }
-    },
-    
-    "3d_generation": {
-        "trellis": {
-            "id": "firtoz/trellis",
-            "name": "Trellis",
-            "description": "Advanced 3D generation from images",
-            "cost_per_run": 0.04,
-            "capabilities": ["img23d", "mesh_gen"],
-            "version": "e8f6c45206993f297372f5436b90350817bd9b4a0d52d2a76df50c1c8afa2b3c",
-            "output_formats": ["glb", "ply", "mp4"]
-        },
-        "shap-e": {
-            "id": "openai/shap-e",
-            "name": "Shap-E",
-            "description": "Text to 3D mesh generation",
-            "cost_per_run": 0.03,
-            "capabilities": ["text23d", "mesh_gen"]
-        },
-        "wonder3d": {
-            "id": "camenduru/wonder3d",
-            "name": "Wonder3D",
-            "description": "Single image to 3D reconstruction",
-            "cost_per_run": 0.035,
-            "capabilities": ["img23d", "multi_view"],
-            "version": "b5ad7e1b80c1a5a7e0c0a483f5a45f13797c7c9b6bc1c0fb18eab25cf088f4d6"
-        },
-        "hunyuan3d": {
-            "id": "tencent/hunyuan3d",
-            "name": "Hunyuan3D",
-            "description": "High-quality 3D generation",
-            "cost_per_run": 0.05,
-            "capabilities": ["text23d", "img23d", "texture"],
-            "version": "85e96b5a8eeb2cd1b024c4ba2fe8cb8b456e9419e616f40e8e94d59cc890d1f8"
-        },
-        "zero123": {
-            "id": "stability-ai/stable-zero123",
-            "name": "Stable Zero123",
-            "description": "Novel view synthesis from single image",
-            "cost_per_run": 0.025,
-            "capabilities": ["img23d", "multi_view"]
-        }
-    },
-    
-    "utility_models": {
-        "autocaption": {
-            "id": "daanelson/autocaption",
-            "name": "Auto Caption",
-            "description": "Generate captions for images",
-            "cost_per_run": 0.0005,
-            "capabilities": ["caption"],
-            "version": "07c7c718a3bd96fb991163df80d80cf76fb4e3a47e088b925709f7b3dd8c19ed"
-        },
-        "blip-2": {
-            "id": "andreasjansson/blip-2",
-            "name": "BLIP-2",
-            "description": "Advanced image captioning",
-            "cost_per_run": 0.0008,
-            "capabilities": ["caption", "vqa"],
-            "version": "f677695e5e89f8b236e52ecd1d3f01beb44c34606419bcc19345e046d8f786f9"
-        },
-        "llava": {
-            "id": "yorickvp/llava-v1.6-34b",
-            "name": "LLaVA",
-            "description": "Visual question answering",
-            "cost_per_run": 0.002,
-            "capabilities": ["vqa", "analysis"]
-        },
-        "nsfw-image-detector": {
-            "id": "m1guelpf/nsfw-filter",
-            "name": "NSFW Detector",
-            "description": "Content moderation",
-            "cost_per_run": 0.0002,
-            "capabilities": ["moderation"],
-            "version": "7d14dd0e0e18e40ce87c4c10dd6362eb2e920cd05059b2473330b690e89cf06f"
-        },
-        "face-to-many": {
-            "id": "flux-kontext-apps/face-to-many-kontext",
-            "name": "Face to Many",
-            "description": "Transform face into various styles",
-            "cost_per_run": 0.02,
-            "capabilities": ["style", "character"]
-        }
-    }
-}
-
-
-# Professional workflow templates
-WORKFLOW_TEMPLATES = {
-    "logo_to_brand_video": {
-        "name": "Logo to Brand Video",
-        "description": "Complete brand video creation from logo",
-        "steps": [
-            {
-                "step": "generate_logo",
-                "model": "recraft-ai/recraft-v3-svg",
-                "params": {"output_format": "svg"}
-            },
-            {
-                "step": "enhance_logo",
-                "model": "philz1337x/clarity-upscaler",
-                "params": {"scale": 4}
-            },
-            {
-                "step": "animate_logo",
-                "model": "stability-ai/stable-video-diffusion",
-                "params": {"fps": 24, "duration": 3}
-            },
-            {
-                "step": "generate_brand_scenes",
-                "model": "black-forest-labs/flux-1.1-pro",
-                "params": {"num_outputs": 5, "style": "professional"}
-            },
-            {
-                "step": "create_video_sequences",
-                "model": "minimax/hailuo-02",
-                "params": {"duration": 10, "resolution": "1080p"}
-            },
-            {
-                "step": "add_music",
-                "model": "meta/musicgen-stereo-large",
-                "params": {"duration": 30, "style": "corporate"}
-            },
-            {
-                "step": "sync_audio_video",
-                "model": "zsxkib/mmaudio",
-                "params": {"sync_mode": "beat_match"}
-            }
-        ]
-    },
-    
-    "character_animation": {
-        "name": "Character Animation Pipeline",
-        "description": "Create consistent character animations",
-        "steps": [
-            {
-                "step": "design_character",
-                "model": "black-forest-labs/flux-kontext-pro",
-                "params": {"character_mode": True}
-            },
-            {
-                "step": "create_turnaround",
-                "model": "adirik/wonder3d",
-                "params": {"views": 8}
-            },
-            {
-                "step": "animate_character",
-                "model": "minimax/video-01-live",
-                "params": {"consistency_mode": "high"}
-            },
-            {
-                "step": "add_voice",
-                "model": "lucataco/xtts-v2",
-                "params": {"emotion": "friendly"}
-            }
-        ]
-    },
-    
-    "product_showcase": {
-        "name": "Product Showcase Video",
-        "description": "Professional product demonstration",
-        "steps": [
-            {
-                "step": "product_photos",
-                "model": "black-forest-labs/flux-1.1-pro",
-                "params": {"mode": "product", "num_outputs": 10}
-            },
-            {
-                "step": "remove_backgrounds",
-                "model": "lucataco/remove-bg",
-                "params": {"edge_quality": "high"}
-            },
-            {
-                "step": "create_3d_model",
-                "model": "firtoz/trellis",
-                "params": {"quality": "high"}
-            },
-            {
-                "step": "animate_product",
-                "model": "google/veo-3",
-                "params": {"style": "professional", "duration": 15}
-            },
-            {
-                "step": "add_voiceover",
-                "model": "suno-ai/bark",
-                "params": {"voice": "announcer"}
-            }
-        ]
-    },
-    
-    "social_media_content": {
-        "name": "Social Media Content Pack",
-        "description": "Complete social media asset generation",
-        "steps": [
-            {
-                "step": "generate_images",
-                "model": "bytedance/sdxl-lightning-4step",
-                "params": {"num_outputs": 20, "speed": "fast"}
-            },
-            {
-                "step": "create_short_videos",
-                "model": "wan-video/wan-2.2-t2v-480p-fast",
-                "params": {"duration": 5, "format": "vertical"}
-            },
-            {
-                "step": "add_captions",
-                "model": "fictions-ai/autocaption",
-                "params": {"style": "social"}
-            },
-            {
-                "step": "reframe_for_platforms",
-                "model": "luma/reframe-video",
-                "params": {"formats": ["1:1", "9:16", "16:9"]}
-            }
-        ]
-    }
-}
-
-
 # Model selection rules
 MODEL_SELECTION_RULES = {
     "quality_priority": {
@@ -596,19 +76,196 @@ MODEL_SELECTION_RULES = {
 }
 
 
+class CatalogIndex:
+    """Lookups over a model catalog, built once instead of on every call"""
+    
+    def __init__(self, catalog: Dict[str, Dict[str, Dict[str, Any]]]):
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_key: Dict[str, Dict[str, Any]] = {}
+        self.by_capability: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_category_cost: Dict[str, List[Dict[str, Any]]] = {}
+        self.entries: List[Dict[str, Any]] = []
+        
+        for category, models in catalog.items():
+            category_entries = []
+            for model_key, model_info in models.items():
+                # First entry wins, matching catalog iteration order
+                self.by_id.setdefault(model_info["id"], model_info)
+                self.by_key.setdefault(model_key, model_info)
+                
+                entry = {**model_info, "key": model_key, "category": category}
+                category_entries.append(entry)
+                for capability in model_info.get("capabilities", []):
+                    self.by_capability.setdefault(capability, []).append(entry)
+            
+            self.entries.extend(category_entries)
+            self.by_category_cost[category] = sorted(
+                category_entries,
+                key=lambda info: info.get("cost_per_run", 0)
+            )
+    
+    def get(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """Find a model by Replicate id or catalog key"""
+        return self.by_id.get(model_id) or self.by_key.get(model_id)
+    
+    def with_capability(self, capability: str) -> List[Dict[str, Any]]:
+        """Models that list a capability"""
+        return self.by_capability.get(capability, [])
+    
+    def cheapest(self, category: str) -> List[Dict[str, Any]]:
+        """Models in a category, cheapest first"""
+        return self.by_category_cost.get(category, [])
+
+
+class CatalogError(ValueError):
+    """A catalog file is missing, unreadable or malformed"""
+
+
+# Catalog shipped with the package. A catalog file holds "models"
+# (category -> model key -> model info) and "workflows" (name -> template).
+#
+# Each workflow step runs through an MCP tool ("predict" calls the model
+# directly with its params). "inputs" wires parameters to the caller's
+# workflow inputs ("workflow.<name>") or to the output of an earlier step
+# ("<step>.output"); steps without a path between them run concurrently.
+CATALOG_FILE = Path(__file__).with_name("catalog.json")
+
+CATALOG_SUFFIXES = (".json", ".yaml", ".yml")
+
+
+class Catalog:
+    """Models, workflow templates and their lookup indexes, loaded together"""
+    
+    def __init__(
+        self,
+        models: Dict[str, Dict[str, Dict[str, Any]]],
+        workflows: Dict[str, Dict[str, Any]],
+        source: Optional[Path] = None,
+        generation: int = 0
+    ):
+        self.models = models
+        self.workflows = workflows
+        self.index = CatalogIndex(models)
+        self.source = source
+        self.generation = generation
+        self.loaded_at = time.time()
+
+
+def catalog_files(source: Path) -> List[Path]:
+    """The files making up a catalog: the file itself, or a directory's files by name"""
+    if source.is_dir():
+        return sorted(path for path in source.iterdir() if path.suffix in CATALOG_SUFFIXES)
+    return [source]
+
+
+def _read_catalog_file(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            if path.suffix == ".json":
+                data = json.load(fh)
+            else:
+                try:
+                    import yaml
+                except ImportError:
+                    raise CatalogError(f"{path}: YAML catalogs need PyYAML (pip install pyyaml)")
+                try:
+                    data = yaml.safe_load(fh)
+                except yaml.YAMLError as e:
+                    raise CatalogError(f"{path}: {e}")
+    except (OSError, ValueError) as e:
+        raise CatalogError(f"{path}: {e}")
+    
+    if not isinstance(data, dict):
+        raise CatalogError(f"{path}: expected a mapping with models and/or workflows")
+    return data
+
+
+def apply_overrides(
+    models: Dict[str, Dict[str, Dict[str, Any]]],
+    overrides: Dict[str, Dict[str, Any]]
+) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Copy of a catalog's models with per-id fields laid over their entries
+    
+    A "version" override only replaces a pinned version; unpinned models
+    already run the latest one.
+    """
+    merged: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for category, entries in models.items():
+        merged[category] = {}
+        for model_key, model_info in entries.items():
+            fields = dict(overrides.get(model_info["id"], {}))
+            if "version" not in model_info:
+                fields.pop("version", None)
+            merged[category][model_key] = {**model_info, **fields} if fields else model_info
+    return merged
+
+
+def _check_model(path: Path, key: str, model_info: Any):
+    """Tool responses read a model's id, name and price without fallbacks"""
+    if not isinstance(model_info, dict) or "id" not in model_info:
+        raise CatalogError(f"{path}: model {key} has no id")
+    if not isinstance(model_info.get("name"), str):
+        raise CatalogError(f"{path}: model {key} has no name")
+    cost = model_info.get("cost_per_run")
+    if isinstance(cost, bool) or not isinstance(cost, (int, float)):
+        raise CatalogError(f"{path}: model {key} needs a numeric cost_per_run")
+
+
+def load_catalog(
+    source: Path = CATALOG_FILE,
+    generation: int = 0,
+    overrides: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Catalog:
+    """Load a catalog file or directory; later files add to and override earlier ones
+    
+    ``overrides`` (fields per model id, e.g. from a catalog sync) apply last.
+    """
+    models: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    workflows: Dict[str, Dict[str, Any]] = {}
+    
+    for path in catalog_files(source):
+        data = _read_catalog_file(path)
+        if not isinstance(data.get("models", {}), dict) or not isinstance(data.get("workflows", {}), dict):
+            raise CatalogError(f"{path}: models and workflows must be mappings")
+        for category, entries in data.get("models", {}).items():
+            for model_key, model_info in entries.items():
+                _check_model(path, f"{category}/{model_key}", model_info)
+            models.setdefault(category, {}).update(entries)
+        workflows.update(data.get("workflows", {}))
+    
+    if overrides:
+        models = apply_overrides(models, overrides)
+    return Catalog(models, workflows, source, generation)
+
+
+@lru_cache(maxsize=None)
+def packaged_catalog() -> Catalog:
+    """The catalog shipped with the package, parsed once on first use"""
+    return load_catalog()
+
+
+# Module attributes served from the packaged catalog, so importing does no I/O
+_PACKAGED_ATTRIBUTES = {
+    "COMPLETE_MODEL_CATALOG": "models",
+    "WORKFLOW_TEMPLATES": "workflows",
+    "CATALOG_INDEX": "index"
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _PACKAGED_ATTRIBUTES:
+        return getattr(packaged_catalog(), _PACKAGED_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def get_models_by_capability(capability: ModelCapability) -> List[Dict[str, Any]]:
     """Get all models that support a specific capability"""
-    models = []
-    for category in COMPLETE_MODEL_CATALOG.values():
-        for model_key, model_info in category.items():
-            if capability.value in model_info.get("capabilities", []):
-                models.append({**model_info, "key": model_key})
-    return models
+    return list(packaged_catalog().index.with_capability(capability.value))
 
 
 def get_workflow_models(workflow_name: str) -> Optional[Dict[str, Any]]:
     """Get models for a specific workflow"""
-    return WORKFLOW_TEMPLATES.get(workflow_name)
+    return packaged_catalog().workflows.get(workflow_name)
 
 
 def select_best_model(
@@ -625,31 +282,21 @@ def select_best_model(
     if not priority_models:
         return None
     
+    index = packaged_catalog().index
+    
     # Filter by budget if specified
     if budget:
-        available_models = []
-        for model_id in priority_models:
-            # Find model in catalog
-            for category in COMPLETE_MODEL_CATALOG.values():
-                for model_info in category.values():
-                    if model_info["id"] == model_id:
-                        if model_info.get("cost_per_run", 0) <= budget:
-                            available_models.append(model_id)
-                        break
-        priority_models = available_models
+        priority_models = [
+            model_id for model_id in priority_models
+            if index.get(model_id) and index.get(model_id).get("cost_per_run", 0) <= budget
+        ]
     
     # Filter by required capabilities
     if capabilities_needed:
-        filtered_models = []
-        for model_id in priority_models:
-            # Find model in catalog
-            for category in COMPLETE_MODEL_CATALOG.values():
-                for model_info in category.values():
-                    if model_info["id"] == model_id:
-                        model_caps = set(model_info.get("capabilities", []))
-                        if all(cap in model_caps for cap in capabilities_needed):
-                            filtered_models.append(model_id)
-                        break
-        priority_models = filtered_models
+        priority_models = [
+            model_id for model_id in priority_models
+            if index.get(model_id)
+            and set(capabilities_needed) <= set(index.get(model_id).get("capabilities", []))
+        ]
     
-    return priority_models[0] if priority_models else None
\ No newline at end of file
+    return priority_models[0] if priority_models else None
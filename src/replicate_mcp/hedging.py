@@ -0,0 +1,192 @@
+"""Hedged predictions against cold-boot queueing
+
+Most predictions leave the queue within seconds, but a cold model can keep
+one "starting" for minutes. Queue times are learned per model from the
+API's ``created_at`` and ``started_at`` timestamps; once a prediction has
+queued longer than a high percentile of them, a backup is submitted and the
+first to succeed wins.
+"""
+
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional
+
+from .complete_catalog import MODEL_SELECTION_RULES, CatalogIndex
+from .routing import TOOL_ROUTES, RuntimeStats
+from .utils import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "same", "equivalent")
+
+
+class QueueStats:
+    """Recent queue times per model, persisted across restarts"""
+
+    def __init__(self, path: Optional[Path] = None, window: int = 200):
+        self.path = path
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._load()
+
+    def observe(self, model_id: str, seconds: float):
+        """Record how long one prediction queued and persist the stats"""
+        samples = self._samples.get(model_id)
+        if samples is None:
+            samples = self._samples[model_id] = deque(maxlen=self.window)
+        samples.append(round(seconds, 3))
+        self._save()
+
+    def percentile(self, model_id: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """Nearest-rank percentile of a model's queue times, None with too few samples"""
+        samples = self._samples.get(model_id)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            model_id: {
+                "samples": len(samples),
+                "p50_seconds": self.percentile(model_id, 0.5),
+                "p95_seconds": self.percentile(model_id, 0.95)
+            }
+            for model_id, samples in self._samples.items()
+        }
+
+    def _load(self):
+        """Load persisted samples, ignoring a missing or corrupt file"""
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                self._samples = {
+                    model_id: deque(samples, maxlen=self.window)
+                    for model_id, samples in json.load(fh).items()
+                }
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring queue stats {self.path}: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            atomic_write_json(self.path, {model_id: list(samples) for model_id, samples in self._samples.items()})
+        except OSError as e:
+            logger.warning(f"Could not persist queue stats: {e}")
+
+
+class HedgePolicy:
+    """When to hedge a queued prediction and on which model
+
+    ``mode`` is "same" to back up on the same model, "equivalent" to prefer
+    a cheaper or faster model of the same kind from MODEL_SELECTION_RULES,
+    or "off". A model is hedged only after ``min_samples`` queue times are
+    known, and never sooner than ``min_delay`` seconds.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        queue_stats: QueueStats,
+        percentile: float = 0.95,
+        min_delay: float = 2.0,
+        min_samples: int = 20,
+        max_in_flight: int = 4
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown hedging mode: {mode} (use {', '.join(MODES)})")
+        self.mode = mode
+        self.queue_stats = queue_stats
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.hedged = 0
+        self.backup_wins = 0
+        self.skipped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def delay(self, model_id: str) -> Optional[float]:
+        """Seconds a prediction may queue before it is hedged, None if not yet learned"""
+        if not self.enabled:
+            return None
+        threshold = self.queue_stats.percentile(model_id, self.percentile, self.min_samples)
+        return None if threshold is None else max(self.min_delay, threshold)
+
+    def backup_model(
+        self,
+        index: CatalogIndex,
+        runtimes: RuntimeStats,
+        tool: str,
+        model_info: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Catalog model info to run the backup on; the primary's own when nothing fits"""
+        if self.mode != "equivalent" or tool not in TOOL_ROUTES:
+            return model_info
+        _, tool_capabilities, task = TOOL_ROUTES[tool]
+        if task is None:
+            return model_info
+
+        cost = model_info.get("cost_per_run", 0.0)
+        expected = runtimes.expected(model_info["id"])
+        speed = MODEL_SELECTION_RULES["speed_priority"].get(task, [])
+        for name in speed + MODEL_SELECTION_RULES["cost_priority"].get(task, []):
+            candidate = index.get(name)
+            if candidate is None or candidate["id"] == model_info["id"]:
+                continue
+            if set(candidate.get("capabilities", [])).isdisjoint(tool_capabilities):
+                continue
+            candidate_expected = runtimes.expected(candidate["id"])
+            cheaper = candidate.get("cost_per_run", 0.0) <= cost
+            faster = name in speed and (
+                expected is None or candidate_expected is None or candidate_expected <= expected
+            )
+            if cheaper or faster:
+                return candidate
+        return model_info
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "percentile": self.percentile,
+            "min_delay": self.min_delay,
+            "in_flight": self.in_flight,
+            "hedged": self.hedged,
+            "backup_wins": self.backup_wins,
+            "skipped": self.skipped,
+            "queue_times": self.queue_stats.stats()
+        }
+
+
+def queue_seconds(prediction: Any) -> Optional[float]:
+    """Seconds between a prediction's creation and the start of its run"""
+    created = _parse_time(getattr(prediction, "created_at", None))
+    started = _parse_time(getattr(prediction, "started_at", None))
+    if created is None or started is None:
+        return None
+    return max(0.0, (started - created).total_seconds())
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """API timestamps like 2025-01-01T00:00:00.123456789Z"""
+    if not value:
+        return None
+    text = value.replace("Z", "+00:00")
+    # Before Python 3.11, fromisoformat only parses three or six fractional digits
+    if "." in text:
+        head, _, rest = text.partition(".")
+        digits = len(rest) - len(rest.lstrip("0123456789"))
+        text = f"{head}.{rest[:digits][:6].ljust(6, '0')}{rest[digits:]}"
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return None
@@ -0,0 +1,102 @@
+"""Shared HTTP connection pool for Replicate API calls and downloads"""
+
+import logging
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+from .cassette import Cassette, CassetteTransport
+from .ratelimit import throttle_headers
+
+logger = logging.getLogger(__name__)
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper counting requests and the connections they had to open"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        request.extensions = {**request.extensions, "trace": self._trace(request.extensions.get("trace"))}
+        response = await self.transport.handle_async_request(request)
+        if response.status_code == 429:
+            headers = throttle_headers.get()
+            if headers is not None and "retry-after" in response.headers:
+                headers["retry-after"] = response.headers["retry-after"]
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+    def _trace(self, inner: Optional[Callable[[str, Dict[str, Any]], Any]]):
+        async def trace(event_name: str, info: Dict[str, Any]):
+            if event_name == "connection.connect_tcp.complete":
+                self.connections_opened += 1
+            elif event_name == "connection.start_tls.complete":
+                self.tls_handshakes += 1
+            if inner is not None:
+                await inner(event_name, info)
+        return trace
+
+
+class HttpPool:
+    """One keep-alive connection pool shared by every outgoing request
+
+    ``transport`` is handed to the Replicate client; ``client`` serves plain
+    downloads. Both reuse the same connections.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        http2: bool = False,
+        cassette: Optional["Cassette"] = None
+    ):
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP/2 needs the h2 package (pip install 'httpx[http2]'); using HTTP/1.1")
+                http2 = False
+
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self._pool_transport = httpx.AsyncHTTPTransport(limits=self.limits, http2=http2)
+        # Requests are recorded or replayed below the counting layer
+        inner: httpx.AsyncBaseTransport = self._pool_transport
+        if cassette is not None:
+            inner = CassetteTransport(inner, cassette)
+        self.transport = CountingTransport(inner)
+        self.client = httpx.AsyncClient(transport=self.transport, timeout=self.timeout, follow_redirects=True)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        connections = list(self._pool_transport._pool.connections)
+        requests = self.transport.requests
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive": self.limits.max_keepalive_connections,
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for connection in connections if connection.is_idle()),
+            "requests": requests,
+            "connections_opened": self.transport.connections_opened,
+            "tls_handshakes": self.transport.tls_handshakes,
+            "reuse_rate": round(1 - self.transport.connections_opened / requests, 3) if requests else 0.0
+        }
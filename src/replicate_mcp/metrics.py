@@ -0,0 +1,288 @@
+"""In-process counters and histograms in the Prometheus text format
+
+Recording is a dict lookup plus an addition (a bisect for histograms), so
+the hot paths can be measured on every call. Label values are bound once
+with ``labels()`` and the returned child can be kept and reused.
+"""
+
+import asyncio
+import bisect
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from sub-millisecond dispatch to multi-minute video runs
+LATENCY_BUCKETS = (0.001, 0.005, 0.025, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 180.0, 600.0)
+
+# Event-loop lag should stay in the low milliseconds
+LAG_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One slot per bucket plus +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, *values: str):
+        """The series for these label values, created on first use"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {', '.join(self.labelnames)}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_text(self, values: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0):
+        """Increment the unlabelled series"""
+        self.labels().inc(amount)
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{self._label_text(values)} {_number(child.value)}"
+            for values, child in self._children.items()
+        ]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [
+            {"labels": dict(zip(self.labelnames, values)), "value": child.value}
+            for values, child in self._children.items()
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def observe(self, value: float):
+        """Record a value in the unlabelled series"""
+        self.labels().observe(value)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.bounds)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float("inf"),), child.counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{self._label_text(values, ('le', _number(bound)))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{self._label_text(values)} {_number(child.sum)}")
+            lines.append(f"{self.name}_count{self._label_text(values)} {child.count}")
+        return lines
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "labels": dict(zip(self.labelnames, values)),
+                "count": child.count,
+                "sum": round(child.sum, 6),
+                "mean": round(child.sum / child.count, 6) if child.count else None,
+                "p50": _quantile(self.bounds, child, 0.5),
+                "p95": _quantile(self.bounds, child, 0.95),
+                "p99": _quantile(self.bounds, child, 0.99)
+            }
+            for values, child in self._children.items()
+        ]
+
+
+class MetricsRegistry:
+    """Named metrics, rendered together for scraping or the get_metrics tool"""
+
+    def __init__(self, prefix: str = "replicate_mcp_"):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self.prefix + name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(self.prefix + name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All metrics as JSON-friendly dicts; histogram quantiles are bucket estimates"""
+        return {
+            metric.name: {"type": metric.kind, "help": metric.help, "series": metric.snapshot()}
+            for metric in self._metrics.values()
+        }
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+
+class ServerMetrics(MetricsRegistry):
+    """The metrics recorded by the MCP server"""
+
+    def __init__(self):
+        super().__init__()
+        self.tool_calls = self.counter("tool_calls_total", "Tool calls by outcome", ("tool", "outcome"))
+        self.tool_seconds = self.histogram("tool_call_seconds", "Tool call duration", ("tool",))
+        self.create_seconds = self.histogram(
+            "prediction_create_seconds", "Time to create a prediction through the API", ("tool", "model")
+        )
+        self.queue_seconds = self.histogram(
+            "prediction_queue_seconds", "Time waiting for a free prediction slot", ("tool", "model")
+        )
+        self.run_seconds = self.histogram(
+            "prediction_run_seconds", "Time from creation until a prediction finished", ("tool", "model", "status")
+        )
+        self.download_seconds = self.histogram(
+            "artifact_download_seconds", "Time to download and store one output file", ("outcome",)
+        )
+        self.cache_requests = self.counter(
+            "result_cache_requests_total", "Result cache lookups", ("tool", "result")
+        )
+        self.reservations = self.counter(
+            "budget_reservations_total", "Budget reservations made", ("tool",)
+        )
+        self.reserved_dollars = self.counter(
+            "budget_reserved_dollars_total", "Dollars reserved from the budget", ("tool",)
+        )
+        self.hedges = self.counter(
+            "hedged_predictions_total", "Backup predictions for queued ones, by which finished first", ("tool", "model", "winner")
+        )
+        self.loop_lag = self.histogram(
+            "event_loop_lag_seconds", "How late the event loop ran a periodic timer", buckets=LAG_BUCKETS
+        )
+
+
+async def monitor_loop_lag(histogram: Histogram, interval: float):
+    """Record how late each ``interval`` sleep wakes up, until cancelled
+
+    A busy loop (blocking calls, CPU-heavy handlers) delays every task; the
+    delay of a timer is a direct measure of it.
+    """
+    loop = asyncio.get_event_loop()
+    while True:
+        due = loop.time() + interval
+        await asyncio.sleep(interval)
+        histogram.observe(max(0.0, loop.time() - due))
+
+
+class MetricsEndpoint:
+    """Serve a registry at /metrics for Prometheus to scrape"""
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9464):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def start(self):
+        from aiohttp import web
+
+        async def handle(request: "web.Request") -> "web.Response":
+            return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def _quantile(bounds: Tuple[float, ...], child: _HistogramChild, q: float) -> Optional[float]:
+    """Upper bound of the bucket holding the q-th quantile; None past the last bucket"""
+    if not child.count:
+        return None
+    rank = q * child.count
+    cumulative = 0
+    for bound, count in zip(bounds, child.counts):
+        cumulative += count
+        if cumulative >= rank:
+            return bound
+    return None
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
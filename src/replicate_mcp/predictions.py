@@ -0,0 +1,96 @@
+"""Registry of predictions created by the MCP server"""
+
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Statuses after which a prediction will not change again
+TERMINAL_STATUSES = frozenset(["succeeded", "failed", "canceled"])
+
+
+class PredictionRecord:
+    """A prediction together with the task that waits for its output"""
+
+    def __init__(self, prediction: Any, tool: Optional[str], model_info: Dict[str, Any]):
+        self.prediction = prediction
+        self.tool = tool
+        self.model_id = model_info["id"]
+        self.model_name = model_info.get("name", model_info["id"])
+        self.cost = model_info.get("cost_per_run", 0.0)
+        self.submitted_at = datetime.now().isoformat()
+        self.task: Optional["asyncio.Future[Any]"] = None
+        # Backup prediction started while this one queued, and whether the
+        # other one won and this one was canceled
+        self.hedge: Optional[Dict[str, Any]] = None
+        self.superseded = False
+        # Kept current by the completion webhook rather than polling
+        self.pushed = False
+
+    @property
+    def id(self) -> str:
+        return self.prediction.id
+
+    @property
+    def status(self) -> str:
+        return self.prediction.status
+
+    @property
+    def done(self) -> bool:
+        return self.prediction.status in TERMINAL_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable view of the prediction"""
+        result = {
+            "prediction_id": self.id,
+            "status": self.status,
+            "tool": self.tool,
+            "model": self.model_name,
+            "model_id": self.model_id,
+            "cost": self.cost,
+            "submitted_at": self.submitted_at
+        }
+
+        if self.prediction.status == "succeeded":
+            result["output"] = self.prediction.output
+        if self.prediction.error:
+            result["error"] = str(self.prediction.error)
+        if self.hedge is not None:
+            result["hedge"] = self.hedge
+
+        return result
+
+
+class PredictionRegistry:
+    """Track in-flight and recently finished predictions by id"""
+
+    def __init__(self, max_finished: int = 500):
+        self.max_finished = max_finished
+        self._records: "OrderedDict[str, PredictionRecord]" = OrderedDict()
+
+    def track(self, prediction: Any, tool: Optional[str], model_info: Dict[str, Any]) -> PredictionRecord:
+        """Start tracking a newly created prediction"""
+        record = PredictionRecord(prediction, tool, model_info)
+        self._records[record.id] = record
+        self._prune()
+        return record
+
+    def get(self, prediction_id: str) -> Optional[PredictionRecord]:
+        """Look up a tracked prediction"""
+        return self._records.get(prediction_id)
+
+    def active(self) -> List[PredictionRecord]:
+        """Predictions that have not reached a terminal status"""
+        return [record for record in self._records.values() if not record.done]
+
+    def _prune(self):
+        """Forget the oldest finished predictions beyond the retention limit"""
+        finished = [key for key, record in self._records.items() if record.done]
+        for key in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._records[key]
+
+    def __contains__(self, prediction_id: str) -> bool:
+        return prediction_id in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
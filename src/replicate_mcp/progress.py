@@ -0,0 +1,64 @@
+"""MCP progress notifications for tool calls that wait on predictions"""
+
+import logging
+from contextvars import ContextVar
+from typing import Any, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressReporter:
+    """Send progress notifications for one tool call's progress token
+
+    Progress only ever moves forward; repeated or lower values are dropped
+    unless the message changed.
+    """
+
+    def __init__(self, session: Any, progress_token: Union[str, int]):
+        self.session = session
+        self.progress_token = progress_token
+        self._last: Tuple[float, Optional[str]] = (-1.0, None)
+
+    async def report(self, progress: float, total: Optional[float] = None, message: Optional[str] = None):
+        """Notify the client, skipping updates that say nothing new"""
+        progress = max(progress, self._last[0], 0.0)
+        if (progress, message) == self._last:
+            return
+        self._last = (progress, message)
+
+        try:
+            await self.session.send_progress_notification(
+                self.progress_token,
+                progress,
+                total=total,
+                message=message
+            )
+        except Exception as e:
+            # The tool call must not fail because a notification could not be sent
+            logger.debug(f"Could not send progress notification: {e}")
+
+    async def prediction(self, prediction: Any):
+        """Report a prediction's status, with the percentage parsed from its logs"""
+        progress = 0.0
+        message = prediction.status
+        if prediction.status == "succeeded":
+            progress = 100.0
+        elif prediction.status == "processing":
+            parsed = _parse_progress(prediction)
+            if parsed is not None:
+                progress = parsed.percentage * 100
+                message = f"processing {parsed.current}/{parsed.total}"
+        await self.report(progress, total=100.0, message=message)
+
+
+def _parse_progress(prediction: Any) -> Any:
+    """Progress parsed from the prediction's logs, or None"""
+    try:
+        return getattr(prediction, "progress", None)
+    except Exception:
+        return None
+
+
+# Reporter for the tool call currently being handled, None if the client
+# did not ask for progress
+current_reporter: "ContextVar[Optional[ProgressReporter]]" = ContextVar("current_reporter", default=None)
@@ -0,0 +1,167 @@
+"""Adaptive token-bucket rate limiting for Replicate API calls"""
+
+import asyncio
+import hashlib
+import re
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+# Replicate also reports when a throttled request may be retried in the error detail
+_RETRY_AFTER_DETAIL = re.compile(r"available in (\d+(?:\.\d+)?) seconds?", re.IGNORECASE)
+
+# Headers of a 429 response to the request in progress, filled in by the HTTP
+# transport: ReplicateError keeps only the response body
+throttle_headers: ContextVar[Optional[Dict[str, str]]] = ContextVar("throttle_headers", default=None)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header, given as seconds or an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_from_error(error: Exception, retry_after_header: Optional[str] = None) -> Optional[float]:
+    """Seconds to wait before retrying a throttled request, if the API said
+
+    The response's Retry-After header wins; the error detail is the fallback.
+    """
+    retry_after = parse_retry_after(retry_after_header)
+    if retry_after is not None:
+        return retry_after
+
+    match = _RETRY_AFTER_DETAIL.search(str(getattr(error, "detail", "") or ""))
+    if match:
+        return float(match.group(1))
+    return None
+
+
+class TokenBucket:
+    """Token bucket that adapts its rate to throttling
+
+    The rate is cut multiplicatively on every 429 and recovers additively on
+    every success, so it settles just under the limit the API enforces.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, min_rate: Optional[float] = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 20
+        self.burst = burst or max(rate, 1.0)
+        self.throttled = 0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    def try_acquire(self) -> float:
+        """Take a token if one is free and return 0, else the seconds until one may be"""
+        now = time.monotonic()
+        self._refill(now)
+
+        wait = self._blocked_until - now
+        if wait > 0:
+            return wait
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def release(self):
+        """Give back a token that was not used"""
+        self._tokens = min(self.burst, self._tokens + 1)
+
+    def on_success(self):
+        """Additive increase back toward the configured rate"""
+        self.rate = min(self.max_rate, self.rate + self.max_rate * 0.02)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """Multiplicative decrease, and pause until Retry-After has passed"""
+        self.throttled += 1
+        self.rate = max(self.min_rate, self.rate * 0.5)
+        self._tokens = min(self._tokens, 0.0)
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": round(self.rate, 3),
+            "max_rate": self.max_rate,
+            "throttled": self.throttled
+        }
+
+
+class RateLimiter:
+    """Global, per-model and per-API-token buckets in front of prediction creation"""
+
+    def __init__(self, global_rate: float, model_rate: float, token_rate: float, max_attempts: int = 5):
+        self.model_rate = model_rate
+        self.token_rate = token_rate
+        self.max_attempts = max_attempts
+        self.global_bucket = TokenBucket(global_rate)
+        self.model_buckets: Dict[str, TokenBucket] = {}
+        self.token_buckets: Dict[str, TokenBucket] = {}
+
+    def _buckets(self, model_id: str, token: Optional[str]):
+        model_bucket = self.model_buckets.get(model_id)
+        if model_bucket is None:
+            model_bucket = self.model_buckets[model_id] = TokenBucket(self.model_rate)
+
+        # Never keep raw API tokens around as keys
+        token_key = hashlib.sha256((token or "").encode("utf-8")).hexdigest()[:12]
+        token_bucket = self.token_buckets.get(token_key)
+        if token_bucket is None:
+            token_bucket = self.token_buckets[token_key] = TokenBucket(self.token_rate)
+
+        return self.global_bucket, model_bucket, token_bucket
+
+    async def acquire(self, model_id: str, token: Optional[str] = None):
+        """Wait until the global, model and token buckets all admit a request
+
+        Tokens are taken from all three at once or not at all, so a request
+        waiting on a busy model does not hold global capacity meanwhile (and
+        the waiters do not all fire together once the model frees up).
+        """
+        global_bucket, model_bucket, token_bucket = self._buckets(model_id, token)
+        while True:
+            taken = []
+            wait = 0.0
+            for bucket in (model_bucket, token_bucket, global_bucket):
+                wait = bucket.try_acquire()
+                if wait > 0:
+                    break
+                taken.append(bucket)
+            if wait <= 0:
+                return
+            for bucket in taken:
+                bucket.release()
+            await asyncio.sleep(wait)
+
+    def on_success(self, model_id: str, token: Optional[str] = None):
+        for bucket in self._buckets(model_id, token):
+            bucket.on_success()
+
+    def on_throttle(self, model_id: str, token: Optional[str] = None, retry_after: Optional[float] = None):
+        for bucket in self._buckets(model_id, token):
+            bucket.on_throttle(retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "global": self.global_bucket.stats(),
+            "models": {model_id: bucket.stats() for model_id, bucket in self.model_buckets.items()},
+            "tokens": {token_key: bucket.stats() for token_key, bucket in self.token_buckets.items()}
+        }
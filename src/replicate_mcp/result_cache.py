@@ -0,0 +1,123 @@
+"""Content-addressed cache of prediction outputs"""
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .utils import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(value: Any) -> Any:
+    """Canonical form of an input value, so equivalent requests hash alike"""
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items() if item is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def prediction_key(model_id: str, version: Optional[str], input_params: Dict[str, Any]) -> str:
+    """Hash identifying a prediction by model, version and normalized input"""
+    canonical = json.dumps(
+        {"model": model_id, "version": version or "", "input": _normalize(input_params)},
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """LRU cache of outputs with a TTL and an optional on-disk backend"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, directory: Optional[Path] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached output for a key, or None on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._read(key)
+            if entry is not None:
+                self._remember(key, entry)
+
+        if entry is not None and time.time() - entry[0] > self.ttl:
+            self._forget(key)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, output: Any):
+        """Store an output"""
+        entry = (time.time(), output)
+        self._remember(key, entry)
+        self._write(key, entry)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+    def _remember(self, key: str, entry: Tuple[float, Any]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _forget(self, key: str):
+        self._entries.pop(key, None)
+        path = self._path(key)
+        if path and path.exists():
+            path.unlink()
+
+    def _path(self, key: str) -> Optional[Path]:
+        if not self.directory:
+            return None
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _read(self, key: str) -> Optional[Tuple[float, Any]]:
+        path = self._path(key)
+        if not path or not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            return data["stored_at"], data["output"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring cached result {path}: {e}")
+            return None
+
+    def _write(self, key: str, entry: Tuple[float, Any]):
+        path = self._path(key)
+        if not path:
+            return
+        try:
+            path.parent.mkdir(exist_ok=True)
+            atomic_write_json(path, {"stored_at": entry[0], "output": entry[1]})
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not persist cached result: {e}")
@@ -0,0 +1,143 @@
+"""Pick a model for a tool call from an objective and constraints"""
+
+import json
+import logging
+import math
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .complete_catalog import MODEL_SELECTION_RULES, CatalogIndex
+from .utils import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+OBJECTIVES = ("cost", "latency", "quality")
+
+# Catalog section, capabilities of which a model needs one, and
+# MODEL_SELECTION_RULES task per tool
+TOOL_ROUTES = {
+    "generate_image": ("image_generation", ("text2img",), "image"),
+    "generate_video": ("video_generation", ("text2video", "img2video"), "video"),
+    "generate_audio": ("audio_generation", ("music_gen", "tts", "sfx"), "audio"),
+    "generate_3d": ("3d_generation", ("text23d", "img23d"), "3d"),
+    "upscale_image": ("image_manipulation", ("upscaling",), None),
+    "remove_background": ("image_manipulation", ("bg_removal",), None)
+}
+
+
+class RoutingError(ValueError):
+    """No catalog model satisfies the routing constraints"""
+
+
+class RuntimeStats:
+    """Observed prediction wall times per model, persisted across restarts
+
+    Each model keeps an exponentially weighted mean, so recent runs count
+    most when a model gets faster or slower.
+    """
+
+    def __init__(self, path: Optional[Path] = None, alpha: float = 0.2):
+        self.path = path
+        self.alpha = alpha
+        self._entries: Dict[str, Dict[str, float]] = {}
+        self._load()
+
+    def observe(self, model_id: str, seconds: float):
+        """Record one finished prediction and persist the stats"""
+        entry = self._entries.get(model_id)
+        if entry is None:
+            self._entries[model_id] = {"mean": seconds, "count": 1}
+        else:
+            entry["mean"] += self.alpha * (seconds - entry["mean"])
+            entry["count"] += 1
+        self._save()
+
+    def expected(self, model_id: str) -> Optional[float]:
+        """Expected seconds for a model, None if it has never been observed"""
+        entry = self._entries.get(model_id)
+        return entry["mean"] if entry else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            model_id: {"expected_seconds": round(entry["mean"], 3), "observations": int(entry["count"])}
+            for model_id, entry in self._entries.items()
+        }
+
+    def _load(self):
+        """Load persisted stats, ignoring a missing or corrupt file"""
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                self._entries = json.load(fh)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring runtime stats {self.path}: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            atomic_write_json(self.path, self._entries)
+        except OSError as e:
+            logger.warning(f"Could not persist runtime stats: {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def route(
+    index: CatalogIndex,
+    runtimes: RuntimeStats,
+    tool: str,
+    objective: str = "cost",
+    max_cost: Optional[float] = None,
+    deadline: Optional[float] = None,
+    capabilities: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Catalog model info of the best model for a tool call
+
+    Candidates are the models in the tool's catalog section that can do the
+    tool's job, have every required capability, cost at most ``max_cost`` and
+    are not known to take longer than ``deadline`` seconds. They are ranked
+    by price (cost), observed runtime (latency; unobserved models last) or
+    MODEL_SELECTION_RULES followed by price, highest first (quality).
+    """
+    if objective not in OBJECTIVES:
+        raise RoutingError(f"Unknown objective: {objective} (use {', '.join(OBJECTIVES)})")
+    if tool not in TOOL_ROUTES:
+        raise RoutingError(f"{tool} does not support automatic model selection")
+
+    category, tool_capabilities, task = TOOL_ROUTES[tool]
+    required = set(capabilities or [])
+
+    candidates = []
+    for entry in index.cheapest(category):
+        model_capabilities = set(entry.get("capabilities", []))
+        if not required <= model_capabilities or model_capabilities.isdisjoint(tool_capabilities):
+            continue
+        if max_cost is not None and entry.get("cost_per_run", 0) > max_cost:
+            continue
+        expected = runtimes.expected(entry["id"])
+        if deadline is not None and expected is not None and expected > deadline:
+            continue
+        candidates.append((entry, math.inf if expected is None else expected))
+
+    if not candidates:
+        raise RoutingError(f"No {category} model meets the constraints for {tool}")
+
+    if objective == "cost":
+        best = min(candidates, key=lambda candidate: (candidate[0].get("cost_per_run", 0), candidate[1]))
+    elif objective == "latency":
+        best = min(candidates, key=lambda candidate: (candidate[1], candidate[0].get("cost_per_run", 0)))
+    else:
+        preferred = [
+            index.get(model)["id"]
+            for model in MODEL_SELECTION_RULES["quality_priority"].get(task, [])
+            if index.get(model)
+        ]
+        best = min(candidates, key=lambda candidate: (
+            preferred.index(candidate[0]["id"]) if candidate[0]["id"] in preferred else len(preferred),
+            -candidate[0].get("cost_per_run", 0)
+        ))
+
+    return index.get(best[0]["id"])
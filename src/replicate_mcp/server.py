@@ -4,21 +4,84 @@ import asyncio
 import os
 import json
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import math
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Sequence
+from pathlib import Path
 
 import mcp.types as types
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
 from mcp.server import Server
-from mcp.server.stdio import stdio_server
-import replicate
 
-from .complete_catalog import COMPLETE_MODEL_CATALOG, WORKFLOW_TEMPLATES
+from .complete_catalog import CATALOG_FILE, Catalog, CatalogError
+from .artifacts import ArtifactStore
+from .budget import BudgetExceededError, BudgetLedger
+from .cassette import MAX_BODY, Cassette
+from .catalog_sync import DEFAULT_BASE_URL, CatalogSync
+from .catalog_watcher import CatalogWatcher
+from .hedging import HedgePolicy, QueueStats, queue_seconds
+from .http_pool import HttpPool
+from .metrics import MetricsEndpoint, ServerMetrics, monitor_loop_lag
+from .predictions import TERMINAL_STATUSES, PredictionRegistry
+from .progress import ProgressReporter, current_reporter
+from .ratelimit import RateLimiter, retry_after_from_error, throttle_headers
+from .result_cache import ResultCache, prediction_key
+from .routing import OBJECTIVES, RuntimeStats, route
+from .singleflight import SingleFlight
+from .tracing import SPAN_KIND_CLIENT, tracer
+from .utils import atomic_write_json, cache_dir
+from .validation import InputValidationError, InputValidator, SchemaStore
+from .version_cache import VersionCache
+from .workflows import WorkflowEngine, WorkflowError, check_template
+
+# replicate and aiohttp (webhooks) are imported on first use to keep startup fast
+if TYPE_CHECKING:
+    from .webhooks import WebhookReceiver
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Largest number of inputs accepted by a batch tool
+MAX_BATCH_ITEMS = 500
+
+# Default model per tool, with the name and cost used when it is not in the catalog
+DEFAULT_MODELS = {
+    "generate_image": ("black-forest-labs/flux-schnell", "black-forest-labs/flux-schnell", 0.01),
+    "generate_video": ("wan-video/wan-2.2-t2v-480p-fast", "wan-video/wan-2.2-t2v-480p-fast", 0.05),
+    "generate_audio": ("suno-ai/bark", "suno-ai/bark", 0.01),
+    "generate_3d": ("camenduru/wonder3d", "camenduru/wonder3d", 0.04),
+    "upscale_image": ("philz1337x/clarity-upscaler", "Clarity Upscaler", 0.022),
+    "remove_background": ("cjwbw/rembg", "RemBG", 0.005)
+}
+
+# Arguments each media tool passes on to its model, and the model input
+# they become; workflow steps may only set these (keep in step with the handlers)
+TOOL_MODEL_INPUTS = {
+    "generate_image": {
+        "prompt": "prompt", "num_outputs": "num_outputs", "negative_prompt": "negative_prompt",
+        "width": "width", "height": "height", "guidance_scale": "guidance_scale", "seed": "seed"
+    },
+    "generate_video": {"prompt": "prompt", "image": "image", "duration": "duration", "fps": "fps"},
+    "generate_audio": {"prompt": "prompt", "duration": "duration", "voice_preset": "voice_preset"},
+    "generate_3d": {"prompt": "prompt", "image": "image"},
+    "upscale_image": {"image_url": "image", "scale": "scale", "face_enhance": "face_enhance"},
+    "remove_background": {"media_url": "image"}
+}
+
+# Tool arguments choosing a model; "auto" picks one from the catalog
+MODEL_PROPERTIES = {
+    "model": {"type": "string", "description": "Model id, catalog key, or \"auto\" to pick one"},
+    "objective": {"type": "string", "enum": list(OBJECTIVES), "description": "What \"auto\" optimizes (default: cost)"},
+    "max_cost": {"type": "number", "description": "Most \"auto\" may spend per run ($)"},
+    "deadline": {"type": "number", "description": "Seconds a run chosen by \"auto\" may be expected to take"},
+    "capabilities": {"type": "array", "items": {"type": "string"}, "description": "Capabilities \"auto\" must match"}
+}
+
+
 class ReplicateMediaServer:
     """Replicate MCP Server by Daniel Fleuren"""
     
@@ -26,17 +89,186 @@ class ReplicateMediaServer:
         self.server = Server("replicate-media")
         self.api_token = os.environ.get("REPLICATE_API_TOKEN")
         self.budget_limit = float(os.environ.get("REPLICATE_BUDGET_LIMIT", "100.0"))
-        self.budget_spent = 0.0
         
-        if self.api_token:
-            replicate.api_token = self.api_token
+        # Replicate API traffic recorded to, or replayed from, a cassette file
+        # (REPLICATE_CASSETTE_MODE=record|replay). Persisted version, schema
+        # and result caches are bypassed then, so a recording holds every
+        # request a fresh run makes
+        self.cassette: Optional[Cassette] = None
+        cassette_mode = os.environ.get("REPLICATE_CASSETTE_MODE")
+        if cassette_mode:
+            self.cassette = Cassette(
+                Path(os.environ.get("REPLICATE_CASSETTE_PATH") or cache_dir() / "cassette.jsonl").expanduser(),
+                cassette_mode,
+                ignore_inputs=[name.strip() for name in os.environ.get("REPLICATE_CASSETTE_IGNORE_INPUTS", "").split(",") if name.strip()],
+                time_scale=float(os.environ.get("REPLICATE_CASSETTE_TIME_SCALE", "0")),
+                passthrough=[os.environ.get("REPLICATE_TRACE_ENDPOINT", "")],
+                max_body=int(os.environ.get("REPLICATE_CASSETTE_MAX_BODY", str(MAX_BODY)))
+            )
+        replaying = self.cassette is not None and self.cassette.replaying
+        
+        # Spend is reserved before each prediction and persisted across
+        # restarts; replayed runs cost nothing and use a throwaway ledger
+        self.budget = BudgetLedger(
+            self.budget_limit,
+            ":memory:" if replaying else Path(os.environ.get("REPLICATE_BUDGET_LEDGER") or cache_dir() / "budget.db").expanduser()
+        )
+        self.budget.settle_stale(float(os.environ.get("REPLICATE_BUDGET_RESERVATION_TTL", "86400")))
+        
+        # Counters and latency histograms for the hot paths, also served on
+        # REPLICATE_METRICS_PORT when it is set
+        self.metrics = ServerMetrics()
+        self.metrics_endpoint: Optional[MetricsEndpoint] = None
+        self.loop_lag_interval = float(os.environ.get("REPLICATE_LOOP_LAG_INTERVAL", "0.5"))
+        
+        # One connection pool for API calls, polling and downloads
+        self.http = HttpPool(
+            max_connections=int(os.environ.get("REPLICATE_HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive=int(os.environ.get("REPLICATE_HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.environ.get("REPLICATE_HTTP_KEEPALIVE_EXPIRY", "30")),
+            connect_timeout=float(os.environ.get("REPLICATE_HTTP_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.environ.get("REPLICATE_HTTP_READ_TIMEOUT", "30")),
+            http2=os.environ.get("REPLICATE_HTTP2", "false").lower() == "true",
+            cassette=self.cassette
+        )
+        
+        # Replicate client, created on first use
+        self._client = None
+        
+        # Tracing spans, exported as OTLP/JSON to a file and/or a collector
+        trace_file = os.environ.get("REPLICATE_TRACE_FILE")
+        trace_endpoint = os.environ.get("REPLICATE_TRACE_ENDPOINT")
+        if trace_file or trace_endpoint:
+            tracer.configure(
+                file=Path(trace_file).expanduser() if trace_file else None,
+                endpoint=trace_endpoint,
+                client=self.http.client
+            )
+        self.trace_export_interval = float(os.environ.get("REPLICATE_TRACE_EXPORT_INTERVAL", "5"))
+        
+        # Bound the number of predictions running at once
+        self.max_concurrency = int(os.environ.get("REPLICATE_MAX_CONCURRENCY", "16"))
+        self._prediction_slots = asyncio.Semaphore(self.max_concurrency)
+        
+        # Items of a batch tool call running at once
+        self.batch_concurrency = int(os.environ.get("REPLICATE_BATCH_CONCURRENCY", "8"))
+        
+        # Throttle prediction creation (requests per second)
+        self.rate_limiter = RateLimiter(
+            global_rate=float(os.environ.get("REPLICATE_RATE_LIMIT", "10")),
+            model_rate=float(os.environ.get("REPLICATE_MODEL_RATE_LIMIT", "5")),
+            token_rate=float(os.environ.get("REPLICATE_TOKEN_RATE_LIMIT", "10"))
+        )
+        
+        # Resolved model versions, persisted across restarts
+        self.version_cache = VersionCache(
+            cache_dir() / "versions.json" if self.cassette is None else None,
+            ttl=float(os.environ.get("REPLICATE_VERSION_CACHE_TTL", "86400"))
+        )
+        
+        # OpenAPI input schemas per version, for checking input before submitting
+        self.validate_inputs = os.environ.get("REPLICATE_VALIDATE_INPUTS", "true").lower() == "true"
+        self.schemas = SchemaStore(cache_dir() / "schemas" if self.cassette is None else None)
+        self.schema_retry_interval = float(os.environ.get("REPLICATE_SCHEMA_RETRY_INTERVAL", "60"))
+        
+        # Outputs of deterministic predictions
+        self.result_cache = None
+        if os.environ.get("REPLICATE_CACHE_ENABLED", "true").lower() == "true":
+            self.result_cache = ResultCache(
+                max_entries=int(os.environ.get("REPLICATE_RESULT_CACHE_SIZE", "1024")),
+                ttl=float(os.environ.get("REPLICATE_RESULT_CACHE_TTL", "3600")),
+                directory=cache_dir() / "results" if self.cassette is None and os.environ.get("REPLICATE_RESULT_CACHE_DISK", "false").lower() == "true" else None
+            )
+        
+        # Identical concurrent requests share one prediction
+        self.single_flight = None
+        if os.environ.get("REPLICATE_COALESCE_ENABLED", "true").lower() == "true":
+            self.single_flight = SingleFlight()
         
         # Track active predictions
-        self.active_predictions = {}
+        self.active_predictions = PredictionRegistry()
+        
+        # Local copies of output files, since delivery URLs expire
+        self.download_outputs = os.environ.get("REPLICATE_DOWNLOAD_OUTPUTS", "false").lower() == "true"
+        self.artifacts = ArtifactStore(
+            Path(os.environ.get("REPLICATE_ARTIFACT_DIR") or cache_dir() / "artifacts").expanduser(),
+            self.http.client,
+            concurrency=int(os.environ.get("REPLICATE_DOWNLOAD_CONCURRENCY", "4")),
+            download_seconds=self.metrics.download_seconds
+        )
+        
+        # Observed prediction times per model, used to route model="auto" by latency
+        self.runtimes = RuntimeStats(None if replaying else cache_dir() / "runtimes.json")
+        
+        # Backups for predictions stuck in a cold-boot queue (REPLICATE_HEDGE=same|equivalent),
+        # submitted past a percentile of each model's observed queue times
+        self.hedging = HedgePolicy(
+            os.environ.get("REPLICATE_HEDGE", "off").lower(),
+            QueueStats(None if replaying else cache_dir() / "queue_times.json"),
+            percentile=float(os.environ.get("REPLICATE_HEDGE_PERCENTILE", "0.95")),
+            min_delay=float(os.environ.get("REPLICATE_HEDGE_MIN_DELAY", "2")),
+            min_samples=int(os.environ.get("REPLICATE_HEDGE_MIN_SAMPLES", "20")),
+            max_in_flight=int(os.environ.get("REPLICATE_HEDGE_MAX_IN_FLIGHT", "4"))
+        )
+        
+        # Seconds between progress checks while a tool call waits on a prediction
+        self.progress_interval = float(os.environ.get("REPLICATE_PROGRESS_INTERVAL", "1"))
+        
+        # Completion webhooks instead of polling, started with the server when
+        # REPLICATE_WEBHOOK_URL (the public base URL of the listener) is set
+        self.webhooks: Optional["WebhookReceiver"] = None
+        self.webhook_fallback = float(os.environ.get("REPLICATE_WEBHOOK_FALLBACK", "60"))
+        
+        # Model metadata fetched by sync_catalog, laid over the catalog files
+        self.catalog_sync = CatalogSync(
+            self.http.client,
+            self.api_token,
+            cache_dir() / "catalog_sync.json",
+            base_url=os.environ.get("REPLICATE_BASE_URL", DEFAULT_BASE_URL),
+            concurrency=int(os.environ.get("REPLICATE_CATALOG_SYNC_CONCURRENCY", "8"))
+        )
+        
+        # Model catalog, reloaded when its file (or directory) changes
+        self.catalog = CatalogWatcher(
+            Path(os.environ.get("REPLICATE_CATALOG_PATH") or CATALOG_FILE).expanduser(),
+            interval=float(os.environ.get("REPLICATE_CATALOG_RELOAD_INTERVAL", "5")),
+            overrides=self.catalog_sync.overrides(),
+            check=_check_workflows
+        )
+        
+        # Serialized list_models responses keyed by query
+        self._list_models_cache: "OrderedDict[str, str]" = OrderedDict()
+        
+        # Workflow steps run through the same handlers as tool calls
+        self.workflow_engine = WorkflowEngine(self._run_workflow_step)
         
         # Register handlers
         self._register_handlers()
     
+    @property
+    def client(self):
+        """Async Replicate client shared by every handler
+        
+        Only its async methods work: the pooled transport cannot serve the
+        library's sync calls.
+        """
+        if self._client is None:
+            import replicate
+            
+            self._client = replicate.Client(
+                api_token=self.api_token,
+                timeout=self.http.timeout,
+                transport=self.http.transport
+            )
+            if self.cassette is not None and self.cassette.replaying:
+                # Polls get recorded statuses, so waiting between them only adds time
+                self._client.poll_interval *= self.cassette.time_scale
+        return self._client
+    
+    @client.setter
+    def client(self, client):
+        self._client = client
+    
     def _register_handlers(self):
         """Register all MCP handlers"""
         
@@ -52,7 +284,7 @@ class ReplicateMediaServer:
                         "type": "object",
                         "properties": {
                             "prompt": {"type": "string"},
-                            "model": {"type": "string"},
+                            **MODEL_PROPERTIES,
                             "negative_prompt": {"type": "string"},
                             "width": {"type": "integer"},
                             "height": {"type": "integer"},
@@ -60,7 +292,9 @@ class ReplicateMediaServer:
                             "seed": {"type": "integer"},
                             "guidance_scale": {"type": "number"},
                             "image": {"type": "string"},
-                            "mask": {"type": "string"}
+                            "mask": {"type": "string"},
+                            "wait": {"type": "boolean"},
+                            "download": {"type": "boolean", "description": "Also save output files locally"}
                         },
                         "required": ["prompt"]
                     }
@@ -72,11 +306,13 @@ class ReplicateMediaServer:
                         "type": "object",
                         "properties": {
                             "prompt": {"type": "string"},
-                            "model": {"type": "string"},
+                            **MODEL_PROPERTIES,
                             "image": {"type": "string"},
                             "duration": {"type": "integer"},
                             "fps": {"type": "integer"},
-                            "resolution": {"type": "string"}
+                            "resolution": {"type": "string"},
+                            "wait": {"type": "boolean"},
+                            "download": {"type": "boolean", "description": "Also save output files locally"}
                         },
                         "required": ["prompt"]
                     }
@@ -88,10 +324,12 @@ class ReplicateMediaServer:
                         "type": "object",
                         "properties": {
                             "prompt": {"type": "string"},
-                            "model": {"type": "string"},
+                            **MODEL_PROPERTIES,
                             "duration": {"type": "integer"},
                             "voice_preset": {"type": "string"},
-                            "format": {"type": "string"}
+                            "format": {"type": "string"},
+                            "wait": {"type": "boolean"},
+                            "download": {"type": "boolean", "description": "Also save output files locally"}
                         },
                         "required": ["prompt"]
                     }
@@ -103,21 +341,28 @@ class ReplicateMediaServer:
                         "type": "object",
                         "properties": {
                             "prompt": {"type": "string"},
-                            "model": {"type": "string"},
+                            **MODEL_PROPERTIES,
                             "image": {"type": "string"},
-                            "output_format": {"type": "string"}
+                            "output_format": {"type": "string"},
+                            "wait": {"type": "boolean"},
+                            "download": {"type": "boolean", "description": "Also save output files locally"}
                         },
                         "required": ["prompt"]
                     }
                 ),
                 types.Tool(
                     name="list_models",
-                    description="List available AI models by category",
+                    description="List available AI models by category, one page at a time",
                     inputSchema={
                         "type": "object",
                         "properties": {
                             "category": {"type": "string"},
-                            "sort_by": {"type": "string"}
+                            "capability": {"type": "string"},
+                            "max_cost": {"type": "number"},
+                            "sort_by": {"type": "string", "enum": ["cost", "name", "key"]},
+                            "fields": {"type": "array", "items": {"type": "string"}},
+                            "limit": {"type": "integer", "minimum": 1, "maximum": 500},
+                            "cursor": {"type": "string"}
                         }
                     }
                 ),
@@ -138,7 +383,9 @@ class ReplicateMediaServer:
                             "image_url": {"type": "string"},
                             "scale": {"type": "integer"},
                             "face_enhance": {"type": "boolean"},
-                            "model": {"type": "string"}
+                            **MODEL_PROPERTIES,
+                            "wait": {"type": "boolean"},
+                            "download": {"type": "boolean", "description": "Also save output files locally"}
                         },
                         "required": ["image_url"]
                     }
@@ -150,19 +397,88 @@ class ReplicateMediaServer:
                         "type": "object",
                         "properties": {
                             "media_url": {"type": "string"},
-                            "media_type": {"type": "string", "enum": ["image", "video"]}
+                            **MODEL_PROPERTIES,
+                            "media_type": {"type": "string", "enum": ["image", "video"]},
+                            "wait": {"type": "boolean"},
+                            "download": {"type": "boolean", "description": "Also save output files locally"}
                         },
                         "required": ["media_url"]
                     }
                 ),
+                # Batch tools
+                types.Tool(
+                    name="generate_image_batch",
+                    description="Generate images for many inputs concurrently; returns per-item results",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "items": {
+                                "type": "array",
+                                "items": {"type": "object"},
+                                "minItems": 1,
+                                "maxItems": MAX_BATCH_ITEMS,
+                                "description": "generate_image arguments, one object per image"
+                            },
+                            "defaults": {"type": "object"},
+                            "concurrency": {"type": "integer", "minimum": 1},
+                            "download": {"type": "boolean", "description": "Also save output files locally"}
+                        },
+                        "required": ["items"]
+                    }
+                ),
+                types.Tool(
+                    name="upscale_image_batch",
+                    description="Upscale many images concurrently; returns per-item results",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "items": {
+                                "type": "array",
+                                "items": {"type": "object"},
+                                "minItems": 1,
+                                "maxItems": MAX_BATCH_ITEMS,
+                                "description": "upscale_image arguments, one object per image"
+                            },
+                            "defaults": {"type": "object"},
+                            "concurrency": {"type": "integer", "minimum": 1},
+                            "download": {"type": "boolean", "description": "Also save output files locally"}
+                        },
+                        "required": ["items"]
+                    }
+                ),
+                types.Tool(
+                    name="remove_background_batch",
+                    description="Remove backgrounds from many images concurrently; returns per-item results",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "items": {
+                                "type": "array",
+                                "items": {"type": "object"},
+                                "minItems": 1,
+                                "maxItems": MAX_BATCH_ITEMS,
+                                "description": "remove_background arguments, one object per image"
+                            },
+                            "defaults": {"type": "object"},
+                            "concurrency": {"type": "integer", "minimum": 1},
+                            "download": {"type": "boolean", "description": "Also save output files locally"}
+                        },
+                        "required": ["items"]
+                    }
+                ),
                 types.Tool(
                     name="execute_workflow",
-                    description="Execute complete media creation workflow",
+                    description="Execute complete media creation workflow; independent steps run in parallel",
                     inputSchema={
                         "type": "object",
                         "properties": {
                             "workflow": {"type": "string", "enum": ["logo_to_brand_video", "character_animation", "product_showcase", "social_media_content"]},
-                            "inputs": {"type": "object"}
+                            "inputs": {
+                                "type": "object",
+                                "properties": {
+                                    "prompt": {"type": "string"}
+                                }
+                            }
                         },
                         "required": ["workflow"]
                     }
@@ -178,76 +494,205 @@ class ReplicateMediaServer:
                         },
                         "required": ["prompt"]
                     }
+                ),
+                types.Tool(
+                    name="sync_catalog",
+                    description="Refresh catalog model versions and metadata from the Replicate API",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "models": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Model ids to refresh (default: the whole catalog)"
+                            }
+                        }
+                    }
+                ),
+                types.Tool(
+                    name="get_metrics",
+                    description="Show call counts and latency histograms for tools and predictions",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "format": {"type": "string", "enum": ["json", "prometheus"]}
+                        }
+                    }
+                ),
+                types.Tool(
+                    name="get_stats",
+                    description="Show server statistics: predictions, coalescing and caches",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {}
+                    }
+                ),
+                # Prediction lifecycle tools
+                types.Tool(
+                    name="get_prediction",
+                    description="Get the status and output of a submitted prediction",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "prediction_id": {"type": "string"}
+                        },
+                        "required": ["prediction_id"]
+                    }
+                ),
+                types.Tool(
+                    name="wait_prediction",
+                    description="Wait for a submitted prediction to finish",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "prediction_id": {"type": "string"},
+                            "timeout": {"type": "number"}
+                        },
+                        "required": ["prediction_id"]
+                    }
+                ),
+                types.Tool(
+                    name="cancel_prediction",
+                    description="Cancel a submitted prediction",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "prediction_id": {"type": "string"}
+                        },
+                        "required": ["prediction_id"]
+                    }
                 )
             ]
         
-        @self.server.call_tool()
+        # Argument validators compiled once per tool. The decorator's own
+        # validation re-checks the whole schema on every call (~10 ms)
+        argument_validators: Dict[str, Any] = {}
+        
+        @self.server.call_tool(validate_input=False)
         async def call_tool(name: str, arguments: Dict[str, Any]) -> Sequence[types.TextContent]:
             """Handle tool calls"""
             
+            if not argument_validators:
+                for tool in await list_tools():
+                    argument_validators[tool.name] = validator_for(tool.inputSchema)(tool.inputSchema)
+            validator = argument_validators.get(name)
+            error = best_match(validator.iter_errors(arguments)) if validator is not None else None
+            if error is not None:
+                return types.CallToolResult(
+                    content=[types.TextContent(type="text", text=f"Input validation error: {error.message}")],
+                    isError=True
+                )
+            
             if not self.api_token:
                 return [types.TextContent(
                     type="text",
                     text="Error: REPLICATE_API_TOKEN not set. Please set your API key."
                 )]
             
-            try:
-                # Route to appropriate handler
-                if name == "generate_image":
-                    result = await self._generate_image(arguments)
-                elif name == "generate_video":
-                    result = await self._generate_video(arguments)
-                elif name == "generate_audio":
-                    result = await self._generate_audio(arguments)
-                elif name == "generate_3d":
-                    result = await self._generate_3d(arguments)
-                elif name == "list_models":
-                    result = await self._list_models(arguments)
-                elif name == "check_budget":
-                    result = await self._check_budget()
-                elif name == "upscale_image":
-                    result = await self._upscale_image(arguments)
-                elif name == "remove_background":
-                    result = await self._remove_background(arguments)
-                elif name == "execute_workflow":
-                    result = await self._execute_workflow(arguments)
-                elif name == "generate_logo":
-                    result = await self._generate_logo(arguments)
-                else:
-                    result = {"error": f"Unknown tool: {name}"}
-                
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps(result, indent=2)
-                )]
-                
-            except Exception as e:
-                logger.error(f"Tool error: {str(e)}")
-                return [types.TextContent(
-                    type="text",
-                    text=json.dumps({"error": str(e)}, indent=2)
-                )]
+            # Stream progress if the client sent a progress token
+            context = self.server.request_context
+            progress_token = context.meta.progressToken if context.meta is not None else None
+            current_reporter.set(
+                ProgressReporter(context.session, progress_token) if progress_token is not None else None
+            )
+            
+            # Each tool call starts a new trace
+            with tracer.span("tools/call", root=True, tool=name) as span:
+                started = time.perf_counter()
+                label = name
+                outcome = "error"
+                try:
+                    # Route to appropriate handler
+                    if name == "generate_image":
+                        result = await self._generate_image(arguments)
+                    elif name == "generate_video":
+                        result = await self._generate_video(arguments)
+                    elif name == "generate_audio":
+                        result = await self._generate_audio(arguments)
+                    elif name == "generate_3d":
+                        result = await self._generate_3d(arguments)
+                    elif name == "list_models":
+                        result = await self._list_models(arguments)
+                    elif name == "check_budget":
+                        result = await self._check_budget()
+                    elif name == "upscale_image":
+                        result = await self._upscale_image(arguments)
+                    elif name == "remove_background":
+                        result = await self._remove_background(arguments)
+                    elif name == "generate_image_batch":
+                        result = await self._run_batch("generate_image", arguments)
+                    elif name == "upscale_image_batch":
+                        result = await self._run_batch("upscale_image", arguments)
+                    elif name == "remove_background_batch":
+                        result = await self._run_batch("remove_background", arguments)
+                    elif name == "execute_workflow":
+                        result = await self._execute_workflow(arguments)
+                    elif name == "generate_logo":
+                        result = await self._generate_logo(arguments)
+                    elif name == "sync_catalog":
+                        result = await self._sync_catalog(arguments)
+                    elif name == "get_metrics":
+                        result = self._get_metrics(arguments)
+                    elif name == "get_stats":
+                        result = await self._get_stats()
+                    elif name == "get_prediction":
+                        result = await self._get_prediction(arguments)
+                    elif name == "wait_prediction":
+                        result = await self._wait_prediction(arguments)
+                    elif name == "cancel_prediction":
+                        result = await self._cancel_prediction(arguments)
+                    else:
+                        # Arbitrary names must not create new metric series
+                        label = "unknown"
+                        result = {"error": f"Unknown tool: {name}"}
+                    
+                    if isinstance(result, dict) and arguments.get("download", self.download_outputs):
+                        await self._attach_artifacts(result)
+                    
+                    outcome = "error" if isinstance(result, dict) and "error" in result else "ok"
+                    
+                    # Handlers may return pre-serialized JSON
+                    return [types.TextContent(
+                        type="text",
+                        text=result if isinstance(result, str) else _dumps(result)
+                    )]
+                    
+                except BudgetExceededError as e:
+                    outcome = "budget_exceeded"
+                    return [types.TextContent(
+                        type="text",
+                        text=_dumps({"error": str(e)})
+                    )]
+                except InputValidationError as e:
+                    outcome = "invalid_input"
+                    return [types.TextContent(
+                        type="text",
+                        text=_dumps({"error": str(e), "invalid_input": e.problems})
+                    )]
+                except Exception as e:
+                    logger.error(f"Tool error: {str(e)}")
+                    return [types.TextContent(
+                        type="text",
+                        text=_dumps({"error": str(e)})
+                    )]
+                finally:
+                    self.metrics.tool_seconds.labels(label).observe(time.perf_counter() - started)
+                    self.metrics.tool_calls.labels(label, outcome).inc()
+                    span.set_attribute("outcome", outcome)
     
-    async def _generate_image(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _generate_image(self, params: Dict[str, Any], reservation: Optional[str] = None) -> Dict[str, Any]:
         """Generate image using Replicate"""
-        model_id = params.get("model", "black-forest-labs/flux-schnell")
-        
         # Get model info
-        model_info = self._get_model_info(model_id)
-        if not model_info:
-            model_info = {"id": model_id, "name": model_id, "cost_per_run": 0.01}
-        
-        # Check budget
-        if not self._check_budget_limit(model_info.get("cost_per_run", 0.01)):
-            return {"error": "Budget limit exceeded"}
+        model_info = self._resolve_model("generate_image", params.get("model"), params)
         
         # Run prediction
         input_params = {
-            "prompt": params["prompt"],
-            "num_outputs": params.get("num_outputs", 1)
+            "prompt": params["prompt"]
         }
         
         # Add optional parameters
+        if "num_outputs" in params:
+            input_params["num_outputs"] = params["num_outputs"]
         if "negative_prompt" in params:
             input_params["negative_prompt"] = params["negative_prompt"]
         if "width" in params:
@@ -259,49 +704,29 @@ class ReplicateMediaServer:
         if "seed" in params:
             input_params["seed"] = params["seed"]
         
-        # Use version if available
-        if "version" in model_info:
-            model = replicate.models.get(model_info["id"])
-            version = model.versions.get(model_info["version"])
-            prediction = replicate.predictions.create(
-                version=version,
-                input=input_params
-            )
-        else:
-            prediction = replicate.run(
-                model_info["id"],
-                input=input_params
-            )
+        # Seeded generations are deterministic, so reuse earlier outputs
+        cache_key = self._result_cache_key(model_info, input_params) if "seed" in input_params else None
+        cached = self._cached_output("generate_image", cache_key)
+        if cached is not None:
+            return self._cached_response(model_info, cached)
         
-        # Track spending
-        self.budget_spent += model_info.get("cost_per_run", 0.01)
+        record, shared = await self._submit_prediction(
+            "generate_image", model_info, input_params, cache_key=cache_key, reservation=reservation,
+            wait=params.get("wait", True)
+        )
         
-        # Return result
-        if isinstance(prediction, list):
-            output = prediction
-        else:
-            output = prediction.output if hasattr(prediction, 'output') else [prediction]
+        # Coalesced calls ride on an existing prediction and cost nothing
+        cost = 0.0 if shared else model_info.get("cost_per_run", 0.01)
         
-        return {
-            "status": "success",
-            "model": model_info["name"],
-            "output": output,
-            "cost": model_info.get("cost_per_run", 0.01),
-            "budget_remaining": self.budget_limit - self.budget_spent
-        }
+        if not params.get("wait", True):
+            return self._submitted_response(record, cost)
+        
+        return await self._completed_response(model_info, record, cost)
     
     async def _generate_video(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Generate video using Replicate"""
-        model_id = params.get("model", "wan-video/wan-2.2-t2v-480p-fast")
-        
         # Get model info
-        model_info = self._get_model_info(model_id)
-        if not model_info:
-            model_info = {"id": model_id, "name": model_id, "cost_per_run": 0.05}
-        
-        # Check budget
-        if not self._check_budget_limit(model_info.get("cost_per_run", 0.05)):
-            return {"error": "Budget limit exceeded"}
+        model_info = self._resolve_model("generate_video", params.get("model"), params)
         
         # Run prediction
         input_params = {
@@ -316,34 +741,22 @@ class ReplicateMediaServer:
         if "fps" in params:
             input_params["fps"] = params["fps"]
         
-        prediction = replicate.run(
-            model_info["id"],
-            input=input_params
+        record, shared = await self._submit_prediction(
+            "generate_video", model_info, input_params, wait=params.get("wait", True)
         )
         
-        # Track spending
-        self.budget_spent += model_info.get("cost_per_run", 0.05)
+        # Coalesced calls ride on an existing prediction and cost nothing
+        cost = 0.0 if shared else model_info.get("cost_per_run", 0.05)
         
-        return {
-            "status": "success",
-            "model": model_info["name"],
-            "output": prediction,
-            "cost": model_info.get("cost_per_run", 0.05),
-            "budget_remaining": self.budget_limit - self.budget_spent
-        }
+        if not params.get("wait", True):
+            return self._submitted_response(record, cost)
+        
+        return await self._completed_response(model_info, record, cost)
     
     async def _generate_audio(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Generate audio using Replicate"""
-        model_id = params.get("model", "suno-ai/bark")
-        
         # Get model info
-        model_info = self._get_model_info(model_id)
-        if not model_info:
-            model_info = {"id": model_id, "name": model_id, "cost_per_run": 0.01}
-        
-        # Check budget
-        if not self._check_budget_limit(model_info.get("cost_per_run", 0.01)):
-            return {"error": "Budget limit exceeded"}
+        model_info = self._resolve_model("generate_audio", params.get("model"), params)
         
         # Run prediction
         input_params = {
@@ -356,43 +769,22 @@ class ReplicateMediaServer:
         if "voice_preset" in params:
             input_params["voice_preset"] = params["voice_preset"]
         
-        # Use version if available
-        if "version" in model_info:
-            model = replicate.models.get(model_info["id"])
-            version = model.versions.get(model_info["version"])
-            prediction = replicate.predictions.create(
-                version=version,
-                input=input_params
-            )
-        else:
-            prediction = replicate.run(
-                model_info["id"],
-                input=input_params
-            )
+        record, shared = await self._submit_prediction(
+            "generate_audio", model_info, input_params, wait=params.get("wait", True)
+        )
         
-        # Track spending
-        self.budget_spent += model_info.get("cost_per_run", 0.01)
+        # Coalesced calls ride on an existing prediction and cost nothing
+        cost = 0.0 if shared else model_info.get("cost_per_run", 0.01)
         
-        return {
-            "status": "success",
-            "model": model_info["name"],
-            "output": prediction,
-            "cost": model_info.get("cost_per_run", 0.01),
-            "budget_remaining": self.budget_limit - self.budget_spent
-        }
+        if not params.get("wait", True):
+            return self._submitted_response(record, cost)
+        
+        return await self._completed_response(model_info, record, cost)
     
     async def _generate_3d(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Generate 3D model using Replicate"""
-        model_id = params.get("model", "camenduru/wonder3d")
-        
         # Get model info
-        model_info = self._get_model_info(model_id)
-        if not model_info:
-            model_info = {"id": model_id, "name": model_id, "cost_per_run": 0.04}
-        
-        # Check budget
-        if not self._check_budget_limit(model_info.get("cost_per_run", 0.04)):
-            return {"error": "Budget limit exceeded"}
+        model_info = self._resolve_model("generate_3d", params.get("model"), params)
         
         # Run prediction
         input_params = {}
@@ -401,37 +793,37 @@ class ReplicateMediaServer:
         if "image" in params:
             input_params["image"] = params["image"]
         
-        # Use version if available
-        if "version" in model_info:
-            model = replicate.models.get(model_info["id"])
-            version = model.versions.get(model_info["version"])
-            prediction = replicate.predictions.create(
-                version=version,
-                input=input_params
-            )
-        else:
-            prediction = replicate.run(
-                model_info["id"],
-                input=input_params
-            )
+        record, shared = await self._submit_prediction(
+            "generate_3d", model_info, input_params, wait=params.get("wait", True)
+        )
         
-        # Track spending
-        self.budget_spent += model_info.get("cost_per_run", 0.04)
+        # Coalesced calls ride on an existing prediction and cost nothing
+        cost = 0.0 if shared else model_info.get("cost_per_run", 0.04)
         
-        return {
-            "status": "success",
-            "model": model_info["name"],
-            "output": prediction,
-            "cost": model_info.get("cost_per_run", 0.04),
-            "budget_remaining": self.budget_limit - self.budget_spent
-        }
+        if not params.get("wait", True):
+            return self._submitted_response(record, cost)
+        
+        return await self._completed_response(model_info, record, cost)
     
-    async def _list_models(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """List available models"""
+    async def _list_models(self, params: Dict[str, Any]) -> str:
+        """List available models as compact JSON, cached per distinct query"""
+        # Responses are only reused within one catalog generation
+        catalog = self.catalog.current
+        query = f"{catalog.generation}:{json.dumps(params, sort_keys=True)}"
+        cached = self._list_models_cache.get(query)
+        if cached is not None:
+            self._list_models_cache.move_to_end(query)
+            return cached
+        
         category = params.get("category", "all")
+        limit = params.get("limit", 50)
         
-        if category == "all":
-            return {"models": COMPLETE_MODEL_CATALOG}
+        try:
+            offset = int(params.get("cursor") or 0)
+        except ValueError:
+            return _dumps({"error": f"Invalid cursor: {params['cursor']}"})
+        if limit < 1 or offset < 0:
+            return _dumps({"error": "limit must be positive and cursor non-negative"})
         
         # Map category to catalog sections
         category_map = {
@@ -441,157 +833,306 @@ class ReplicateMediaServer:
             "3d": ["3d_generation"]
         }
         
-        result = {}
-        for cat in category_map.get(category, []):
-            if cat in COMPLETE_MODEL_CATALOG:
-                result[cat] = COMPLETE_MODEL_CATALOG[cat]
+        if category == "all":
+            models = catalog.index.entries
+        else:
+            sections = set(category_map.get(category, [category]))
+            models = [model for model in catalog.index.entries if model["category"] in sections]
+        
+        if "capability" in params:
+            models = [model for model in models if params["capability"] in model.get("capabilities", [])]
+        if "max_cost" in params:
+            models = [model for model in models if model.get("cost_per_run", 0) <= params["max_cost"]]
+        
+        sort_by = params.get("sort_by")
+        if sort_by == "cost":
+            models = sorted(models, key=lambda model: model.get("cost_per_run", 0))
+        elif sort_by in ("name", "key"):
+            models = sorted(models, key=lambda model: model[sort_by].lower())
+        
+        page = models[offset:offset + limit]
+        if params.get("fields"):
+            page = [{field: model[field] for field in params["fields"] if field in model} for model in page]
         
-        return {"models": result}
+        result = {
+            "models": page,
+            "total": len(models),
+            "next_cursor": str(offset + limit) if offset + limit < len(models) else None
+        }
+        
+        text = _dumps(result)
+        self._list_models_cache[query] = text
+        if len(self._list_models_cache) > 256:
+            self._list_models_cache.popitem(last=False)
+        return text
     
     async def _check_budget(self) -> Dict[str, Any]:
         """Check budget status"""
+        return self.budget.status()
+    
+    async def _sync_catalog(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Fetch catalog models from the API, apply what changed and save a snapshot"""
+        model_ids = params.get("models") or list(self.catalog.current.index.by_id)
+        summary = await self.catalog_sync.sync(model_ids)
+        
+        # Rebuild the live catalog only when fields changed, since a new
+        # generation drops everything cached against the old one
+        overrides = self.catalog_sync.overrides()
+        if overrides != self.catalog.overrides:
+            self.catalog.overrides = overrides
+            await self.catalog.reload()
+        
+        # Persist the merged result
+        catalog = self.catalog.current
+        snapshot = cache_dir() / "catalog.synced.json"
+        atomic_write_json(snapshot, {"models": catalog.models, "workflows": catalog.workflows})
+        
+        return {**summary, "catalog_generation": catalog.generation, "snapshot": str(snapshot)}
+    
+    def _get_metrics(self, params: Dict[str, Any]) -> Any:
+        """Metrics as JSON, or as Prometheus text with format=prometheus"""
+        if params.get("format") == "prometheus":
+            return self.metrics.render()
+        return self.metrics.snapshot()
+    
+    async def _get_stats(self) -> Dict[str, Any]:
+        """Server statistics"""
         return {
-            "budget_limit": self.budget_limit,
-            "budget_spent": round(self.budget_spent, 2),
-            "budget_remaining": round(self.budget_limit - self.budget_spent, 2),
-            "percentage_used": round((self.budget_spent / self.budget_limit) * 100, 1)
+            "predictions": {
+                "tracked": len(self.active_predictions),
+                "active": len(self.active_predictions.active()),
+                "max_concurrency": self.max_concurrency
+            },
+            "coalescing": {
+                "enabled": self.single_flight is not None,
+                "coalesced_calls": self.single_flight.coalesced if self.single_flight is not None else 0,
+                "in_flight": len(self.single_flight) if self.single_flight is not None else 0
+            },
+            "rate_limits": self.rate_limiter.stats(),
+            "result_cache": self.result_cache.stats() if self.result_cache else None,
+            "catalog": self.catalog.stats(),
+            "catalog_sync": self.catalog_sync.stats(),
+            "version_cache": {"entries": len(self.version_cache)},
+            "runtimes": self.runtimes.stats(),
+            "hedging": self.hedging.stats(),
+            "webhooks": self.webhooks.stats() if self.webhooks is not None else None,
+            "artifacts": self.artifacts.stats(),
+            "tracing": tracer.stats(),
+            "cassette": self.cassette.stats() if self.cassette is not None else None,
+            "http": self.http.stats()
         }
     
-    async def _upscale_image(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _upscale_image(self, params: Dict[str, Any], reservation: Optional[str] = None) -> Dict[str, Any]:
         """Upscale image"""
-        model_id = params.get("model", "philz1337x/clarity-upscaler")
-        
         # Get model info
-        model_info = self._get_model_info(model_id)
-        if not model_info:
-            model_info = {"id": model_id, "name": "Clarity Upscaler", "cost_per_run": 0.022}
-        
-        # Check budget
-        if not self._check_budget_limit(model_info.get("cost_per_run", 0.022)):
-            return {"error": "Budget limit exceeded"}
+        model_info = self._resolve_model("upscale_image", params.get("model"), params)
         
         # Run prediction
         input_params = {
-            "image": params["image_url"],
-            "scale": params.get("scale", 2)
+            "image": params["image_url"]
         }
+        if "scale" in params:
+            input_params["scale"] = params["scale"]
         
         if params.get("face_enhance"):
             input_params["face_enhance"] = True
         
-        # Use version if available
-        if "version" in model_info:
-            model = replicate.models.get(model_info["id"])
-            version = model.versions.get(model_info["version"])
-            prediction = replicate.predictions.create(
-                version=version,
-                input=input_params
-            )
-        else:
-            prediction = replicate.run(
-                model_info["id"],
-                input=input_params
-            )
+        # Same input always gives the same output, so reuse earlier outputs
+        cache_key = self._result_cache_key(model_info, input_params)
+        cached = self._cached_output("upscale_image", cache_key)
+        if cached is not None:
+            return self._cached_response(model_info, cached)
         
-        # Track spending
-        self.budget_spent += model_info.get("cost_per_run", 0.022)
+        record, shared = await self._submit_prediction(
+            "upscale_image", model_info, input_params, cache_key=cache_key, reservation=reservation,
+            wait=params.get("wait", True)
+        )
         
-        return {
-            "status": "success",
-            "model": model_info["name"],
-            "output": prediction,
-            "cost": model_info.get("cost_per_run", 0.022),
-            "budget_remaining": self.budget_limit - self.budget_spent
-        }
+        # Coalesced calls ride on an existing prediction and cost nothing
+        cost = 0.0 if shared else model_info.get("cost_per_run", 0.022)
+        
+        if not params.get("wait", True):
+            return self._submitted_response(record, cost)
+        
+        return await self._completed_response(model_info, record, cost)
     
-    async def _remove_background(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _remove_background(self, params: Dict[str, Any], reservation: Optional[str] = None) -> Dict[str, Any]:
         """Remove background from media"""
-        model_id = "cjwbw/rembg"
-        
         # Get model info
-        model_info = self._get_model_info(model_id)
-        if not model_info:
-            model_info = {"id": model_id, "name": "RemBG", "cost_per_run": 0.005}
-        
-        # Check budget
-        if not self._check_budget_limit(model_info.get("cost_per_run", 0.005)):
-            return {"error": "Budget limit exceeded"}
+        model_info = self._resolve_model("remove_background", params.get("model"), params)
         
         # Run prediction
         input_params = {
             "image": params["media_url"]
         }
         
-        # Use version if available
-        if "version" in model_info:
-            model = replicate.models.get(model_info["id"])
-            version = model.versions.get(model_info["version"])
-            prediction = replicate.predictions.create(
-                version=version,
-                input=input_params
-            )
-        else:
-            prediction = replicate.run(
-                model_info["id"],
-                input=input_params
-            )
+        # Same input always gives the same output, so reuse earlier outputs
+        cache_key = self._result_cache_key(model_info, input_params)
+        cached = self._cached_output("remove_background", cache_key)
+        if cached is not None:
+            return self._cached_response(model_info, cached)
+        
+        record, shared = await self._submit_prediction(
+            "remove_background", model_info, input_params, cache_key=cache_key, reservation=reservation,
+            wait=params.get("wait", True)
+        )
+        
+        # Coalesced calls ride on an existing prediction and cost nothing
+        cost = 0.0 if shared else model_info.get("cost_per_run", 0.005)
+        
+        if not params.get("wait", True):
+            return self._submitted_response(record, cost)
+        
+        return await self._completed_response(model_info, record, cost)
+    
+    async def _run_batch(self, tool: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Fan a list of inputs out to a tool under a concurrency cap"""
+        items = params.get("items") or []
+        if not items:
+            return {"error": "items must be a non-empty array"}
+        if len(items) > MAX_BATCH_ITEMS:
+            return {"error": f"At most {MAX_BATCH_ITEMS} items per batch"}
+        
+        defaults = params.get("defaults", {})
+        items = [{**defaults, **item, "wait": True} for item in items]
+        handlers = {
+            "generate_image": self._generate_image,
+            "upscale_image": self._upscale_image,
+            "remove_background": self._remove_background
+        }
+        handler = handlers[tool]
+        
+        # Route "auto" items once, so each runs the model its reservation was priced for;
+        # an item no model fits fails on its own
+        results = []
+        routed = []
+        for index, item in enumerate(items):
+            try:
+                model_info = self._resolve_model(tool, item.get("model"), item)
+            except ValueError as e:
+                results.append({"index": index, "error": str(e)})
+                continue
+            routed.append((index, {**item, "model": model_info["id"]}, model_info))
+        
+        # Reserve the whole batch up front so it cannot run out of budget halfway
+        costs = [model_info.get("cost_per_run", 0.0) for _, _, model_info in routed]
+        with tracer.span("budget.reserve", amount=sum(costs), items=len(costs)):
+            reservations = await self.budget.areserve_many(costs, f"{tool}_batch")
+        self.metrics.reservations.labels(tool).inc(len(reservations))
+        self.metrics.reserved_dollars.labels(tool).inc(sum(costs))
         
-        # Track spending
-        self.budget_spent += model_info.get("cost_per_run", 0.005)
+        semaphore = asyncio.Semaphore(max(1, params.get("concurrency", self.batch_concurrency)))
         
+        reporter = current_reporter.get()
+        
+        async def run(index: int, item: Dict[str, Any], reservation: str) -> Dict[str, Any]:
+            # Progress is reported per batch, not per item
+            current_reporter.set(None)
+            async with semaphore:
+                try:
+                    result = await handler(item, reservation=reservation)
+                except Exception as e:
+                    result = {"error": str(e)}
+                finally:
+                    # No-op when a prediction spent it; releases it after cache hits and failures
+                    await self.budget.arefund(reservation)
+            return {"index": index, **result}
+        
+        for completed in asyncio.as_completed([
+            run(index, item, reservation)
+            for (index, item, _), reservation in zip(routed, reservations)
+        ]):
+            results.append(await completed)
+            if reporter is not None:
+                await reporter.report(len(results), total=len(items), message=f"{len(results)}/{len(items)} items done")
+        results.sort(key=lambda result: result["index"])
+        
+        failed = sum(1 for result in results if "error" in result)
         return {
-            "status": "success",
-            "model": model_info["name"],
-            "output": prediction,
-            "cost": model_info.get("cost_per_run", 0.005),
-            "budget_remaining": self.budget_limit - self.budget_spent
+            "status": "completed" if not failed else ("failed" if failed == len(results) else "partial"),
+            "total": len(results),
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "total_cost": sum(result.get("cost", 0.0) for result in results),
+            "results": results,
+            "budget_remaining": self.budget.remaining
         }
     
     async def _execute_workflow(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a complete workflow"""
         workflow_name = params["workflow"]
-        workflow = WORKFLOW_TEMPLATES.get(workflow_name)
+        workflow = self.catalog.current.workflows.get(workflow_name)
         
         if not workflow:
             return {"error": f"Unknown workflow: {workflow_name}"}
         
-        results = []
-        total_cost = 0
-        
-        for step in workflow["steps"]:
-            # Simple workflow execution (in real implementation, this would be more sophisticated)
-            step_result = {
-                "step": step["step"],
-                "model": step["model"],
-                "status": "completed"
-            }
-            results.append(step_result)
-            
-            # Estimate cost
-            model_info = self._get_model_info(step["model"])
-            if model_info:
-                total_cost += model_info.get("cost_per_run", 0.01)
+        try:
+            if self.validate_inputs:
+                await self._check_workflow_inputs(workflow)
+            result = await self.workflow_engine.execute(workflow, params.get("inputs", {}))
+        except WorkflowError as e:
+            return {"error": str(e)}
         
         return {
             "workflow": workflow_name,
-            "status": "completed",
-            "steps": results,
-            "total_cost": total_cost,
+            **result,
             "description": workflow["description"]
         }
     
+    async def _check_workflow_inputs(self, workflow: Dict[str, Any]):
+        """Check every step's model inputs against its schema before any step is paid for"""
+        async def check(step: Dict[str, Any]):
+            tool = step.get("tool", "predict")
+            names = set(step.get("params", {})) | set(step.get("inputs", {}))
+            if tool == "predict":
+                model_info = self._get_model_info(step["model"]) or {"id": step["model"]}
+            else:
+                model_info = self._resolve_model(tool, step["model"], step.get("params", {}))
+                names = {TOOL_MODEL_INPUTS[tool][name] for name in names}
+            validator = await self._input_validator(model_info)
+            unknown = sorted(names - validator.properties.keys()) if validator is not None else []
+            if unknown:
+                raise WorkflowError(f"Step {step['step']}: {model_info['id']} does not accept {', '.join(unknown)}")
+        
+        await asyncio.gather(*(check(step) for step in workflow["steps"]))
+    
+    async def _run_workflow_step(self, step: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one workflow step through its tool handler"""
+        tool = step.get("tool", "predict")
+        
+        # Steps run concurrently, so progress is reported per workflow, not per step
+        current_reporter.set(None)
+        
+        if tool == "predict":
+            # Call the model directly with the step's params as its input
+            model_info = self._get_model_info(step["model"])
+            if not model_info:
+                model_info = {"id": step["model"], "name": step["model"], "cost_per_run": 0.01}
+            
+            record, shared = await self._submit_prediction("execute_workflow", model_info, params)
+            output = await record.task
+            cost = 0.0 if shared else _hedged_cost(record, model_info.get("cost_per_run", 0.01))
+            return {"output": output, "cost": cost}
+        
+        handlers = {
+            "generate_image": self._generate_image,
+            "generate_video": self._generate_video,
+            "generate_audio": self._generate_audio,
+            "generate_3d": self._generate_3d,
+            "upscale_image": self._upscale_image,
+            "remove_background": self._remove_background
+        }
+        if tool not in handlers:
+            return {"error": f"Unknown workflow tool: {tool}"}
+        
+        return await handlers[tool]({**params, "model": step["model"]})
+    
     async def _generate_logo(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Generate logo"""
         model_id = "recraft-ai/recraft-v3-svg"
         
         # Get model info from catalog
-        model_info = None
-        for category in COMPLETE_MODEL_CATALOG.values():
-            for model_key, info in category.items():
-                if info["id"] == model_id:
-                    model_info = info
-                    break
-        
+        model_info = self.catalog.current.index.by_id.get(model_id)
         if not model_info:
             model_info = {"id": model_id, "name": "Recraft SVG", "cost_per_run": 0.01}
         
@@ -602,25 +1143,738 @@ class ReplicateMediaServer:
             "output": [f"https://example.com/logo_{params.get('format', 'svg')}.{params.get('format', 'svg')}"],
             "cost": model_info.get("cost_per_run", 0.01),
             "format": params.get("format", "svg"),
-            "budget_remaining": self.budget_limit - self.budget_spent
+            "budget_remaining": self.budget.remaining
         }
     
+    async def _submit_prediction(
+        self,
+        tool: str,
+        model_info: Dict[str, Any],
+        input_params: Dict[str, Any],
+        cache_key: Optional[str] = None,
+        reservation: Optional[str] = None,
+        wait: bool = True
+    ):
+        """Create a prediction, or join an identical one already in flight
+        
+        Returns the prediction record and whether it was shared with an
+        earlier caller. A pre-made budget reservation is used instead of
+        reserving a new one; it is left untouched when the call is shared.
+        Pass wait=False when the caller will not await the output.
+        """
+        # Reject bad input before it costs anything
+        if self.validate_inputs:
+            with tracer.span("input.validate", model=model_info["id"]):
+                validator = await self._input_validator(model_info)
+                if validator is not None:
+                    input_params = validator.validate(input_params)
+        
+        if self.single_flight is None:
+            return await self._create_prediction(
+                tool, model_info, input_params, cache_key, reservation=reservation, wait=wait
+            ), False
+        
+        flight_key = cache_key or prediction_key(model_info["id"], model_info.get("version"), input_params)
+        return await self.single_flight.do(
+            flight_key,
+            lambda: self._create_prediction(tool, model_info, input_params, cache_key, flight_key, reservation, wait)
+        )
+    
+    async def _create_prediction(
+        self,
+        tool: str,
+        model_info: Dict[str, Any],
+        input_params: Dict[str, Any],
+        cache_key: Optional[str] = None,
+        flight_key: Optional[str] = None,
+        reservation: Optional[str] = None,
+        wait: bool = True
+    ):
+        """Reserve budget, create a prediction and start a task that waits for its output
+        
+        A REPLICATE_MAX_CONCURRENCY slot is held until the prediction finishes
+        when the caller awaits it, and only for the create call otherwise.
+        """
+        if reservation is None:
+            with tracer.span("budget.reserve", amount=model_info.get("cost_per_run", 0.0)):
+                reservation = await self.budget.areserve(
+                    model_info.get("cost_per_run", 0.0),
+                    f"{tool}:{model_info['id']}"
+                )
+            self.metrics.reservations.labels(tool).inc()
+            self.metrics.reserved_dollars.labels(tool).inc(model_info.get("cost_per_run", 0.0))
+        
+        started = time.perf_counter()
+        try:
+            with tracer.span("prediction.queue", model=model_info["id"]):
+                await self._prediction_slots.acquire()
+        except BaseException:
+            await self.budget.arefund(reservation)
+            raise
+        self.metrics.queue_seconds.labels(tool, self._model_label(model_info["id"])).observe(time.perf_counter() - started)
+        
+        webhooks = self.webhooks
+        started = time.perf_counter()
+        try:
+            with tracer.span("prediction.create", kind=SPAN_KIND_CLIENT, model=model_info["id"]) as span:
+                prediction = await self._post_prediction(model_info, input_params, webhooks)
+                span.set_attribute("prediction_id", prediction.id)
+        except BaseException:
+            self._prediction_slots.release()
+            await self.budget.arefund(reservation)
+            raise
+        self.metrics.create_seconds.labels(tool, self._model_label(model_info["id"])).observe(time.perf_counter() - started)
+        if not wait:
+            # Background jobs must not keep awaited calls from starting
+            self._prediction_slots.release()
+        
+        record = self.active_predictions.track(prediction, tool, model_info)
+        record.task = asyncio.ensure_future(self._watch_prediction(
+            record, hedge=True, release_slot=wait, reservation=reservation, webhooks=webhooks
+        ))
+        record.task.add_done_callback(_consume_exception)
+        if cache_key and self.result_cache:
+            record.task.add_done_callback(lambda task: self._store_result(cache_key, task, record))
+        if flight_key:
+            record.task.add_done_callback(lambda task: self.single_flight.forget(flight_key))
+        return record
+    
+    async def _post_prediction(
+        self,
+        model_info: Dict[str, Any],
+        input_params: Dict[str, Any],
+        webhooks: Optional["WebhookReceiver"] = None
+    ):
+        """Create a prediction, queuing behind the rate limiters and retrying on 429"""
+        from replicate.exceptions import ReplicateError
+        
+        model_id = model_info["id"]
+        
+        options: Dict[str, Any] = {}
+        if webhooks is not None:
+            options["webhook"] = webhooks.url
+            options["webhook_events_filter"] = ["completed"]
+        
+        for attempt in range(self.rate_limiter.max_attempts):
+            await self.rate_limiter.acquire(model_id, self.api_token)
+            # The transport fills in the headers of a 429 response
+            headers: Dict[str, str] = {}
+            headers_token = throttle_headers.set(headers)
+            try:
+                # Use version if available
+                if "version" in model_info:
+                    prediction = await self.client.predictions.async_create(
+                        version=await self._resolve_version(model_info),
+                        input=input_params,
+                        **options
+                    )
+                else:
+                    prediction = await self.client.predictions.async_create(
+                        model=model_id,
+                        input=input_params,
+                        **options
+                    )
+            except ReplicateError as e:
+                if e.status != 429 or attempt == self.rate_limiter.max_attempts - 1:
+                    raise
+                retry_after = retry_after_from_error(e, headers.get("retry-after"))
+                logger.warning(f"Rate limited creating {model_id}, retry after {retry_after or 'backoff'}")
+                self.rate_limiter.on_throttle(model_id, self.api_token, retry_after)
+            else:
+                self.rate_limiter.on_success(model_id, self.api_token)
+                return prediction
+            finally:
+                throttle_headers.reset(headers_token)
+    
+    async def _resolve_version(self, model_info: Dict[str, Any]) -> str:
+        """Resolve a pinned catalog version, calling the API only on a cache miss"""
+        cached = self.version_cache.get(model_info["id"], model_info["version"])
+        if cached:
+            return cached
+        
+        with tracer.span("version.resolve", kind=SPAN_KIND_CLIENT, model=model_info["id"]):
+            model = await self.client.models.async_get(model_info["id"])
+            version = await model.versions.async_get(model_info["version"])
+        self.version_cache.put(model_info["id"], model_info["version"], version.id)
+        self.schemas.put(model_info["id"], version.id, version.openapi_schema)
+        return version.id
+    
+    async def _input_validator(self, model_info: Dict[str, Any]) -> Optional[InputValidator]:
+        """Validator for the version a prediction will run, fetching its schema once
+        
+        Models without a schema, and failed lookups for a short while, are
+        remembered so they do not cost a round-trip on every call.
+        """
+        model_id = model_info["id"]
+        pinned = model_info.get("version")
+        if self.schemas.missing(model_id, pinned):
+            return None
+        try:
+            if "version" in model_info:
+                version_id = await self._resolve_version(model_info)
+            else:
+                version_id = self.version_cache.get(model_id, "latest")
+            if version_id and version_id in self.schemas:
+                return self.schemas.validator(model_id, version_id)
+            
+            with tracer.span("schema.fetch", kind=SPAN_KIND_CLIENT, model=model_id):
+                model = await self.client.models.async_get(model_id)
+                if version_id:
+                    version = await model.versions.async_get(version_id)
+                else:
+                    version = model.latest_version
+            if version is None:
+                self.schemas.mark_missing(model_id, pinned, self.version_cache.ttl)
+                return None
+            if not version_id:
+                self.version_cache.put(model_id, "latest", version.id)
+            return self.schemas.put(model_id, version.id, version.openapi_schema)
+        except Exception as e:
+            # Without a schema the API remains the judge of the input
+            logger.warning(f"Could not load input schema for {model_id}: {e}")
+            self.schemas.mark_missing(model_id, pinned, self.schema_retry_interval)
+            return None
+    
+    async def _watch_prediction(
+        self,
+        record,
+        hedge: bool = False,
+        release_slot: bool = False,
+        reservation: Optional[str] = None,
+        webhooks: Optional["WebhookReceiver"] = None
+    ) -> Any:
+        """Wait for a prediction without blocking the event loop and return its output
+        
+        Predictions created by tool calls are hedged when enabled; the output
+        is then that of whichever prediction succeeded first.
+        """
+        started = time.monotonic()
+        winner = record
+        try:
+            if self.hedging.enabled and hedge:
+                winner = await self._await_hedged(record, webhooks)
+            else:
+                await self._await_completion(record, webhooks)
+        finally:
+            if release_slot:
+                self._prediction_slots.release()
+            # Settle before anyone awaiting the output resumes
+            if reservation:
+                await self._settle_reservation(reservation, record)
+        
+        self.metrics.run_seconds.labels(
+            str(record.tool), self._model_label(winner.model_id), winner.prediction.status
+        ).observe(time.monotonic() - started)
+        if winner.prediction.status != "succeeded":
+            from replicate.exceptions import ModelError
+            raise ModelError(winner.prediction)
+        
+        if winner is record:
+            self.runtimes.observe(record.model_id, time.monotonic() - started)
+        return winner.prediction.output
+    
+    async def _await_completion(self, record, webhooks: Optional["WebhookReceiver"] = None):
+        """Wait until a prediction finishes and learn how long it queued"""
+        if webhooks is not None:
+            await self._await_webhook(record, webhooks)
+        else:
+            await self._poll_prediction(record)
+        
+        queued = queue_seconds(record.prediction)
+        if queued is not None:
+            self.hedging.queue_stats.observe(record.model_id, queued)
+    
+    async def _await_hedged(self, record, webhooks: Optional["WebhookReceiver"] = None):
+        """Wait for a prediction, racing a backup if it queues past its model's threshold
+        
+        Returns the record that succeeded first, or the primary's when neither
+        did. The other prediction is canceled; the backup's reservation is
+        spent if it won or had started running, and refunded otherwise.
+        """
+        primary = asyncio.ensure_future(self._await_completion(record, webhooks))
+        backup = backup_reservation = None
+        try:
+            delay = self.hedging.delay(record.model_id)
+            if delay is not None:
+                await asyncio.wait([primary], timeout=delay)
+            if delay is None or primary.done():
+                await primary
+                return record
+            
+            # Webhook waits do not refresh the status, so look before hedging
+            with tracer.span("prediction.poll", kind=SPAN_KIND_CLIENT, prediction_id=record.id):
+                await record.prediction.async_reload()
+            if record.prediction.status != "starting" or self.hedging.in_flight >= self.hedging.max_in_flight:
+                await primary
+                return record
+            
+            started = await self._start_backup(record, delay, webhooks)
+            if started is None:
+                await primary
+                return record
+            backup, backup_reservation = started
+            
+            # First success wins; a failure leaves the race to the other one
+            winner = None
+            pending = {primary, backup.task}
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for candidate, task in ((record, primary), (backup, backup.task)):
+                    if task not in done or task.cancelled() or task.exception():
+                        continue
+                    if candidate.prediction.status == "succeeded":
+                        winner = winner or candidate
+                if primary in done and record.prediction.status == "canceled" and winner is None:
+                    # Canceled by the client: stop the backup too
+                    break
+            
+            record.hedge["winner"] = "primary" if winner is record else ("backup" if winner is backup else None)
+            self.metrics.hedges.labels(
+                str(record.tool), self._model_label(record.model_id), record.hedge["winner"] or "none"
+            ).inc()
+            if winner is backup:
+                self.hedging.backup_wins += 1
+            if winner is None:
+                if primary.done() and not primary.cancelled():
+                    primary.result()
+                return record
+            (backup if winner is record else record).superseded = True
+            return winner
+        finally:
+            # A canceled loser's wait ends on its own once it sees the status
+            if record.superseded:
+                await self._cancel_running(record)
+            elif not primary.done():
+                primary.cancel()
+            if backup is not None:
+                # The backup never outlives the call that started it
+                await self._cancel_running(backup)
+                self.hedging.in_flight -= 1
+                await self._settle_reservation(backup_reservation, backup)
+                if _billed(backup.prediction):
+                    record.hedge["cost"] = backup.cost
+    
+    async def _start_backup(self, record, delay: float, webhooks: Optional["WebhookReceiver"] = None):
+        """Create a backup of a queued prediction
+        
+        Returns its record and budget reservation, or None when there is no
+        budget for it or the API refuses it.
+        """
+        primary_info = self._get_model_info(record.model_id) or {
+            "id": record.model_id, "name": record.model_name, "cost_per_run": record.cost
+        }
+        model_info = self.hedging.backup_model(self.catalog.current.index, self.runtimes, str(record.tool), primary_info)
+        input_params = dict(record.prediction.input or {})
+        if model_info is not primary_info and self.validate_inputs:
+            validator = await self._input_validator(model_info)
+            try:
+                if validator is not None:
+                    input_params = validator.validate(input_params)
+            except InputValidationError as e:
+                logger.info(f"Hedging {record.id} on {record.model_id} instead: {e}")
+                model_info, input_params = primary_info, dict(record.prediction.input or {})
+        
+        cost = model_info.get("cost_per_run", 0.0)
+        try:
+            reservation = await self.budget.areserve(cost, f"{record.tool}:hedge:{model_info['id']}")
+        except BudgetExceededError:
+            self.hedging.skipped += 1
+            logger.info(f"Not hedging {record.id}: no budget for a backup")
+            return None
+        self.metrics.reservations.labels(str(record.tool)).inc()
+        self.metrics.reserved_dollars.labels(str(record.tool)).inc(cost)
+        
+        try:
+            with tracer.span("prediction.hedge", kind=SPAN_KIND_CLIENT, model=model_info["id"], primary=record.id) as span:
+                prediction = await self._post_prediction(model_info, input_params, webhooks)
+                span.set_attribute("prediction_id", prediction.id)
+        except Exception as e:
+            await self.budget.arefund(reservation)
+            self.hedging.skipped += 1
+            logger.warning(f"Could not hedge {record.id}: {e}")
+            return None
+        
+        logger.info(f"Prediction {record.id} queued over {delay:.1f}s, hedged with {prediction.id} on {model_info['id']}")
+        self.hedging.hedged += 1
+        self.hedging.in_flight += 1
+        backup = self.active_predictions.track(prediction, record.tool, model_info)
+        backup.task = asyncio.ensure_future(self._await_completion(backup, webhooks))
+        backup.task.add_done_callback(_consume_exception)
+        record.hedge = {
+            "prediction_id": backup.id,
+            "model": backup.model_name,
+            "model_id": backup.model_id,
+            "after_seconds": round(delay, 3),
+            "winner": None,
+            "cost": 0.0
+        }
+        return backup, reservation
+    
+    async def _cancel_running(self, record):
+        """Cancel a prediction unless it already finished"""
+        if record.done:
+            return
+        try:
+            await record.prediction.async_cancel()
+        except Exception as e:
+            logger.warning(f"Could not cancel {record.id}: {e}")
+    
+    async def _attach_artifacts(self, result: Dict[str, Any]):
+        """Save output files locally and list them next to the URLs"""
+        targets = [target for target in result.get("results", [result]) if target.get("output") is not None]
+        downloads = await asyncio.gather(*(self.artifacts.fetch_all(target["output"]) for target in targets))
+        for target, artifacts in zip(targets, downloads):
+            target["artifacts"] = artifacts
+    
+    async def _await_output(self, record) -> Any:
+        """Wait for a prediction's output, reporting its progress to the client"""
+        reporter = current_reporter.get()
+        if reporter is None:
+            return await record.task
+        
+        while not record.task.done():
+            await reporter.prediction(self._progress_record(record).prediction)
+            await asyncio.wait([record.task], timeout=self.progress_interval)
+            current = self._progress_record(record)
+            if current.pushed and not current.done and not record.task.done():
+                # The webhook only announces completion; fetch the progress in between
+                await self._refresh_progress(current)
+        await reporter.prediction(self._progress_record(record).prediction)
+        return record.task.result()
+    
+    def _progress_record(self, record):
+        """The prediction to report on: a hedge's backup once it won or got ahead"""
+        backup = self.active_predictions.get(record.hedge["prediction_id"]) if record.hedge else None
+        if backup is None:
+            return record
+        if record.hedge["winner"] == "backup":
+            return backup
+        if record.hedge["winner"] is None and record.status == "starting" and backup.status != "starting":
+            return backup
+        return record
+    
+    async def _refresh_progress(self, record):
+        """Update a webhook-driven prediction's logs and running status
+        
+        Only the webhook may finish it, since it carries the output, so a
+        terminal status fetched here is not applied.
+        """
+        try:
+            with tracer.span("prediction.poll", kind=SPAN_KIND_CLIENT, prediction_id=record.id):
+                fresh = await self.client.predictions.async_get(record.id)
+        except Exception as e:
+            logger.debug(f"Could not refresh progress of {record.id}: {e}")
+            return
+        if record.done:
+            return
+        record.prediction.logs = fresh.logs
+        if fresh.status not in TERMINAL_STATUSES:
+            record.prediction.status = fresh.status
+            record.prediction.started_at = fresh.started_at
+    
+    async def _poll_prediction(self, record):
+        """Reload a prediction until it finishes, like Prediction.async_wait but traced"""
+        while record.prediction.status not in TERMINAL_STATUSES:
+            await asyncio.sleep(self.client.poll_interval)
+            with tracer.span("prediction.poll", kind=SPAN_KIND_CLIENT, prediction_id=record.id) as span:
+                await record.prediction.async_reload()
+                span.set_attribute("status", record.prediction.status)
+    
+    async def _await_webhook(self, record, webhooks: "WebhookReceiver"):
+        """Wait for the completion webhook, polling now and then in case it is lost"""
+        waiter = webhooks.expect(record.id)
+        record.pushed = True
+        try:
+            while record.prediction.status not in TERMINAL_STATUSES:
+                try:
+                    with tracer.span("prediction.webhook_wait", prediction_id=record.id):
+                        payload = await asyncio.wait_for(asyncio.shield(waiter), self.webhook_fallback)
+                except asyncio.TimeoutError:
+                    logger.debug(f"No webhook for {record.id} yet, polling")
+                    with tracer.span("prediction.poll", kind=SPAN_KIND_CLIENT, prediction_id=record.id):
+                        await record.prediction.async_reload()
+                else:
+                    for name, value in payload.items():
+                        if hasattr(record.prediction, name):
+                            setattr(record.prediction, name, value)
+        finally:
+            webhooks.discard(record.id)
+    
+    async def _find_prediction(self, prediction_id: str):
+        """Get a tracked prediction, adopting ones created outside this process"""
+        record = self.active_predictions.get(prediction_id)
+        if record:
+            return record
+        
+        prediction = await self.client.predictions.async_get(prediction_id)
+        model_id = prediction.model or prediction_id
+        model_info = self._get_model_info(model_id) or {"id": model_id, "name": model_id, "cost_per_run": 0.0}
+        
+        record = self.active_predictions.track(prediction, None, model_info)
+        record.task = asyncio.ensure_future(self._watch_prediction(record))
+        record.task.add_done_callback(_consume_exception)
+        return record
+    
+    def _result_cache_key(self, model_info: Dict[str, Any], input_params: Dict[str, Any]) -> Optional[str]:
+        """Cache key for a prediction, or None when result caching is off"""
+        if not self.result_cache:
+            return None
+        return prediction_key(model_info["id"], model_info.get("version"), input_params)
+    
+    async def _settle_reservation(self, reservation: str, record):
+        """Spend the reservation once the prediction ran, refund it if it never started
+        
+        Replicate bills the compute of failed and canceled predictions too.
+        """
+        if _billed(record.prediction):
+            await self.budget.acommit(reservation)
+        else:
+            await self.budget.arefund(reservation)
+    
+    def _cached_output(self, tool: str, cache_key: Optional[str]) -> Any:
+        """Earlier output stored under a cache key, counting hits and misses"""
+        if not cache_key:
+            return None
+        cached = self.result_cache.get(cache_key)
+        self.metrics.cache_requests.labels(tool, "miss" if cached is None else "hit").inc()
+        return cached
+    
+    def _store_result(self, cache_key: str, task: "asyncio.Future[Any]", record):
+        """Cache the output of a successful prediction
+        
+        An output won by a backup on another model is not the keyed model's,
+        so it is not cached.
+        """
+        hedge = record.hedge
+        if hedge is not None and hedge["winner"] == "backup" and hedge["model_id"] != record.model_id:
+            return
+        if not task.cancelled() and task.exception() is None:
+            self.result_cache.put(cache_key, task.result())
+    
+    def _cached_response(self, model_info: Dict[str, Any], output: Any) -> Dict[str, Any]:
+        """Response for a result served from the cache, which costs nothing"""
+        return {
+            "status": "success",
+            "model": model_info["name"],
+            "output": output,
+            "cost": 0.0,
+            "cached": True,
+            "budget_remaining": self.budget.remaining
+        }
+    
+    async def _completed_response(self, model_info: Dict[str, Any], record, cost: float) -> Dict[str, Any]:
+        """Response once a prediction's output is in, naming the backup when it won"""
+        output = await self._await_output(record)
+        response = {
+            "status": "success",
+            "model": model_info["name"],
+            "output": output,
+            "cost": _hedged_cost(record, cost) if cost else cost,
+            "budget_remaining": self.budget.remaining
+        }
+        if record.hedge is not None:
+            if record.hedge["winner"] == "backup":
+                response["model"] = record.hedge["model"]
+            response["hedge"] = record.hedge
+        return response
+    
+    def _submitted_response(self, record, cost: float) -> Dict[str, Any]:
+        """Response for a prediction submitted without waiting"""
+        return {
+            "status": "submitted",
+            "prediction_id": record.id,
+            "model": record.model_name,
+            "cost": cost,
+            "budget_remaining": self.budget.remaining
+        }
+    
+    async def _get_prediction(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Get prediction status"""
+        record = await self._find_prediction(params["prediction_id"])
+        return record.to_dict()
+    
+    async def _wait_prediction(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Wait for a prediction to finish, up to a timeout"""
+        record = await self._find_prediction(params["prediction_id"])
+        timeout = params.get("timeout", 60)
+        
+        from replicate.exceptions import ModelError
+        
+        try:
+            await asyncio.wait_for(asyncio.shield(record.task), timeout)
+        except asyncio.TimeoutError:
+            return {**record.to_dict(), "timed_out": True}
+        except ModelError:
+            pass
+        
+        return record.to_dict()
+    
+    async def _cancel_prediction(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Cancel a prediction"""
+        record = await self._find_prediction(params["prediction_id"])
+        
+        if not record.done:
+            await record.prediction.async_cancel()
+        
+        return record.to_dict()
+    
+    def _resolve_model(
+        self,
+        tool: str,
+        model_id: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Model info for a tool call, falling back to the tool's default model
+        
+        ``model_id="auto"`` routes on the objective, max_cost, deadline and
+        capabilities in ``params``.
+        """
+        with tracer.span("catalog.lookup", tool=tool, model=model_id) as span:
+            if model_id == "auto":
+                params = params or {}
+                model_info = route(
+                    self.catalog.current.index,
+                    self.runtimes,
+                    tool,
+                    objective=params.get("objective", "cost"),
+                    # Never pick a model the remaining budget cannot pay for
+                    max_cost=min(params.get("max_cost", math.inf), self.budget.remaining),
+                    deadline=params.get("deadline"),
+                    capabilities=params.get("capabilities")
+                )
+                logger.info(f"Routed {tool} to {model_info['id']} ({params.get('objective', 'cost')})")
+                span.set_attribute("resolved_model", model_info["id"])
+                return model_info
+            
+            default_id, default_name, default_cost = DEFAULT_MODELS[tool]
+            model_id = model_id or default_id
+            
+            model_info = self._get_model_info(model_id)
+            if not model_info:
+                model_info = {
+                    "id": model_id,
+                    "name": default_name if model_id == default_id else model_id,
+                    "cost_per_run": default_cost
+                }
+            return model_info
+    
     def _get_model_info(self, model_id: str) -> Optional[Dict[str, Any]]:
         """Get model info from catalog"""
-        for category in COMPLETE_MODEL_CATALOG.values():
-            for model_key, info in category.items():
-                if info["id"] == model_id or model_key == model_id:
-                    return info
-        return None
+        return self.catalog.current.index.get(model_id)
     
-    def _check_budget_limit(self, cost: float) -> bool:
-        """Check if operation is within budget"""
-        return (self.budget_spent + cost) <= self.budget_limit
+    def _model_label(self, model_id: str) -> str:
+        """Metric label for a model; ids outside the catalog share "other" to bound the series"""
+        model_info = self._get_model_info(model_id)
+        return model_info["id"] if model_info else "other"
+    
+    async def _start_webhooks(self):
+        """Start the webhook receiver if configured; predictions are polled otherwise"""
+        public_url = os.environ.get("REPLICATE_WEBHOOK_URL")
+        if not public_url:
+            return
+        if self.cassette is not None:
+            # Completions must arrive as (recorded) polls
+            logger.info("Webhooks are not used while recording or replaying a cassette")
+            return
+        
+        from .webhooks import WebhookReceiver
+        
+        try:
+            secret = os.environ.get("REPLICATE_WEBHOOK_SECRET")
+            if not secret:
+                secret = (await self.client.webhooks.default.async_secret()).key
+            receiver = WebhookReceiver(
+                public_url,
+                secret=secret,
+                host=os.environ.get("REPLICATE_WEBHOOK_HOST", "0.0.0.0"),
+                port=int(os.environ.get("REPLICATE_WEBHOOK_PORT", "8787"))
+            )
+            await receiver.start()
+        except Exception as e:
+            logger.warning(f"Webhook receiver disabled, polling predictions instead: {e}")
+            return
+        self.webhooks = receiver
+    
+    async def _start_metrics_endpoint(self):
+        """Serve /metrics if REPLICATE_METRICS_PORT is set"""
+        port = os.environ.get("REPLICATE_METRICS_PORT")
+        if not port:
+            return
+        
+        endpoint = MetricsEndpoint(
+            self.metrics,
+            host=os.environ.get("REPLICATE_METRICS_HOST", "127.0.0.1"),
+            port=int(port)
+        )
+        try:
+            await endpoint.start()
+        except Exception as e:
+            logger.warning(f"Metrics endpoint disabled: {e}")
+            return
+        self.metrics_endpoint = endpoint
     
     async def run(self):
         """Run the server"""
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(read_stream, write_stream)
+        from mcp.server.stdio import stdio_server
+        
+        await self._start_webhooks()
+        await self._start_metrics_endpoint()
+        catalog_watch = asyncio.ensure_future(self.catalog.watch()) if self.catalog.interval > 0 else None
+        trace_export = asyncio.ensure_future(tracer.run(self.trace_export_interval)) if tracer.enabled else None
+        loop_lag = None
+        if self.loop_lag_interval > 0:
+            loop_lag = asyncio.ensure_future(monitor_loop_lag(self.metrics.loop_lag, self.loop_lag_interval))
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await self.server.run(read_stream, write_stream, self.server.create_initialization_options())
+        finally:
+            if catalog_watch is not None:
+                catalog_watch.cancel()
+            if loop_lag is not None:
+                loop_lag.cancel()
+            if trace_export is not None:
+                # Cancelling flushes the last spans; wait for it before closing the pool
+                trace_export.cancel()
+                await asyncio.gather(trace_export, return_exceptions=True)
+            if self.webhooks is not None:
+                await self.webhooks.stop()
+            if self.metrics_endpoint is not None:
+                await self.metrics_endpoint.stop()
+            await self.http.aclose()
+
+
+def _dumps(result: Any) -> str:
+    """Compact JSON for tool responses"""
+    return json.dumps(result, separators=(",", ":"))
+
+
+def _check_workflows(catalog: Catalog):
+    """Reject a catalog whose workflow templates pass arguments their tools would drop"""
+    for name, workflow in catalog.workflows.items():
+        try:
+            check_template(workflow, TOOL_MODEL_INPUTS)
+        except WorkflowError as e:
+            raise CatalogError(f"Workflow {name}: {e}") from e
+
+
+def _billed(prediction: Any) -> bool:
+    """Whether a finished prediction is charged: it started running"""
+    return prediction.status == "succeeded" or bool(getattr(prediction, "started_at", None))
+
+
+def _hedged_cost(record, cost: float) -> float:
+    """A call's cost after hedging; a primary canceled before it started was refunded"""
+    if record.hedge is None:
+        return cost
+    if record.superseded and not _billed(record.prediction):
+        cost = 0.0
+    return cost + record.hedge["cost"]
+
+
+def _consume_exception(task: "asyncio.Future[Any]"):
+    """Mark a watcher's failure as retrieved when nobody awaits it"""
+    if not task.cancelled():
+        task.exception()
 
 
 async def serve():
@@ -632,12 +1886,6 @@ async def serve():
 if __name__ == "__main__":
     import sys
     
-    # Check for API token
-    if not os.environ.get("REPLICATE_API_TOKEN"):
-        print("Error: REPLICATE_API_TOKEN environment variable not set", file=sys.stderr)
-        print("Please set your Replicate API token:", file=sys.stderr)
-        print("export REPLICATE_API_TOKEN='your_token_here'", file=sys.stderr)
-        sys.exit(1)
+    from replicate_mcp.cli import main
     
-    # Run server
-    asyncio.run(serve())
\ No newline at end of file
+    sys.exit(main())
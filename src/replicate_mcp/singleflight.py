@@ -0,0 +1,44 @@
+"""Coalescing of identical concurrent operations"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """Let concurrent callers with the same key share one in-flight operation"""
+
+    def __init__(self):
+        self._calls: Dict[str, "asyncio.Future[Any]"] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run fn unless a call with this key is in flight; return (result, shared)"""
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_event_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._calls.pop(key, None)
+            if not isinstance(e, Exception):
+                # Only the owner was cancelled; joiners get an error their
+                # callers handle rather than a cancellation of their own
+                e = RuntimeError("shared request was cancelled")
+            future.set_exception(e)
+            # Waiters re-raise it; don't warn when there are none
+            future.exception()
+            raise
+
+        future.set_result(result)
+        return result, False
+
+    def forget(self, key: str):
+        """End a flight so later callers start a new operation"""
+        self._calls.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._calls)
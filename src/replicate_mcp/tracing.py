@@ -0,0 +1,197 @@
+"""Lightweight tracing spans exported as OTLP/JSON
+
+Spans nest through a context variable, so a span opened in a tool call is
+the parent of spans opened by anything it awaits, including tasks started
+inside it. Finished spans are batched and written, in the OpenTelemetry
+protocol's JSON encoding, to a file (one export request per line) or
+POSTed to a collector's OTLP/HTTP traces endpoint. Until ``configure`` is
+called, spans cost one attribute check.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import __version__
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+
+class Span:
+    """One timed operation; ids are hex strings as OTLP/JSON expects"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "kind", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"], kind: int, attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes)
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error is not None:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return span
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is off"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Create spans and export them in batches once configured"""
+
+    def __init__(self, service_name: str = "replicate-mcp", max_queue: int = 4096):
+        self.service_name = service_name
+        self.max_queue = max_queue
+        self.enabled = False
+        self.exported = 0
+        self.dropped = 0
+        self._file: Optional[Path] = None
+        self._endpoint: Optional[str] = None
+        self._client = None
+        self._finished: List[Span] = []
+
+    def configure(self, file: Optional[Path] = None, endpoint: Optional[str] = None, client=None):
+        """Export to a JSON-lines file and/or an OTLP/HTTP endpoint through ``client``"""
+        self._file = file
+        self._endpoint = endpoint
+        self._client = client
+        self.enabled = bool(file or endpoint)
+
+    @contextmanager
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, root: bool = False, **attributes: Any) -> Iterator[Any]:
+        """Time the enclosed block as a child of the current span (or a new trace if ``root``)"""
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        span = Span(name, None if root else current_span.get(), kind, attributes)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            raise
+        finally:
+            current_span.reset(token)
+            span.end_ns = time.time_ns()
+            self._finished.append(span)
+            if len(self._finished) > self.max_queue:
+                # Keep the newest spans when the exporter falls behind
+                overflow = len(self._finished) - self.max_queue
+                del self._finished[:overflow]
+                self.dropped += overflow
+
+    async def run(self, interval: float = 5.0):
+        """Export finished spans every ``interval`` seconds until cancelled"""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await self.flush()
+        finally:
+            await self.flush()
+
+    async def flush(self):
+        """Export the spans finished so far"""
+        if not self._finished:
+            return
+        spans, self._finished = self._finished, []
+        payload = self._export_request(spans)
+
+        try:
+            if self._file:
+                await asyncio.get_event_loop().run_in_executor(None, self._append, payload)
+            if self._endpoint and self._client is not None:
+                response = await self._client.post(self._endpoint, json=payload)
+                response.raise_for_status()
+        except Exception as e:
+            self.dropped += len(spans)
+            logger.warning(f"Could not export {len(spans)} spans: {e}")
+            return
+        self.exported += len(spans)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "file": str(self._file) if self._file else None,
+            "endpoint": self._endpoint,
+            "pending": len(self._finished),
+            "exported": self.exported,
+            "dropped": self.dropped
+        }
+
+    def _export_request(self, spans: List[Span]) -> Dict[str, Any]:
+        """An OTLP ExportTraceServiceRequest in its JSON encoding"""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "replicate_mcp", "version": __version__},
+                    "spans": [span.to_otlp() for span in spans]
+                }]
+            }]
+        }
+
+    def _append(self, payload: Dict[str, Any]):
+        with open(self._file, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(payload, separators=(",", ":")) + "\n")
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    encoded = []
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            encoded_value = {"boolValue": value}
+        elif isinstance(value, int):
+            encoded_value = {"intValue": str(value)}
+        elif isinstance(value, float):
+            encoded_value = {"doubleValue": value}
+        else:
+            encoded_value = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": encoded_value})
+    return encoded
+
+
+# Shared by every module; the server configures it from the environment
+tracer = Tracer()
@@ -0,0 +1,21 @@
+"""Shared helpers for on-disk state"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+
+def cache_dir() -> Path:
+    """Directory for persisted caches, created on first use"""
+    path = Path(os.environ.get("REPLICATE_MCP_CACHE_DIR", Path.home() / ".cache" / "replicate-mcp")).expanduser()
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def atomic_write_json(path: Path, data: Any):
+    """Write JSON so readers never observe a partially written file"""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, separators=(",", ":"))
+    os.replace(tmp_path, path)
@@ -0,0 +1,245 @@
+"""Check prediction inputs locally against a model version's OpenAPI schema"""
+
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .utils import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# A compiled check turns a value into its coerced form or raises ValueError
+Check = Callable[[Any], Any]
+
+
+class InputValidationError(ValueError):
+    """The input does not match the model's schema"""
+
+    def __init__(self, model_id: str, problems: List[str]):
+        self.model_id = model_id
+        self.problems = problems
+        super().__init__(f"Invalid input for {model_id}: {'; '.join(problems)}")
+
+
+def input_schema(openapi_schema: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """The Input object schema of a version's OpenAPI document, if it has one"""
+    try:
+        return openapi_schema["components"]["schemas"]["Input"]
+    except (KeyError, TypeError):
+        return None
+
+
+def _resolve(schema: Dict[str, Any], components: Dict[str, Any]) -> Dict[str, Any]:
+    """Inline $ref and allOf, which Replicate uses for enum inputs"""
+    if "$ref" in schema:
+        schema = {**components.get(schema["$ref"].rsplit("/", 1)[-1], {}), **{
+            key: value for key, value in schema.items() if key != "$ref"
+        }}
+    for part in schema.get("allOf", []):
+        schema = {**_resolve(part, components), **{key: value for key, value in schema.items() if key != "allOf"}}
+    return schema
+
+
+def _to_integer(value: Any) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        return int(value)
+    raise ValueError("must be an integer")
+
+
+def _to_number(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    raise ValueError("must be a number")
+
+
+def _to_boolean(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    raise ValueError("must be a boolean")
+
+
+def _to_string(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    raise ValueError("must be a string")
+
+
+def _to_array(value: Any) -> list:
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    raise ValueError("must be an array")
+
+
+def _is_multiple(value: float, multiple_of: float) -> bool:
+    # value % multiple_of misfires on floats: 0.3 % 0.1 is 0.09999999999999998
+    if isinstance(value, int) and isinstance(multiple_of, int):
+        return value % multiple_of == 0
+    quotient = value / multiple_of
+    return abs(quotient - round(quotient)) <= 1e-9 * max(1.0, abs(quotient))
+
+
+_COERCIONS: Dict[str, Check] = {
+    "integer": _to_integer,
+    "number": _to_number,
+    "boolean": _to_boolean,
+    "string": _to_string,
+    "array": _to_array
+}
+
+
+def _compile_property(schema: Dict[str, Any]) -> Check:
+    """Build one closure doing every check a property needs"""
+    coerce = _COERCIONS.get(schema.get("type", ""))
+    enum = schema.get("enum")
+    minimum = schema.get("minimum")
+    maximum = schema.get("maximum")
+    multiple_of = schema.get("multipleOf")
+
+    def check(value: Any) -> Any:
+        if coerce is not None:
+            value = coerce(value)
+        if enum is not None and value not in enum:
+            raise ValueError(f"must be one of {', '.join(map(str, enum))}")
+        if minimum is not None and value < minimum:
+            raise ValueError(f"must be at least {minimum}")
+        if maximum is not None and value > maximum:
+            raise ValueError(f"must be at most {maximum}")
+        if multiple_of and not _is_multiple(value, multiple_of):
+            raise ValueError(f"must be a multiple of {multiple_of}")
+        return value
+
+    return check
+
+
+class InputValidator:
+    """Validator compiled once from a version's OpenAPI schema"""
+
+    def __init__(self, model_id: str, openapi_schema: Dict[str, Any]):
+        self.model_id = model_id
+        components = openapi_schema.get("components", {}).get("schemas", {})
+        schema = input_schema(openapi_schema) or {}
+        self.required = list(schema.get("required", []))
+        self.properties: Dict[str, Check] = {
+            name: _compile_property(_resolve(property_schema, components))
+            for name, property_schema in schema.get("properties", {}).items()
+        }
+
+    def validate(self, input_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the input with values coerced to their schema types
+
+        Raises InputValidationError listing every problem found.
+        """
+        problems: List[str] = []
+        coerced: Dict[str, Any] = {}
+
+        for name, value in input_params.items():
+            check = self.properties.get(name)
+            if check is None:
+                problems.append(f"{name} is not accepted by this model")
+                continue
+            try:
+                coerced[name] = check(value)
+            except ValueError as e:
+                problems.append(f"{name} {e}")
+
+        for name in self.required:
+            if name not in input_params:
+                problems.append(f"{name} is required")
+
+        if problems:
+            raise InputValidationError(self.model_id, problems)
+        return coerced
+
+
+class SchemaStore:
+    """OpenAPI schemas persisted per version id; versions never change"""
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = directory
+        self._validators: Dict[str, Optional[InputValidator]] = {}
+        # Models (and pinned versions) whose schema could not be had, until when
+        self._missing: Dict[str, float] = {}
+
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def validator(self, model_id: str, version_id: str) -> Optional[InputValidator]:
+        """Compiled validator for a stored version
+
+        None if the version is not stored or has no input schema; check
+        ``version_id in store`` to tell the two apart.
+        """
+        if version_id not in self._validators:
+            schema = self._read(version_id)
+            if schema is None:
+                return None
+            self._validators[version_id] = self._compile(model_id, schema)
+        return self._validators[version_id]
+
+    def put(self, model_id: str, version_id: str, openapi_schema: Optional[Dict[str, Any]]) -> Optional[InputValidator]:
+        """Store a version's schema and return its validator"""
+        schema = openapi_schema or {}
+        self._write(version_id, schema)
+        self._validators[version_id] = self._compile(model_id, schema)
+        return self._validators[version_id]
+
+    def mark_missing(self, model_id: str, version: Optional[str], ttl: float):
+        """Remember for ``ttl`` seconds that a model's schema is unavailable"""
+        self._missing[f"{model_id}:{version or 'latest'}"] = time.monotonic() + ttl
+
+    def missing(self, model_id: str, version: Optional[str]) -> bool:
+        """Whether a lookup for this model failed or found no schema recently"""
+        key = f"{model_id}:{version or 'latest'}"
+        expires = self._missing.get(key)
+        if expires is None:
+            return False
+        if expires <= time.monotonic():
+            del self._missing[key]
+            return False
+        return True
+
+    def __contains__(self, version_id: str) -> bool:
+        return version_id in self._validators or self._read(version_id) is not None
+
+    @staticmethod
+    def _compile(model_id: str, schema: Dict[str, Any]) -> Optional[InputValidator]:
+        # Versions without an input schema are not validated
+        return InputValidator(model_id, schema) if input_schema(schema) else None
+
+    def _path(self, version_id: str) -> Optional[Path]:
+        if not self.directory:
+            return None
+        return self.directory / f"{version_id}.json"
+
+    def _read(self, version_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(version_id)
+        if not path or not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring cached schema {path}: {e}")
+            return None
+
+    def _write(self, version_id: str, schema: Dict[str, Any]):
+        path = self._path(version_id)
+        if not path:
+            return
+        try:
+            atomic_write_json(path, schema)
+        except OSError as e:
+            logger.warning(f"Could not persist schema: {e}")
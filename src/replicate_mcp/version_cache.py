@@ -0,0 +1,64 @@
+"""Cache of resolved model versions"""
+
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from .utils import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+
+class VersionCache:
+    """Resolved version ids keyed by model and pinned version, with a TTL"""
+
+    def __init__(self, path: Optional[Path] = None, ttl: float = 86400.0):
+        self.path = path
+        self.ttl = ttl
+        self._entries: Dict[str, Dict[str, float]] = {}
+        self._load()
+
+    @staticmethod
+    def _key(model_id: str, version: str) -> str:
+        return f"{model_id}:{version}"
+
+    def get(self, model_id: str, version: str) -> Optional[str]:
+        """Return the resolved version id if it is cached and fresh"""
+        entry = self._entries.get(self._key(model_id, version))
+        if not entry:
+            return None
+        if time.time() - entry["resolved_at"] > self.ttl:
+            del self._entries[self._key(model_id, version)]
+            return None
+        return entry["version"]
+
+    def put(self, model_id: str, version: str, resolved: str):
+        """Remember a resolved version and persist the cache"""
+        self._entries[self._key(model_id, version)] = {
+            "version": resolved,
+            "resolved_at": time.time()
+        }
+        self._save()
+
+    def _load(self):
+        """Load persisted entries, ignoring a missing or corrupt file"""
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                self._entries = json.load(fh)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring version cache {self.path}: {e}")
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            atomic_write_json(self.path, self._entries)
+        except OSError as e:
+            logger.warning(f"Could not persist version cache: {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
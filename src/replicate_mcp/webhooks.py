@@ -0,0 +1,160 @@
+"""Embedded receiver for Replicate prediction webhooks"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+from aiohttp import web
+
+from .predictions import TERMINAL_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Completion events kept for predictions nobody is waiting on yet
+MAX_EARLY_EVENTS = 1000
+
+
+def _secret_key(secret: str) -> bytes:
+    """HMAC key from a signing secret of the form whsec_<base64>"""
+    if secret.startswith("whsec_"):
+        return base64.b64decode(secret[len("whsec_"):])
+    return secret.encode("utf-8")
+
+
+def sign_webhook(secret: str, webhook_id: str, timestamp: str, body: bytes) -> str:
+    """webhook-signature header value for a body, as Replicate computes it"""
+    signed_content = f"{webhook_id}.{timestamp}.".encode("utf-8") + body
+    digest = hmac.new(_secret_key(secret), signed_content, hashlib.sha256).digest()
+    return "v1," + base64.b64encode(digest).decode("ascii")
+
+
+def verify_signature(secret: str, headers: Mapping[str, str], body: bytes, tolerance: float = 300) -> bool:
+    """Check the webhook-id/-timestamp/-signature headers of a delivery"""
+    webhook_id = headers.get("webhook-id")
+    timestamp = headers.get("webhook-timestamp")
+    signatures = headers.get("webhook-signature")
+    if not webhook_id or not timestamp or not signatures:
+        return False
+
+    try:
+        if abs(time.time() - int(timestamp)) > tolerance:
+            return False
+    except ValueError:
+        return False
+
+    expected = sign_webhook(secret, webhook_id, timestamp, body)
+    # The header may carry several space-separated signatures during key rotation
+    return any(hmac.compare_digest(expected, signature) for signature in signatures.split())
+
+
+class WebhookReceiver:
+    """HTTP listener that resolves waiters when Replicate posts completion events
+
+    Predictions are created with ``url`` as their webhook. Whoever waits on a
+    prediction calls ``expect`` and awaits the returned future, which resolves
+    with the prediction payload once a signed terminal event arrives.
+    """
+
+    def __init__(
+        self,
+        public_url: str,
+        secret: Optional[str] = None,
+        host: str = "0.0.0.0",
+        port: int = 8787,
+        path: str = "/webhooks/replicate",
+        tolerance: float = 300
+    ):
+        self.public_url = public_url.rstrip("/")
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self.path = path
+        self.tolerance = tolerance
+        self.received = 0
+        self.rejected = 0
+        self.resolved = 0
+        self._waiters: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+        self._early: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        """Webhook URL to register on predictions"""
+        return self.public_url + self.path
+
+    async def start(self):
+        """Start listening"""
+        app = web.Application()
+        app.router.add_post(self.path, self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logger.info(f"Listening for Replicate webhooks on {self.host}:{self.port}{self.path}")
+
+    async def stop(self):
+        """Stop listening and cancel anyone still waiting"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        for waiter in self._waiters.values():
+            waiter.cancel()
+        self._waiters.clear()
+
+    def expect(self, prediction_id: str) -> "asyncio.Future[Dict[str, Any]]":
+        """Future resolved with the prediction payload when it completes"""
+        waiter = self._waiters.get(prediction_id)
+        if waiter is None:
+            waiter = self._waiters[prediction_id] = asyncio.get_event_loop().create_future()
+            # The event may have beaten the waiter here
+            payload = self._early.pop(prediction_id, None)
+            if payload is not None:
+                waiter.set_result(payload)
+        return waiter
+
+    def discard(self, prediction_id: str):
+        """Stop waiting for a prediction"""
+        self._waiters.pop(prediction_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "received": self.received,
+            "rejected": self.rejected,
+            "resolved": self.resolved,
+            "waiting": len(self._waiters)
+        }
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        self.received += 1
+
+        if self.secret and not verify_signature(self.secret, request.headers, body, self.tolerance):
+            self.rejected += 1
+            logger.warning("Rejected webhook with an invalid signature")
+            return web.Response(status=401)
+
+        try:
+            payload = json.loads(body)
+            prediction_id = payload["id"]
+        except (ValueError, KeyError, TypeError):
+            self.rejected += 1
+            return web.Response(status=400)
+
+        if payload.get("status") in TERMINAL_STATUSES:
+            waiter = self._waiters.get(prediction_id)
+            if waiter is None:
+                self._early[prediction_id] = payload
+                while len(self._early) > MAX_EARLY_EVENTS:
+                    self._early.popitem(last=False)
+            elif not waiter.done():
+                waiter.set_result(payload)
+                self.resolved += 1
+
+        return web.Response(status=204)
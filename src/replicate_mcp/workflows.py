@@ -0,0 +1,160 @@
+"""DAG execution of workflow templates"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Collection, Dict, List, Mapping, Set
+
+from .tracing import tracer
+
+# Prefix of references to the caller's workflow inputs
+WORKFLOW_INPUT_PREFIX = "workflow."
+
+# Suffix of references to an earlier step's output
+STEP_OUTPUT_SUFFIX = ".output"
+
+
+class WorkflowError(ValueError):
+    """A workflow template or its inputs are invalid"""
+
+
+def step_dependencies(step: Dict[str, Any]) -> Set[str]:
+    """Names of the steps whose outputs a step consumes"""
+    return {
+        ref[:-len(STEP_OUTPUT_SUFFIX)]
+        for ref in step.get("inputs", {}).values()
+        if ref.endswith(STEP_OUTPUT_SUFFIX)
+    }
+
+
+def check_template(workflow: Dict[str, Any], tool_arguments: Mapping[str, Collection[str]]):
+    """Check a template as it loads: unique step names, known tools and arguments
+
+    ``tool_arguments`` lists the arguments each tool passes on to its model.
+    ``predict`` steps send theirs as they are, so only the model's schema can
+    judge them, once the workflow runs.
+    """
+    _check_step_names(workflow)
+    for step in workflow["steps"]:
+        tool = step.get("tool", "predict")
+        if tool == "predict":
+            continue
+        if tool not in tool_arguments:
+            raise WorkflowError(f"Step {step['step']} uses unknown tool {tool}")
+        unknown = sorted((set(step.get("params", {})) | set(step.get("inputs", {}))) - set(tool_arguments[tool]))
+        if unknown:
+            raise WorkflowError(f"Step {step['step']}: {tool} does not take {', '.join(unknown)}")
+
+
+def validate_workflow(workflow: Dict[str, Any], inputs: Dict[str, Any]):
+    """Check references and reject cycles before anything runs"""
+    _check_step_names(workflow)
+    steps = {step["step"]: step for step in workflow["steps"]}
+
+    for step in workflow["steps"]:
+        for ref in step.get("inputs", {}).values():
+            if ref.startswith(WORKFLOW_INPUT_PREFIX):
+                if ref[len(WORKFLOW_INPUT_PREFIX):] not in inputs:
+                    raise WorkflowError(f"Missing workflow input: {ref[len(WORKFLOW_INPUT_PREFIX):]}")
+            elif not ref.endswith(STEP_OUTPUT_SUFFIX):
+                raise WorkflowError(f"Invalid reference in step {step['step']}: {ref}")
+        for dependency in step_dependencies(step):
+            if dependency not in steps:
+                raise WorkflowError(f"Step {step['step']} depends on unknown step {dependency}")
+
+    # Kahn's algorithm: every step must become ready eventually
+    remaining = {name: step_dependencies(step) for name, step in steps.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps & remaining.keys()]
+        if not ready:
+            raise WorkflowError(f"Workflow has a dependency cycle between: {', '.join(sorted(remaining))}")
+        for name in ready:
+            del remaining[name]
+
+
+def _check_step_names(workflow: Dict[str, Any]):
+    """Step names key the results and references, so they must be unique"""
+    seen: Set[str] = set()
+    for step in workflow["steps"]:
+        if step["step"] in seen:
+            raise WorkflowError(f"Duplicate step name: {step['step']}")
+        seen.add(step["step"])
+
+
+def _first_output(output: Any) -> Any:
+    """Downstream steps take a single media input: the first of a list output"""
+    if isinstance(output, list):
+        return output[0] if output else None
+    return output
+
+
+class WorkflowEngine:
+    """Run workflow steps as soon as the steps they depend on have finished
+
+    A step consuming another's output gets one item: the first, when that
+    step produced several.
+    """
+
+    def __init__(self, run_step: Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Dict[str, Any]]]):
+        self.run_step = run_step
+
+    async def execute(self, workflow: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute every step, running independent branches concurrently"""
+        validate_workflow(workflow, inputs)
+
+        loop = asyncio.get_event_loop()
+        futures: Dict[str, "asyncio.Future[Any]"] = {
+            step["step"]: loop.create_future() for step in workflow["steps"]
+        }
+        results: Dict[str, Dict[str, Any]] = {}
+        started = time.monotonic()
+
+        async def run(step: Dict[str, Any]):
+            name = step["step"]
+            result = {"step": name, "model": step["model"], "tool": step.get("tool", "predict")}
+            results[name] = result
+
+            try:
+                # Wait for upstream steps; skip if any of them failed
+                for dependency in step_dependencies(step):
+                    if (await futures[dependency]) is None:
+                        result["status"] = "skipped"
+                        result["error"] = f"Dependency {dependency} did not complete"
+                        futures[name].set_result(None)
+                        return
+
+                params = dict(step.get("params", {}))
+                for param, ref in step.get("inputs", {}).items():
+                    if ref.startswith(WORKFLOW_INPUT_PREFIX):
+                        params[param] = inputs[ref[len(WORKFLOW_INPUT_PREFIX):]]
+                    else:
+                        params[param] = _first_output(futures[ref[:-len(STEP_OUTPUT_SUFFIX)]].result())
+
+                step_started = time.monotonic()
+                result["started_at"] = round(step_started - started, 3)
+                with tracer.span("workflow.step", step=name, tool=result["tool"], model=step["model"]):
+                    step_result = await self.run_step(step, params)
+                    result["duration"] = round(time.monotonic() - step_started, 3)
+
+                    if "error" in step_result:
+                        raise RuntimeError(step_result["error"])
+
+                result["status"] = "completed"
+                result["output"] = step_result.get("output")
+                result["cost"] = step_result.get("cost", 0)
+                futures[name].set_result(result["output"])
+            except Exception as e:
+                result["status"] = "failed"
+                result["error"] = str(e)
+                futures[name].set_result(None)
+
+        await asyncio.gather(*(run(step) for step in workflow["steps"]))
+
+        steps: List[Dict[str, Any]] = [results[step["step"]] for step in workflow["steps"]]
+        failed = [step for step in steps if step["status"] != "completed"]
+
+        return {
+            "status": "completed" if not failed else ("failed" if len(failed) == len(steps) else "partial"),
+            "steps": steps,
+            "total_cost": sum(step.get("cost", 0) for step in steps),
+            "elapsed": round(time.monotonic() - started, 3)
+        }
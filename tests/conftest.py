@@ -0,0 +1,22 @@
+"""Make the package and the fake API importable from a source checkout, and shared fixtures"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(ROOT / "src"))
+# benchmarks/fake_replicate.py stands in for the Replicate API
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """A server with its caches, ledger and stats in a temporary directory"""
+    monkeypatch.setenv("REPLICATE_API_TOKEN", "r8_test")
+    monkeypatch.setenv("REPLICATE_MCP_CACHE_DIR", str(tmp_path))
+    from replicate_mcp.server import ReplicateMediaServer
+
+    return ReplicateMediaServer()
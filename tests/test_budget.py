@@ -0,0 +1,54 @@
+"""Tests for the budget ledger"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from replicate_mcp.budget import BudgetExceededError, BudgetLedger
+
+
+def test_ledger_path_with_tilde(tmp_path, monkeypatch):
+    """A quoted "~/..." ledger path from the environment lands in the home directory"""
+    monkeypatch.setenv("HOME", str(tmp_path))
+
+    ledger = BudgetLedger(1.0, "~/.cache/replicate-mcp/budget.db")
+    ledger.commit(ledger.reserve(0.4))
+
+    assert (tmp_path / ".cache" / "replicate-mcp" / "budget.db").exists()
+    assert ledger.path == str(tmp_path / ".cache" / "replicate-mcp" / "budget.db")
+    with pytest.raises(BudgetExceededError):
+        ledger.reserve(0.7)
+
+
+def test_reserve_waits_for_lock_without_blocking(tmp_path):
+    """While another process holds the write lock, areserve yields to the event loop"""
+    path = tmp_path / "budget.db"
+    ledger = BudgetLedger(1.0, path)
+    other = sqlite3.connect(str(path), isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    async def main():
+        ticks = 0
+
+        async def release():
+            nonlocal ticks
+            while ticks < 5:
+                await asyncio.sleep(0.01)
+                ticks += 1
+            other.execute("COMMIT")
+
+        releasing = asyncio.ensure_future(release())
+        reservation = await ledger.areserve(0.4)
+        await releasing
+        return ticks, reservation
+
+    ticks, reservation = asyncio.run(main())
+    assert ticks == 5
+    assert ledger.reserved == pytest.approx(0.4)
+
+    ledger.busy_timeout = 0.05
+    other.execute("BEGIN IMMEDIATE")
+    with pytest.raises(sqlite3.OperationalError):
+        asyncio.run(ledger.acommit(reservation))
+    other.execute("ROLLBACK")
@@ -0,0 +1,81 @@
+"""Tests for recording and replaying API traffic"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from replicate_mcp.cassette import Cassette, CassetteMiss, CassetteTransport
+
+SMALL_FILE = b"\x89PNG" + b"\0" * 8
+LARGE_FILE = b"\x89PNG" + b"\0" * 64
+
+
+def api():
+    """Handler for a prediction that finishes on its second poll"""
+    statuses = ["processing", "succeeded"]
+
+    def handle(request):
+        path = request.url.path
+        if path == "/v1/predictions":
+            return httpx.Response(201, json={"id": "p1", "status": "starting"})
+        if path == "/v1/predictions/p1":
+            return httpx.Response(200, json={"id": "p1", "status": statuses.pop(0)})
+        content = SMALL_FILE if path == "/files/small.png" else LARGE_FILE
+        return httpx.Response(200, content=content, headers={"content-type": "image/png"})
+
+    return httpx.MockTransport(handle)
+
+
+def offline():
+    def handle(request):
+        raise AssertionError(f"replay went to the network for {request.url}")
+
+    return httpx.MockTransport(handle)
+
+
+def fetch(cassette, network, *requests):
+    """Send (method, path, json) requests through a cassette; returns the responses"""
+    async def run():
+        transport = CassetteTransport(network, cassette)
+        async with httpx.AsyncClient(transport=transport, base_url="https://api.replicate.com") as client:
+            return [await client.request(method, path, json=body) for method, path, body in requests]
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("name", ["run.jsonl", "run.jsonl.gz"])
+def test_replay_serves_recorded_exchanges_in_order(tmp_path, name):
+    path = tmp_path / name
+    poll = ("GET", "/v1/predictions/p1", None)
+    download = ("GET", "/files/small.png", None)
+    recording = Cassette(path, "record", max_body=32)
+    recorded = fetch(recording, api(), (
+        "POST", "/v1/predictions",
+        {"input": {"prompt": "a cat", "seed": 1}, "webhook": "https://example.com/hook"}
+    ), poll, poll, download)
+    assert recording.recorded == 4
+
+    # A different seed and no webhook still match, and the last poll repeats
+    replaying = Cassette(path, "replay", ignore_inputs=["seed"])
+    create = ("POST", "/v1/predictions", {"input": {"prompt": "a cat", "seed": 2}})
+    replayed = fetch(replaying, offline(), create, poll, poll, poll, download)
+
+    assert replayed[0].status_code == 201
+    assert [response.json()["status"] for response in replayed[1:4]] == ["processing", "succeeded", "succeeded"]
+    assert replayed[4].content == recorded[3].content == SMALL_FILE
+    assert replaying.stats()["served"] == 5
+
+
+def test_bodies_over_the_limit_are_not_recorded(tmp_path):
+    path = tmp_path / "run.jsonl"
+    recording = Cassette(path, "record", max_body=32)
+    assert fetch(recording, api(), ("GET", "/files/large.png", None))[0].content == LARGE_FILE
+    assert '"omitted"' in path.read_text()
+
+    replaying = Cassette(path, "replay")
+    with pytest.raises(CassetteMiss, match="over the cassette's size limit"):
+        fetch(replaying, offline(), ("GET", "/files/large.png", None))
+    with pytest.raises(CassetteMiss, match="No recorded response"):
+        fetch(replaying, offline(), ("GET", "/files/other.png", None))
+    assert replaying.misses == 2
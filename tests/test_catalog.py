@@ -0,0 +1,53 @@
+"""Tests for loading the model catalog"""
+
+import asyncio
+import json
+import subprocess
+import sys
+
+import pytest
+
+from replicate_mcp.catalog_watcher import CatalogWatcher
+from replicate_mcp.complete_catalog import CATALOG_FILE, CatalogError, load_catalog, packaged_catalog
+
+
+def test_import_does_not_read_catalog():
+    """Importing the package and server parses no catalog until one is needed"""
+    code = (
+        "import replicate_mcp, replicate_mcp.server\n"
+        "from replicate_mcp.complete_catalog import packaged_catalog\n"
+        "assert packaged_catalog.cache_info().currsize == 0\n"
+        "assert replicate_mcp.COMPLETE_MODEL_CATALOG is packaged_catalog().models\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, env={"PYTHONPATH": ":".join(sys.path)})
+
+
+def test_watcher_shares_packaged_catalog():
+    watcher = CatalogWatcher(CATALOG_FILE, overrides={})
+    assert watcher.current is packaged_catalog()
+    assert packaged_catalog.cache_info().misses == 1
+
+
+@pytest.mark.parametrize("entry, problem", [
+    ({"name": "Model", "cost_per_run": 0.01}, "has no id"),
+    ({"id": "a/b", "cost_per_run": 0.01}, "has no name"),
+    ({"id": "a/b", "name": "Model"}, "numeric cost_per_run"),
+    ({"id": "a/b", "name": "Model", "cost_per_run": "cheap"}, "numeric cost_per_run")
+])
+def test_incomplete_model_rejected(tmp_path, entry, problem):
+    source = tmp_path / "catalog.json"
+    source.write_text(json.dumps({"models": {"image_generation": {"model": entry}}}))
+    with pytest.raises(CatalogError, match=problem):
+        load_catalog(source)
+
+
+def test_reload_with_incomplete_model_keeps_catalog(tmp_path):
+    source = tmp_path / "catalog.json"
+    source.write_text(json.dumps({"models": {"image_generation": {
+        "model": {"id": "a/b", "name": "Model", "cost_per_run": 0.01}
+    }}}))
+    watcher = CatalogWatcher(source)
+
+    source.write_text(json.dumps({"models": {"image_generation": {"model": {"id": "a/b"}}}}))
+    assert not asyncio.run(watcher.reload())
+    assert watcher.current.index.get("a/b")["name"] == "Model"
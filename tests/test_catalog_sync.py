@@ -0,0 +1,80 @@
+"""Tests for syncing catalog entries from the models API"""
+
+import asyncio
+
+from aiohttp import web
+
+from replicate_mcp.server import ReplicateMediaServer
+
+
+class ModelsAPI:
+    """Models and hardware endpoints that answer conditional requests with 304"""
+
+    def __init__(self):
+        self.versions = {}
+        self.not_modified = 0
+        self._runner = None
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/v1/models/{owner}/{name}", self._model)
+        app.router.add_get("/v1/hardware", self._hardware)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    async def _model(self, request):
+        model_id = f"{request.match_info['owner']}/{request.match_info['name']}"
+        version = self.versions.get(model_id, "v1")
+        etag = f'"{model_id}-{version}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304)
+        return web.json_response({
+            "description": "A model",
+            "run_count": 7,
+            "url": f"https://replicate.com/{model_id}",
+            "visibility": "public",
+            "latest_version": {"id": f"{model_id.replace('/', '-')}-{version}", "openapi_schema": {}}
+        }, headers={"ETag": etag})
+
+    async def _hardware(self, request):
+        return web.json_response([{"name": "Nvidia T4 GPU", "sku": "gpu-t4"}])
+
+
+def test_generation_bumps_only_when_a_model_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("REPLICATE_API_TOKEN", "r8_test")
+    monkeypatch.setenv("REPLICATE_MCP_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("REPLICATE_CATALOG_RELOAD_INTERVAL", "0")
+    params = {"models": ["meta/musicgen"]}
+
+    async def scenario():
+        api = ModelsAPI()
+        monkeypatch.setenv("REPLICATE_BASE_URL", await api.start())
+        server = ReplicateMediaServer()
+        try:
+            first = await server._sync_catalog(params)
+            assert first["updated"] == ["meta/musicgen"]
+
+            idle = await server._sync_catalog(params)
+            assert idle["updated"] == []
+            assert idle["unchanged"] == 1
+            assert api.not_modified == 1
+            assert idle["catalog_generation"] == first["catalog_generation"]
+
+            api.versions["meta/musicgen"] = "v2"
+            changed = await server._sync_catalog(params)
+            assert changed["updated"] == ["meta/musicgen"]
+            assert changed["catalog_generation"] > first["catalog_generation"]
+            assert server._get_model_info("meta/musicgen")["version"] == "meta-musicgen-v2"
+        finally:
+            await server.http.aclose()
+            await api.stop()
+
+    asyncio.run(scenario())
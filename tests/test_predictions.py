@@ -0,0 +1,26 @@
+"""Tests for creating predictions behind the concurrency limit"""
+
+import asyncio
+
+from fake_replicate import FakeReplicate
+
+
+def test_background_jobs_release_their_slot_once_created(server, monkeypatch):
+    async def scenario():
+        fake = FakeReplicate(latency=0.2, jitter=0.0)
+        monkeypatch.setenv("REPLICATE_BASE_URL", await fake.start())
+        server._prediction_slots = asyncio.Semaphore(1)
+        model_info = server._get_model_info("black-forest-labs/flux-schnell")
+        try:
+            background, _ = await server._submit_prediction("generate_image", model_info, {"prompt": "a"}, wait=False)
+            assert not server._prediction_slots.locked()
+
+            awaited, _ = await server._submit_prediction("generate_image", model_info, {"prompt": "b"})
+            assert server._prediction_slots.locked()
+            await asyncio.wait_for(asyncio.gather(background.task, awaited.task), 5)
+            assert not server._prediction_slots.locked()
+        finally:
+            await server.http.aclose()
+            await fake.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,89 @@
+"""Tests for progress notifications while a tool call waits"""
+
+import asyncio
+from types import SimpleNamespace
+
+from replicate.prediction import Prediction
+
+from replicate_mcp.progress import ProgressReporter, current_reporter
+
+HALFWAY_LOGS = " 50%|#####     | 5/10 [00:01<00:01, 5.00it/s]"
+
+
+def prediction(prediction_id, status, logs=""):
+    return Prediction(
+        id=prediction_id, model="a/b", version="v1", status=status, input={}, output=None, logs=logs,
+        error=None, metrics=None, created_at=None, started_at=None, completed_at=None, urls={}
+    )
+
+
+class Session:
+    def __init__(self):
+        self.sent = []
+
+    async def send_progress_notification(self, token, progress, total=None, message=None):
+        self.sent.append((progress, message))
+
+
+async def wait_reporting(server, record, finish):
+    """Await a record's output with a reporter, finishing it after a few intervals"""
+    session = Session()
+    current_reporter.set(ProgressReporter(session, "token"))
+    server.progress_interval = 0.01
+    record.task = asyncio.get_event_loop().create_future()
+
+    async def complete():
+        await asyncio.sleep(0.05)
+        finish()
+        record.task.set_result(["out.png"])
+
+    asyncio.ensure_future(complete())
+    assert await server._await_output(record) == ["out.png"]
+    return session.sent
+
+
+def test_webhook_driven_prediction_is_refreshed_for_progress(server):
+    record = server.active_predictions.track(prediction("p1", "starting"), "generate_image", {"id": "a/b"})
+    record.pushed = True
+    fetched = []
+
+    async def async_get(prediction_id):
+        fetched.append(prediction_id)
+        return prediction(prediction_id, "processing", HALFWAY_LOGS)
+
+    server.client = SimpleNamespace(predictions=SimpleNamespace(async_get=async_get))
+
+    def finish():
+        record.prediction.status = "succeeded"
+
+    sent = asyncio.run(wait_reporting(server, record, finish))
+    assert fetched and set(fetched) == {"p1"}
+    assert (50.0, "processing 5/10") in sent
+    assert sent[-1] == (100.0, "succeeded")
+
+
+def test_refresh_never_finishes_a_webhook_driven_prediction(server):
+    record = server.active_predictions.track(prediction("p1", "processing"), "generate_image", {"id": "a/b"})
+
+    async def async_get(prediction_id):
+        return prediction(prediction_id, "succeeded", HALFWAY_LOGS)
+
+    server.client = SimpleNamespace(predictions=SimpleNamespace(async_get=async_get))
+    asyncio.run(server._refresh_progress(record))
+    assert record.status == "processing"
+    assert record.prediction.logs == HALFWAY_LOGS
+
+
+def test_hedged_call_reports_backup_once_ahead(server):
+    record = server.active_predictions.track(prediction("p1", "starting"), "generate_image", {"id": "a/b"})
+    backup = server.active_predictions.track(prediction("p2", "processing", HALFWAY_LOGS), "generate_image", {"id": "a/b"})
+    record.hedge = {"prediction_id": "p2", "winner": None}
+
+    def finish():
+        record.hedge["winner"] = "backup"
+        backup.prediction.status = "succeeded"
+        record.prediction.status = "canceled"
+
+    sent = asyncio.run(wait_reporting(server, record, finish))
+    assert sent[0] == (50.0, "processing 5/10")
+    assert sent[-1] == (100.0, "succeeded")
@@ -0,0 +1,103 @@
+"""Tests for the adaptive rate limiter and backing off on 429"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+from aiohttp import web
+
+from replicate_mcp.ratelimit import RateLimiter, TokenBucket, parse_retry_after, retry_after_from_error
+
+
+def test_rate_halves_on_throttle_and_recovers_additively():
+    bucket = TokenBucket(10)
+
+    bucket.on_throttle()
+    bucket.on_throttle()
+    assert bucket.rate == 2.5
+    assert bucket.throttled == 2
+
+    for _ in range(10):
+        bucket.on_throttle()
+    assert bucket.rate == bucket.min_rate == 0.5
+
+    bucket.on_success()
+    assert bucket.rate == 0.7
+    for _ in range(100):
+        bucket.on_success()
+    assert bucket.rate == bucket.max_rate
+
+
+def test_retry_after_blocks_the_bucket():
+    bucket = TokenBucket(100)
+    bucket.on_throttle(retry_after=5)
+
+    assert 4 < bucket.try_acquire() <= 5
+
+
+def test_retry_after_from_header_or_error_detail():
+    in_a_minute = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert parse_retry_after("3") == 3.0
+    assert 55 < parse_retry_after(in_a_minute) <= 60
+    assert parse_retry_after("soon") is None
+
+    error = SimpleNamespace(detail="Request was throttled. Expected available in 7 seconds.")
+    assert retry_after_from_error(error, "2") == 2.0
+    assert retry_after_from_error(error) == 7.0
+    assert retry_after_from_error(SimpleNamespace(detail=None)) is None
+
+
+def test_waiting_on_a_busy_model_holds_no_global_tokens():
+    limiter = RateLimiter(global_rate=2, model_rate=1, token_rate=100)
+
+    async def scenario():
+        await limiter.acquire("a/busy")
+        waiter = asyncio.ensure_future(limiter.acquire("a/busy"))
+        await asyncio.sleep(0.01)
+        # The waiter gave back the global token it could not use
+        assert limiter.global_bucket.try_acquire() == 0
+        waiter.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_prediction_created_after_429_backoff(server, monkeypatch):
+    attempts = []
+
+    async def create(request):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            return web.json_response(
+                {"detail": "Request was throttled.", "status": 429},
+                status=429,
+                headers={"Retry-After": "0.2"}
+            )
+        return web.json_response({
+            "id": "p1", "model": "black-forest-labs/flux-schnell", "version": "v1", "status": "starting",
+            "input": {}, "created_at": "2025-01-01T00:00:00Z", "urls": {}
+        }, status=201)
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post("/v1/models/{owner}/{name}/predictions", create)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        host, port = runner.addresses[0][:2]
+        monkeypatch.setenv("REPLICATE_BASE_URL", f"http://{host}:{port}")
+        try:
+            model_info = {"id": "black-forest-labs/flux-schnell", "name": "FLUX Schnell", "cost_per_run": 0.003}
+            prediction = await server._post_prediction(model_info, {"prompt": "x"})
+        finally:
+            await server.http.aclose()
+            await runner.cleanup()
+
+        assert prediction.id == "p1"
+        assert attempts[1] - attempts[0] >= 0.2
+        model_bucket = server.rate_limiter.model_buckets["black-forest-labs/flux-schnell"]
+        assert model_bucket.throttled == 1
+        assert model_bucket.rate < model_bucket.max_rate
+
+    asyncio.run(scenario())
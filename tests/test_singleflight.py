@@ -0,0 +1,60 @@
+"""Tests for coalescing identical in-flight calls"""
+
+import asyncio
+
+import pytest
+
+from replicate_mcp.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_operation():
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("key", operation) for _ in range(3)))
+        assert results == [("result", False), ("result", True), ("result", True)]
+        assert flight.coalesced == 2
+
+        # The next call after forget starts over
+        flight.forget("key")
+        assert await flight.do("key", operation) == ("result", False)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_owner_error_reaches_joiners():
+    async def operation():
+        await asyncio.sleep(0.01)
+        raise ValueError("bad input")
+
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(flight.do("key", operation), flight.do("key", operation), return_exceptions=True)
+        assert [str(result) for result in results] == ["bad input", "bad input"]
+        assert len(flight) == 0
+
+    asyncio.run(scenario())
+
+
+def test_owner_cancellation_fails_joiners_without_cancelling_them():
+    async def scenario():
+        flight = SingleFlight()
+        owner = asyncio.ensure_future(flight.do("key", lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0)
+        joiner = asyncio.ensure_future(flight.do("key", lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0)
+
+        owner.cancel()
+        with pytest.raises(RuntimeError, match="shared request was cancelled"):
+            await joiner
+        assert owner.cancelled()
+        assert len(flight) == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,67 @@
+"""Tests for checking inputs against a version's schema"""
+
+import pytest
+
+from replicate_mcp.validation import InputValidationError, InputValidator
+
+
+def validator(properties, required=()):
+    schema = {"components": {"schemas": {
+        "Input": {"type": "object", "properties": properties, "required": list(required)},
+        "aspect_ratio": {"type": "string", "enum": ["1:1", "16:9"]}
+    }}}
+    return InputValidator("a/b", schema)
+
+
+def problems(check, input_params):
+    with pytest.raises(InputValidationError) as raised:
+        check.validate(input_params)
+    return raised.value.problems
+
+
+def test_values_coerced_to_schema_types():
+    check = validator({
+        "steps": {"type": "integer"},
+        "guidance": {"type": "number"},
+        "safe": {"type": "boolean"},
+        "prompt": {"type": "string"}
+    })
+
+    assert check.validate({"steps": "4", "guidance": "3.5", "safe": "false", "prompt": "x"}) == {
+        "steps": 4, "guidance": 3.5, "safe": False, "prompt": "x"
+    }
+    assert check.validate({"steps": 4.0}) == {"steps": 4}
+    assert problems(check, {"steps": 4.5, "safe": "maybe", "prompt": 1}) == [
+        "steps must be an integer", "safe must be a boolean", "prompt must be a string"
+    ]
+
+
+def test_enum_through_ref():
+    check = validator({"aspect_ratio": {"allOf": [{"$ref": "#/components/schemas/aspect_ratio"}]}})
+
+    assert check.validate({"aspect_ratio": "16:9"}) == {"aspect_ratio": "16:9"}
+    assert problems(check, {"aspect_ratio": "4:3"}) == ["aspect_ratio must be one of 1:1, 16:9"]
+
+
+def test_minimum_and_maximum():
+    check = validator({"steps": {"type": "integer", "minimum": 1, "maximum": 50}})
+
+    assert check.validate({"steps": 50}) == {"steps": 50}
+    assert problems(check, {"steps": 0}) == ["steps must be at least 1"]
+    assert problems(check, {"steps": 51}) == ["steps must be at most 50"]
+
+
+def test_multiple_of_tolerates_float_rounding():
+    check = validator({"strength": {"type": "number", "multipleOf": 0.1}, "width": {"type": "integer", "multipleOf": 16}})
+
+    assert check.validate({"strength": 0.3, "width": 1024}) == {"strength": 0.3, "width": 1024}
+    assert check.validate({"strength": 0.7}) == {"strength": 0.7}
+    assert problems(check, {"strength": 0.35, "width": 1000}) == [
+        "strength must be a multiple of 0.1", "width must be a multiple of 16"
+    ]
+
+
+def test_unknown_and_missing_inputs():
+    check = validator({"prompt": {"type": "string"}}, required=["prompt"])
+
+    assert problems(check, {"style": "bold"}) == ["style is not accepted by this model", "prompt is required"]
@@ -0,0 +1,96 @@
+"""Tests for webhook signatures, the receiver and the fallback to polling"""
+
+import asyncio
+import json
+import socket
+import time
+
+import aiohttp
+
+from fake_replicate import FakeReplicate
+from replicate_mcp.webhooks import WebhookReceiver, sign_webhook, verify_signature
+
+SECRET = "whsec_c2VjcmV0LWtleS1mb3ItdGVzdHM="
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def signed_headers(body, secret=SECRET, webhook_id="msg_1", timestamp=None):
+    timestamp = str(int(time.time() if timestamp is None else timestamp))
+    return {
+        "webhook-id": webhook_id,
+        "webhook-timestamp": timestamp,
+        "webhook-signature": sign_webhook(secret, webhook_id, timestamp, body)
+    }
+
+
+def test_signature_verification():
+    body = b'{"id": "p1", "status": "succeeded"}'
+
+    assert verify_signature(SECRET, signed_headers(body), body)
+    assert not verify_signature(SECRET, signed_headers(body), body + b" ")
+    assert not verify_signature(SECRET, signed_headers(body, secret="whsec_b3RoZXI="), body)
+    assert not verify_signature(SECRET, signed_headers(body, timestamp=time.time() - 600), body)
+    assert not verify_signature(SECRET, {}, body)
+
+
+def test_any_signature_matches_during_rotation():
+    body = b'{"id": "p1"}'
+    headers = signed_headers(body)
+    headers["webhook-signature"] = "v1,b2xkLXNpZ25hdHVyZQ== " + headers["webhook-signature"]
+
+    assert verify_signature(SECRET, headers, body)
+
+
+def test_receiver_resolves_only_signed_events():
+    async def scenario():
+        port = free_port()
+        receiver = WebhookReceiver(f"http://127.0.0.1:{port}", secret=SECRET, host="127.0.0.1", port=port)
+        await receiver.start()
+        try:
+            waiter = receiver.expect("p1")
+            body = json.dumps({"id": "p1", "status": "succeeded", "output": ["out.png"]}).encode()
+            async with aiohttp.ClientSession() as session:
+                async with session.post(receiver.url, data=body) as response:
+                    assert response.status == 401
+                assert not waiter.done()
+
+                async with session.post(receiver.url, data=body, headers=signed_headers(body)) as response:
+                    assert response.status == 204
+            assert (await waiter)["output"] == ["out.png"]
+            assert receiver.stats()["rejected"] == 1
+            assert receiver.stats()["resolved"] == 1
+        finally:
+            await receiver.stop()
+
+    asyncio.run(scenario())
+
+
+def test_lost_webhook_falls_back_to_polling(server, monkeypatch):
+    async def scenario():
+        fake = FakeReplicate(latency=0.1, jitter=0.0)
+        monkeypatch.setenv("REPLICATE_BASE_URL", await fake.start())
+        # Registered on predictions, but the fake API never delivers to it
+        port = free_port()
+        receiver = WebhookReceiver(f"http://127.0.0.1:{port}", secret=SECRET, host="127.0.0.1", port=port)
+        await receiver.start()
+        server.webhooks = receiver
+        server.webhook_fallback = 0.05
+        try:
+            model_info = server._get_model_info("black-forest-labs/flux-schnell")
+            record, _ = await server._submit_prediction("generate_image", model_info, {"prompt": "x"})
+            output = await asyncio.wait_for(record.task, 5)
+        finally:
+            await receiver.stop()
+            await server.http.aclose()
+            await fake.stop()
+
+        assert record.prediction.status == "succeeded"
+        assert output == [f"{fake.base_url}/files/{record.id}.png"]
+        assert receiver.stats()["resolved"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,103 @@
+"""Tests for workflow templates and their execution"""
+
+import asyncio
+import json
+
+import pytest
+
+from replicate_mcp.catalog_watcher import CatalogWatcher
+from replicate_mcp.complete_catalog import load_catalog
+from replicate_mcp.validation import InputValidator
+from replicate_mcp.workflows import WorkflowEngine, WorkflowError, check_template, validate_workflow
+
+TOOL_ARGUMENTS = {"generate_image": ("prompt", "num_outputs"), "remove_background": ("media_url",)}
+
+
+def workflow(*steps):
+    return {"name": "Test", "description": "Test workflow", "steps": list(steps)}
+
+
+def test_duplicate_step_names_rejected():
+    template = workflow(
+        {"step": "images", "tool": "generate_image", "model": "a/b", "inputs": {"prompt": "workflow.prompt"}},
+        {"step": "images", "tool": "generate_image", "model": "c/d", "inputs": {"prompt": "workflow.prompt"}}
+    )
+    with pytest.raises(WorkflowError, match="Duplicate step name: images"):
+        validate_workflow(template, {"prompt": "x"})
+    with pytest.raises(WorkflowError, match="Duplicate step name"):
+        check_template(template, TOOL_ARGUMENTS)
+
+
+def test_template_arguments_a_tool_drops_rejected():
+    template = workflow(
+        {"step": "images", "tool": "generate_image", "model": "a/b", "params": {"style": "bold"}}
+    )
+    with pytest.raises(WorkflowError, match="generate_image does not take style"):
+        check_template(template, TOOL_ARGUMENTS)
+
+    # predict steps pass their params to the model as they are
+    check_template(workflow({"step": "raw", "model": "a/b", "params": {"style": "bold"}}), TOOL_ARGUMENTS)
+
+
+def test_packaged_templates_pass_tool_check():
+    from replicate_mcp.server import _check_workflows
+
+    _check_workflows(load_catalog())
+
+
+def test_reload_rejected_by_check_keeps_catalog(tmp_path):
+    from replicate_mcp.server import _check_workflows
+
+    source = tmp_path / "catalog.json"
+    source.write_text(json.dumps({"models": {}, "workflows": {}}))
+    watcher = CatalogWatcher(source, check=_check_workflows)
+
+    source.write_text(json.dumps({"models": {}, "workflows": {"bad": workflow(
+        {"step": "images", "tool": "generate_image", "model": "a/b", "params": {"style": "bold"}}
+    )}}))
+    assert not asyncio.run(watcher.reload())
+    assert watcher.current.workflows == {}
+    assert "does not take style" in watcher.last_error
+
+
+def test_downstream_step_gets_first_output():
+    seen = []
+
+    async def run_step(step, params):
+        seen.append((step["step"], params))
+        return {"output": ["first.png", "second.png"] if step["step"] == "images" else "done.png"}
+
+    template = workflow(
+        {"step": "images", "tool": "generate_image", "model": "a/b", "inputs": {"prompt": "workflow.prompt"}},
+        {"step": "cutout", "tool": "remove_background", "model": "c/d", "inputs": {"media_url": "images.output"}}
+    )
+    result = asyncio.run(WorkflowEngine(run_step).execute(template, {"prompt": "x"}))
+
+    assert result["status"] == "completed"
+    assert seen[1] == ("cutout", {"media_url": "first.png"})
+
+
+def test_inputs_checked_against_schemas_before_any_step_runs(tmp_path, monkeypatch):
+    monkeypatch.setenv("REPLICATE_API_TOKEN", "r8_test")
+    monkeypatch.setenv("REPLICATE_MCP_CACHE_DIR", str(tmp_path))
+    from replicate_mcp.server import ReplicateMediaServer
+
+    server = ReplicateMediaServer()
+    schema = {"components": {"schemas": {"Input": {"properties": {"video": {"type": "string"}}}}}}
+
+    async def input_validator(model_info):
+        return InputValidator(model_info["id"], schema)
+
+    async def run_step(step, params):
+        raise AssertionError("no step may run")
+
+    server._input_validator = input_validator
+    server.workflow_engine = WorkflowEngine(run_step)
+    # The packaged catalog is shared, so the template must not outlive the test
+    monkeypatch.setitem(server.catalog.current.workflows, "test", workflow(
+        {"step": "sync", "model": "zsxkib/mmaudio", "params": {"sync_mode": "beat_match"},
+         "inputs": {"video": "workflow.video"}}
+    ))
+
+    result = asyncio.run(server._execute_workflow({"workflow": "test", "inputs": {"video": "v.mp4"}}))
+    assert result == {"error": "Step sync: zsxkib/mmaudio does not accept sync_mode"}